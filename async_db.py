@@ -0,0 +1,253 @@
+"""
+Асинхронные аналоги функций поиска mysql_connector и записи лога log_writer (aiomysql и motor).
+
+Поиск всегда выполняется запросами к MySQL: настройки SEARCH_BACKEND ('replica', 'catalog')
+и KEYWORD_SEARCH_ENGINE ('trigram') здесь не учитываются, поиск по ключевому слову
+идёт через LIKE. Индексы MongoDB создаются по общему списку log_writer.index_specs.
+"""
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import aiomysql
+import pymysql
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import DESCENDING
+from pymongo.errors import OperationFailure, PyMongoError
+
+import mysql_connector as mc
+from config import MYSQL_CONFIG, DEFAULT_LIMIT, MONGODB_URI, MONGODB_DB, MONGODB_COLLECTION
+from log_writer import (make_log_document, summary_updates, ttl_options, index_specs, INDEX_CONFLICT_CODES,
+                        MONGODB_SUMMARY_COLLECTION)
+
+_mysql_pool: Optional[aiomysql.Pool] = None
+_mysql_pool_lock = asyncio.Lock()
+_mongo_client: Optional[AsyncIOMotorClient] = None
+_mongo_indexes_ready = False
+_pending_logs: Set["asyncio.Task[bool]"] = set()
+
+
+async def get_mysql_pool() -> aiomysql.Pool:
+    """
+    Возвращает общий асинхронный пул соединений MySQL, создавая его при первом обращении.
+
+    Размер пула совпадает с синхронным (MYSQL_POOL_SIZE, но не меньше 1).
+
+    :return: Пул aiomysql.
+    """
+    global _mysql_pool
+    async with _mysql_pool_lock:
+        if _mysql_pool is None:
+            _mysql_pool = await aiomysql.create_pool(
+                host=MYSQL_CONFIG['host'],
+                user=MYSQL_CONFIG['user'],
+                password=MYSQL_CONFIG['password'],
+                db=MYSQL_CONFIG['database'],
+                minsize=1,
+                maxsize=max(mc.MYSQL_POOL_SIZE, 1),
+                autocommit=True,
+                cursorclass=aiomysql.DictCursor
+            )
+        return _mysql_pool
+
+
+def _mongo_collection(name: str = MONGODB_COLLECTION) -> Any:
+    global _mongo_client
+    if _mongo_client is None:
+        _mongo_client = AsyncIOMotorClient(MONGODB_URI)
+    return _mongo_client[MONGODB_DB][name]
+
+
+async def _fetch(sql: str, params: Optional[Tuple] = None, one: bool = False) -> Any:
+    """
+    Выполняет запрос на соединении из асинхронного пула.
+
+    :return: Список строк (или одна строка при one=True); [] / None при ошибке MySQL.
+    """
+    try:
+        pool = await get_mysql_pool()
+        async with pool.acquire() as connection:
+            async with connection.cursor() as cursor:
+                await cursor.execute(sql, params)
+                return await (cursor.fetchone() if one else cursor.fetchall())
+    except (pymysql.MySQLError, OSError) as e:
+        print(f"MySQL error: {e}")
+        return None if one else []
+
+
+async def _fetch_page(ids_sql: str, ids_params: Tuple, join_sql: str, join_params: Tuple,
+                      genre: Optional[str] = None) -> List[Dict]:
+    if mc.SEARCH_STRATEGY != 'two_phase':
+        return list(await _fetch(join_sql, join_params))
+    film_ids = [row['film_id'] for row in await _fetch(ids_sql, ids_params)]
+    if not film_ids:
+        return []
+    return mc.order_by_ids(list(await _fetch(*mc.films_by_ids_query(film_ids, genre))), film_ids)
+
+
+async def async_search_by_keyword(keyword: str, offset: int = 0, limit: int = DEFAULT_LIMIT,
+                                  page_token: Optional[str] = None) -> List[Dict]:
+    """
+    Асинхронный аналог mysql_connector.search_by_keyword (движок 'like').
+
+    :param keyword: Ключевое слово для поиска в названии фильма.
+    :param offset: Смещение для постраничного вывода (если page_token не задан).
+    :param limit: Количество фильмов на страницу.
+    :param page_token: Токен продолжения из next_page_token().
+    :return: Список фильмов.
+    """
+    after_id, offset = mc.decode_page_token(page_token) if page_token else (0, offset)
+    params = (f'%{keyword}%', after_id, limit, offset)
+    return await _fetch_page(mc.KEYWORD_PAGE_IDS_SQL, params,
+                             mc.FILM_COLUMNS + mc.KEYWORD_SEARCH_SOURCE + mc.PAGE_TAIL_SQL, params)
+
+
+async def async_search_by_genre_and_years(genre: str, year_from: int, year_to: int, offset: int = 0,
+                                          limit: int = DEFAULT_LIMIT,
+                                          page_token: Optional[str] = None) -> List[Dict]:
+    """
+    Асинхронный аналог mysql_connector.search_by_genre_and_years.
+
+    :param genre: Название жанра.
+    :param year_from: Начальный год диапазона.
+    :param year_to: Конечный год диапазона.
+    :param offset: Смещение (если page_token не задан).
+    :param limit: Количество фильмов на страницу.
+    :param page_token: Токен продолжения из next_page_token().
+    :return: Список фильмов.
+    """
+    after_id, offset = mc.decode_page_token(page_token) if page_token else (0, offset)
+    return await _fetch_page(mc.GENRE_PAGE_IDS_SQL, (year_from, year_to, after_id, genre, limit, offset),
+                             mc.FILM_COLUMNS + mc.GENRE_SEARCH_SOURCE + mc.PAGE_TAIL_SQL,
+                             (genre, year_from, year_to, after_id, limit, offset), genre)
+
+
+async def async_get_all_genres() -> List[Dict[str, Any]]:
+    """Асинхронный аналог mysql_connector.get_all_genres."""
+    return list(await _fetch(mc.ALL_GENRES_SQL))
+
+
+async def async_get_min_max_years() -> Tuple[Optional[int], Optional[int]]:
+    """Асинхронный аналог mysql_connector.get_min_max_years."""
+    years = await _fetch(mc.YEAR_BOUNDS_SQL, one=True)
+    return (years['min_year'], years['max_year']) if years else (None, None)
+
+
+async def load_genre_choices() -> Tuple[List[Dict[str, Any]], Tuple[Optional[int], Optional[int]]]:
+    """
+    Загружает данные для выбора жанра и лет (пункт меню 2) двумя параллельными запросами.
+
+    :return: Кортеж (жанры, (минимальный год, максимальный год)).
+    """
+    genres, years = await asyncio.gather(async_get_all_genres(), async_get_min_max_years())
+    return genres, years
+
+
+async def _ensure_ttl_index(collection, field: str, days: Optional[float]) -> None:
+    """Асинхронный аналог log_writer._ensure_ttl_index: пересоздаёт индекс с другим сроком хранения."""
+    keys = [(field, DESCENDING)]
+    try:
+        await collection.create_index(keys, **ttl_options(days))
+    except OperationFailure as e:
+        if e.code not in INDEX_CONFLICT_CODES:
+            raise
+        await collection.drop_index(keys)
+        await collection.create_index(keys, **ttl_options(days))
+
+
+async def _ensure_mongo_indexes() -> None:
+    global _mongo_indexes_ready
+    if _mongo_indexes_ready:
+        return
+    await asyncio.gather(*(_ensure_ttl_index(target, field, days)
+                           for target, field, days in index_specs(_mongo_collection())))
+    _mongo_indexes_ready = True
+
+
+async def async_log_search(search_type: str, params: dict, results_count: int) -> bool:
+    """
+    Асинхронный аналог log_writer.log_search: запись в лог и в сводную коллекцию выполняются параллельно.
+
+    :param search_type: Тип поиска ('keyword' или 'genre&years').
+    :param params: Параметры поиска.
+    :param results_count: Кол-во найденных результатов.
+    :return: True при успехе, иначе False.
+    """
+    document = make_log_document(search_type, params, results_count)
+    try:
+        await _ensure_mongo_indexes()
+        await asyncio.gather(
+            _mongo_collection().insert_one(document),
+            _mongo_collection(MONGODB_SUMMARY_COLLECTION).bulk_write(summary_updates([document]), ordered=False),
+        )
+        return True
+    except PyMongoError as e:
+        print(f"MongoDB logging error: {e}")
+        return False
+
+
+async def async_get_recent_requests() -> List[dict]:
+    """Асинхронный аналог log_stats.get_recent_requests."""
+    try:
+        cursor = _mongo_collection(MONGODB_SUMMARY_COLLECTION).find({}, {"timestamp": 1, "search_type": 1})
+        return await cursor.sort("timestamp", DESCENDING).limit(5).to_list(5)
+    except PyMongoError as e:
+        print(f"Query error (recent): {e}")
+        return []
+
+
+async def async_get_popular_requests(limit: int = 5) -> List[dict]:
+    """Асинхронный аналог log_stats.get_popular_requests."""
+    try:
+        cursor = _mongo_collection(MONGODB_SUMMARY_COLLECTION).find({}, {"count": 1, "search_type": 1})
+        return await cursor.sort("count", DESCENDING).limit(limit).to_list(limit)
+    except PyMongoError as e:
+        print(f"Query error (popular): {e}")
+        return []
+
+
+def log_in_background(search_type: str, params: dict, results_count: int) -> "asyncio.Task[bool]":
+    """
+    Запускает запись лога фоновой задачей, чтобы вывод результатов её не ждал.
+
+    Незавершённые задачи дожидаются в close_async_resources().
+
+    :return: Задача записи лога.
+    """
+    task = asyncio.ensure_future(async_log_search(search_type, params, results_count))
+    _pending_logs.add(task)
+    task.add_done_callback(_pending_logs.discard)
+    return task
+
+
+async def async_search_and_log(search_type: str, params: dict,
+                               page_token: Optional[str] = None) -> List[Dict]:
+    """
+    Ищет страницу фильмов и запускает запись лога параллельно с дальнейшей работой вызывающего кода.
+
+    :param search_type: 'keyword' (params: keyword) или 'genre&years' (params: genre, year_from, year_to).
+    :param params: Параметры поиска в том виде, в каком они пишутся в лог.
+    :param page_token: Токен продолжения.
+    :return: Страница фильмов.
+    """
+    if search_type == 'keyword':
+        movies = await async_search_by_keyword(params['keyword'], page_token=page_token)
+    else:
+        movies = await async_search_by_genre_and_years(params['genre'], params['year_from'], params['year_to'],
+                                                       page_token=page_token)
+    if movies:
+        log_in_background(search_type, params, len(movies))
+    return movies
+
+
+async def close_async_resources() -> None:
+    """Дожидается фоновых записей лога и закрывает асинхронные пулы."""
+    global _mysql_pool, _mongo_client
+    if _pending_logs:
+        await asyncio.gather(*_pending_logs, return_exceptions=True)
+    if _mysql_pool is not None:
+        _mysql_pool.close()
+        await _mysql_pool.wait_closed()
+        _mysql_pool = None
+    if _mongo_client is not None:
+        _mongo_client.close()
+        _mongo_client = None
@@ -0,0 +1,70 @@
+"""
+Задержка сценария пункта меню 2 (жанры + диапазон лет + первая страница + запись лога):
+синхронный путь против асинхронного с asyncio.gather.
+
+Запуск:
+    python benchmarks/bench_async.py                 # заменители с имитацией сети
+    python benchmarks/bench_async.py --real          # MySQL и MongoDB из config.py
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from standins import install_config, patch_async, patch_mongo, patch_mysql, temp_sakila
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--real", action="store_true", help="использовать настоящие серверы из config.py")
+    parser.add_argument("--rtt-ms", type=float, default=2.0, help="имитация RTT одного запроса, мс")
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    install_config(SEARCH_CACHE_SIZE=0, REFERENCE_CACHE_SIZE=0, LOG_ASYNC=False)
+    import async_db
+    import log_writer
+    import mysql_connector as mc
+
+    if not args.real:
+        path = temp_sakila()
+        rtt = args.rtt_ms / 1000
+        patch_mysql(mc, path, query_latency=rtt)
+        store = patch_mongo(log_writer, op_latency=rtt)
+        patch_async(async_db, path, store, query_latency=rtt, op_latency=rtt)
+
+    def sync_flow() -> None:
+        genres = mc.get_all_genres()
+        min_year, max_year = mc.get_min_max_years()
+        movies = mc.search_by_genre_and_years(genres[0]['name'], min_year, max_year)
+        log_writer.log_search("genre&years", {"genre": genres[0]['name'], "year_from": min_year,
+                                              "year_to": max_year}, len(movies))
+
+    async def async_flow() -> None:
+        genres, (min_year, max_year) = await async_db.load_genre_choices()
+        await async_db.async_search_and_log("genre&years", {"genre": genres[0]['name'], "year_from": min_year,
+                                                            "year_to": max_year})
+
+    sync_samples = []
+    for _ in range(args.rounds):
+        started = time.perf_counter()
+        sync_flow()
+        sync_samples.append((time.perf_counter() - started) * 1000)
+
+    async def run_async() -> list:
+        samples = []
+        for _ in range(args.rounds):
+            started = time.perf_counter()
+            await async_flow()
+            samples.append((time.perf_counter() - started) * 1000)
+        await async_db.close_async_resources()
+        return samples
+
+    async_samples = asyncio.run(run_async())
+    for label, samples in (("sync", sync_samples), ("async", async_samples)):
+        print(f"{label:<6} p50={statistics.median(samples):7.3f} ms  mean={statistics.mean(samples):7.3f} ms")
+    mc.close_pool()
+
+
+if __name__ == "__main__":
+    main()
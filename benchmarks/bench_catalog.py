@@ -0,0 +1,78 @@
+"""
+Поиск через MySQL против столбцового каталога в памяти (catalog.py) на синтетическом каталоге.
+
+Выводит время загрузки, объём памяти по столбцам и медианную задержку фильтра
+по жанру и годам, границ лет и поиска по ключевому слову в обоих режимах.
+
+Запуск:
+    python benchmarks/bench_catalog.py --films 1000000
+    python benchmarks/bench_catalog.py --real
+"""
+import argparse
+import statistics
+import time
+
+from standins import install_config, patch_mysql, temp_sakila
+
+
+def timed(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def normalized(result):
+    """Порядок актёров в GROUP_CONCAT не определён, поэтому сравниваются отсортированные списки."""
+    if not isinstance(result, list):
+        return result
+    return [{**movie, "actors": sorted((movie["actors"] or "").split(", "))} for movie in result]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--real", action="store_true", help="использовать настоящий MySQL из config.py")
+    parser.add_argument("--films", type=int, default=100000, help="размер синтетического каталога")
+    parser.add_argument("--rtt", type=float, default=0.5, help="имитация RTT запроса к MySQL, мс")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    install_config(SEARCH_CACHE_SIZE=0, REFERENCE_CACHE_SIZE=0, CATALOG_REFRESH_INTERVAL=0)
+    import mysql_connector as mc
+    import catalog
+
+    if not args.real:
+        patch_mysql(mc, temp_sakila(args.films), query_latency=args.rtt / 1000)
+
+    started = time.perf_counter()
+    loaded = catalog.reload_catalog()
+    print(f"load: {(time.perf_counter() - started) * 1000:.1f} ms, {len(loaded)} films")
+    for column, size in loaded.nbytes().items():
+        print(f"  {column:<14} {size / 1024 / 1024:>9.2f} MiB")
+
+    min_year, max_year = loaded.year_bounds
+    genre = loaded.categories[0]["name"]
+    queries = {
+        f"genre {genre}, all years": lambda: mc.search_by_genre_and_years(genre, min_year, max_year),
+        f"genre {genre}, one year": lambda: mc.search_by_genre_and_years(genre, max_year, max_year),
+        f"genre {genre}, deep page": lambda: mc.search_by_genre_and_years(genre, min_year, max_year, offset=1000),
+        "min/max year": mc.get_min_max_years,
+        "keyword 'al'": lambda: mc.search_by_keyword("al"),
+        "keyword 'holy trip'": lambda: mc.search_by_keyword("holy trip"),
+    }
+    print(f"\n{'query':<28} {'mysql, ms':>10} {'catalog, ms':>12}  same results")
+    for label, query in queries.items():
+        timings, results = {}, {}
+        for backend in ("mysql", "catalog"):
+            mc.SEARCH_BACKEND = backend
+            timings[backend] = timed(query, args.repeat)
+            results[backend] = normalized(query())
+        print(f"{label:<28} {timings['mysql']:>10.3f} {timings['catalog']:>12.3f}  "
+              f"{results['mysql'] == results['catalog']}")
+    mc.close_pool()
+
+
+if __name__ == "__main__":
+    main()
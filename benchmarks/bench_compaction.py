@@ -0,0 +1,107 @@
+"""
+Лог поиска: миграция строковых timestamp, почасовые сводки и статистика за период.
+
+Загружает --events событий, равномерно распределённых по последним --days дням:
+самые старые --legacy-events — со строковым timestamp (формат до перехода на даты),
+остальные — с датой. Измеряет миграцию (перевод строк в даты и первичное сведение),
+сведение всего лога с нуля, объём лога и сводок, популярные запросы за час, день
+и неделю через сводки против агрегации исходных событий за тот же период (результаты
+должны совпадать) и сведение ещё одного часа трафика.
+
+mongomock не использует индексы, а TTL-индексы проверяет перебором всех документов
+при каждом обращении, поэтому с заменителем TTL отключается, а объём стоит держать
+небольшим: замеры на нём проверяют корректность, а не масштаб.
+
+Запуск:
+    python benchmarks/bench_compaction.py --events 20000              # mongomock
+    python benchmarks/bench_compaction.py --real --events 10000000    # MongoDB из config.py
+"""
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+from datagen import load_log
+from standins import install_config, patch_mongo
+
+
+def timed(func) -> tuple:
+    started = time.perf_counter()
+    result = func()
+    return (time.perf_counter() - started) * 1000, result
+
+
+def raw_popular(collection, since: datetime, limit: int = 5) -> list:
+    """Популярные запросы за период прямой агрегацией исходных событий."""
+    return list(collection.aggregate([
+        {"$match": {"timestamp": {"$gte": since}}},
+        {"$group": {"_id": "$params", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1}},
+        {"$limit": limit},
+    ], allowDiskUse=True))
+
+
+def storage(db, name: str, real: bool) -> str:
+    count = db[name].count_documents({})
+    if not real:
+        return f"{count:>10} docs"
+    stats = db.command("collStats", name)
+    return (f"{count:>10} docs {stats['size'] / 2 ** 20:>9.1f} MiB data "
+            f"{stats['totalIndexSize'] / 2 ** 20:>8.1f} MiB indexes")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--real", action="store_true", help="использовать настоящий MongoDB из config.py")
+    parser.add_argument("--database", default="search_log_bench", help="база MongoDB (удаляется перед запуском)")
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--legacy-events", type=int, help="событий со строковым timestamp "
+                                                          "(по умолчанию все с --real, 1000 с заменителем)")
+    parser.add_argument("--days", type=float, default=14, help="за сколько последних дней распределены события")
+    args = parser.parse_args()
+
+    overrides = {} if args.real else {"LOG_RETENTION_DAYS": 0, "LOG_ROLLUP_RETENTION_DAYS": 0}
+    install_config(MONGODB_DB=args.database, LOG_COMPACTION_INTERVAL=0, LOG_ASYNC=False, **overrides)
+    import log_stats
+    import log_writer
+
+    client = log_writer.MongoClient(log_writer.MONGODB_URI) if args.real else patch_mongo(log_writer)
+    client.drop_database(args.database)
+    db = client[args.database]
+    collection = db[log_writer.MONGODB_COLLECTION]
+
+    legacy = min(args.events, args.legacy_events if args.legacy_events is not None
+                 else args.events if args.real else 1000)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    span = timedelta(days=args.days)
+    step = span / args.events
+    print(f"loading {args.events} events over {args.days:g} days ({legacy} with string timestamps) ...")
+    load_log(collection, legacy, start=now - span, step=step, string_timestamps=True)
+    log_stats.backfill_summary()
+    load_log(collection, args.events - legacy, seed=2, start=now - span + step * legacy, step=step)
+
+    elapsed, converted = timed(log_stats.migrate_timestamps)
+    print(f"migration + compaction : {elapsed:10.1f} ms ({converted} converted)")
+    db[log_stats.COMPACTION_STATE_COLLECTION].drop()
+    elapsed, written = timed(log_stats.compact_log)
+    print(f"compaction from scratch: {elapsed:10.1f} ms ({args.events / elapsed * 1000:.0f} events/s)")
+    print(f"raw log      : {storage(db, log_writer.MONGODB_COLLECTION, args.real)}")
+    print(f"hourly rollup: {storage(db, log_writer.MONGODB_ROLLUP_COLLECTION, args.real)}")
+
+    print(f"\n{'window':<8} {'rollups, ms':>12} {'raw scan, ms':>13}  same top-5 counts")
+    for window, length in log_stats.WINDOWS.items():
+        rollup_ms, popular = timed(lambda: log_stats.get_popular_requests(window=window))
+        raw_ms, raw = timed(lambda: raw_popular(collection, datetime.now(timezone.utc).replace(tzinfo=None) - length))
+        same = [r["count"] for r in popular] == [r["count"] for r in raw]
+        print(f"{window:<8} {rollup_ms:>12.1f} {raw_ms:>13.1f}  {same}")
+
+    # Ещё один час трафика: сводится только он, а не весь лог.
+    hour_start = now.replace(minute=0, second=0, microsecond=0)
+    per_hour = max(round(args.events / (args.days * 24)), 1)
+    load_log(collection, per_hour, seed=3, start=hour_start, step=timedelta(hours=1) / per_hour)
+    elapsed, written = timed(lambda: log_stats.compact_log(until=hour_start + timedelta(hours=1)))
+    print(f"\nnext hour compaction   : {elapsed:10.1f} ms ({per_hour} events, {written} rollups)")
+    client.drop_database(args.database)
+
+
+if __name__ == "__main__":
+    main()
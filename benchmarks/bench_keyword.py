@@ -0,0 +1,58 @@
+"""
+Поиск по ключевому слову: LIKE '%keyword%' против индекса триграмм на синтетическом каталоге.
+
+Запуск:
+    python benchmarks/bench_keyword.py --films 100000
+    python benchmarks/bench_keyword.py --real
+"""
+import argparse
+import statistics
+import time
+
+from standins import install_config, patch_mysql, temp_sakila
+
+
+def timed(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--real", action="store_true", help="использовать настоящий MySQL из config.py")
+    parser.add_argument("--films", type=int, default=100000, help="размер синтетического каталога")
+    parser.add_argument("--keywords", default="al,ace,dinosaur,holy trip,zzz", help="ключевые слова через запятую")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    install_config(SEARCH_CACHE_SIZE=0)
+    import mysql_connector as mc
+
+    if not args.real:
+        patch_mysql(mc, temp_sakila(args.films))
+
+    mc.KEYWORD_SEARCH_ENGINE = "trigram"
+    started = time.perf_counter()
+    mc.search_by_keyword("warm-up")
+    print(f"index build: {(time.perf_counter() - started) * 1000:.1f} ms, {len(mc._title_index)} titles\n")
+
+    print(f"{'keyword':<12} {'like, ms':>10} {'trigram, ms':>12}  same results")
+    for keyword in args.keywords.split(","):
+        results = {}
+        timings = {}
+        for engine in ("like", "trigram"):
+            mc.KEYWORD_SEARCH_ENGINE = engine
+            search = mc.search_by_keyword.__wrapped__
+            timings[engine] = timed(lambda: search(keyword), args.repeat)
+            results[engine] = search(keyword)
+        print(f"{keyword:<12} {timings['like']:>10.3f} {timings['trigram']:>12.3f}  "
+              f"{results['like'] == results['trigram']}")
+    mc.close_pool()
+
+
+if __name__ == "__main__":
+    main()
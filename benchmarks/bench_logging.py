@@ -0,0 +1,63 @@
+"""
+Пропускная способность записи лога поиска: синхронный insert_one против фонового конвейера.
+
+Запуск:
+    python benchmarks/bench_logging.py                 # mongomock с имитацией сети
+    python benchmarks/bench_logging.py --real          # MongoDB из config.py
+"""
+import argparse
+import time
+
+from standins import install_config, patch_mongo
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--real", action="store_true", help="использовать настоящий MongoDB из config.py")
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--connect-ms", type=float, default=3.0, help="имитация подключения, мс")
+    parser.add_argument("--rtt-ms", type=float, default=0.5, help="имитация RTT операции, мс")
+    parser.add_argument("--batch", type=int, default=50)
+    parser.add_argument("--database", default="search_log_bench", help="база MongoDB (удаляется перед запуском)")
+    args = parser.parse_args()
+
+    # mongomock проверяет TTL-индекс перебором всех документов при каждом обращении.
+    install_config(MONGODB_DB=args.database, **({} if args.real else {"LOG_RETENTION_DAYS": 0}))
+    import log_writer
+
+    if args.real:
+        store = log_writer.MongoClient(log_writer.MONGODB_URI)
+    else:
+        store = patch_mongo(log_writer, connect_latency=args.connect_ms / 1000, op_latency=args.rtt_ms / 1000)
+    store.drop_database(args.database)
+
+    events = [("keyword", {"keyword": f"word{i % 100}"}, 10) for i in range(args.events)]
+
+    log_writer.LOG_ASYNC = False
+    started = time.perf_counter()
+    for event in events:
+        log_writer.log_search(*event)
+    sync_elapsed = time.perf_counter() - started
+
+    log_writer.LOG_ASYNC = True
+    pipeline = log_writer.SearchLogPipeline(batch_size=args.batch)
+    log_writer._pipeline = pipeline
+    started = time.perf_counter()
+    for event in events:
+        log_writer.log_search(*event)
+    submit_elapsed = time.perf_counter() - started
+    pipeline.flush()
+    drain_elapsed = time.perf_counter() - started
+    log_writer.close_log_pipeline()
+
+    print(f"sync   : {args.events / sync_elapsed:10.0f} events/s "
+          f"({sync_elapsed / args.events * 1e6:8.1f} µs on the caller per event)")
+    print(f"async  : {args.events / drain_elapsed:10.0f} events/s "
+          f"({submit_elapsed / args.events * 1e6:8.1f} µs on the caller per event)")
+    db = store[args.database][log_writer.MONGODB_COLLECTION]
+    print(f"stored : {db.count_documents({})} documents, written by pipeline: {pipeline.written}")
+    store.drop_database(args.database)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Задержка получения страницы в зависимости от глубины: OFFSET против keyset-токенов.
+
+Запуск:
+    python benchmarks/bench_pagination.py --films 100000
+    python benchmarks/bench_pagination.py --real
+"""
+import argparse
+import statistics
+import time
+
+from standins import install_config, patch_mysql, temp_sakila
+
+
+def timed(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--real", action="store_true", help="использовать настоящий MySQL из config.py")
+    parser.add_argument("--films", type=int, default=50000, help="размер синтетического каталога")
+    parser.add_argument("--keyword", default="a", help="ключевое слово поиска")
+    parser.add_argument("--depths", default="0,10,100,500,1000,2000", help="номера страниц через запятую")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    install_config(SEARCH_CACHE_SIZE=0)
+    import mysql_connector as mc
+
+    if not args.real:
+        patch_mysql(mc, temp_sakila(args.films))
+
+    print(f"{'page':>6} {'offset, ms':>12} {'keyset, ms':>12}")
+    for depth in (int(d) for d in args.depths.split(",")):
+        offset = depth * mc.DEFAULT_LIMIT
+        offset_ms = timed(lambda: mc.search_by_keyword(args.keyword, offset), args.repeat)
+
+        previous = mc.search_by_keyword(args.keyword, offset - mc.DEFAULT_LIMIT) if depth else []
+        token = mc.encode_page_token({'k': previous[-1]['film_id']}) if previous else None
+        if depth and token is None:
+            print(f"{depth:>6}   (no more results)")
+            break
+        keyset_ms = timed(lambda: mc.search_by_keyword(args.keyword, page_token=token), args.repeat)
+        print(f"{depth:>6} {offset_ms:>12.3f} {keyset_ms:>12.3f}")
+    mc.close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Сравнение задержки вызова с пулом соединений и без него.
+
+Запуск:
+    python benchmarks/bench_pool.py               # локальный заменитель с имитацией сети
+    python benchmarks/bench_pool.py --real        # MySQL из config.py
+"""
+import argparse
+import statistics
+import time
+
+from standins import install_config, patch_mysql, temp_sakila
+
+
+def measure(func, calls: int) -> list:
+    samples = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--real", action="store_true", help="использовать настоящий MySQL из config.py")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--connect-ms", type=float, default=5.0, help="имитация рукопожатия, мс")
+    parser.add_argument("--rtt-ms", type=float, default=0.5, help="имитация RTT запроса, мс")
+    args = parser.parse_args()
+
+    install_config(REFERENCE_CACHE_SIZE=0)
+    import mysql_connector
+
+    if not args.real:
+        patch_mysql(mysql_connector, temp_sakila(), args.connect_ms / 1000, args.rtt_ms / 1000)
+
+    for label, pool_size in (("no pool", 0), ("pool", 5)):
+        mysql_connector.close_pool()
+        mysql_connector.MYSQL_POOL_SIZE = pool_size
+        samples = measure(mysql_connector.get_min_max_years, args.calls)
+        print(f"{label:<8} mean={statistics.mean(samples):7.3f} ms  "
+              f"p50={statistics.median(samples):7.3f} ms  "
+              f"p95={statistics.quantiles(samples, n=20)[-1]:7.3f} ms")
+    mysql_connector.close_pool()
+
+
+if __name__ == "__main__":
+    main()
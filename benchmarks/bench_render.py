@@ -0,0 +1,115 @@
+"""
+Вывод результатов: прежний print_movies (шесть print() на фильм) против буферизованного.
+
+Рендерит --movies фильмов страницами по --page-size в построчно буферизуемый поток
+(как у терминала) и выводит время и число системных вызовов write(). Буферизованный
+вывод измеряется дважды: с пустым кэшем карточек и повторно (страницы из кэша результатов).
+
+Запуск:
+    python benchmarks/bench_render.py --movies 10000 --page-size 10
+"""
+import argparse
+import io
+import os
+import random
+import time
+from contextlib import redirect_stdout
+
+from standins import install_config
+from datagen import FIRST_NAMES, LAST_NAMES, WORDS
+
+
+class CountingDevNull(io.FileIO):
+    """/dev/null, считающий системные вызовы write()."""
+
+    def __init__(self) -> None:
+        super().__init__(os.devnull, "w")
+        self.writes = 0
+
+    def write(self, data) -> int:
+        self.writes += 1
+        return super().write(data)
+
+
+def make_movies(count: int, seed: int = 42) -> list:
+    rnd = random.Random(seed)
+    return [{
+        "film_id": film_id,
+        "title": f"{rnd.choice(WORDS)} {rnd.choice(WORDS)}".upper(),
+        "release_year": rnd.randint(1990, 2020),
+        "length": rnd.randint(46, 185),
+        "description": " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(20, 50))).capitalize(),
+        "genre": "Action",
+        "actors": ", ".join(f"{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)}" for _ in range(5)),
+    } for film_id in range(1, count + 1)]
+
+
+def legacy_print_movies(movies: list) -> None:
+    """print_movies до буферизации: шесть print() на фильм."""
+    if not movies:
+        print("No movies found.")
+        return
+    for movie in movies:
+        title = movie.get('title', 'UNKNOWN TITLE').upper()
+        genre = movie.get('genre', 'Unknown Genre')
+        year = movie.get('release_year', 'Unknown Year')
+        duration = movie.get('length', 'Unknown Duration')
+        actors = movie.get('actors', 'No actors listed').title()
+        description = movie.get('description', 'No description provided')
+        print(f"\n🎬 {title}")
+        print(f"📚 Genre: {genre}")
+        print(f"📅 Release year: {year}")
+        print(f"⏱️ Duration: {duration} min")
+        print(f"👥 Actors: {actors}")
+        print(f"📝 Description: {description[:300]}{'...' if len(description) > 300 else ''}")
+
+
+def render(print_page, pages: list) -> tuple:
+    raw = CountingDevNull()
+    out = io.TextIOWrapper(io.BufferedWriter(raw), encoding="utf-8", line_buffering=True)
+    started = time.perf_counter()
+    with redirect_stdout(out):
+        for page in pages:
+            print_page(page)
+    out.flush()
+    elapsed = (time.perf_counter() - started) * 1000
+    writes = raw.writes
+    out.close()
+    return elapsed, writes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--movies", type=int, default=10000)
+    parser.add_argument("--page-size", type=int, default=10)
+    args = parser.parse_args()
+
+    install_config(RENDER_CACHE_SIZE=args.movies)
+    import formatter
+
+    movies = make_movies(args.movies)
+    pages = [movies[i:i + args.page_size] for i in range(0, len(movies), args.page_size)]
+
+    # Одинаковый текст — необходимое условие честного сравнения.
+    legacy, buffered = io.StringIO(), io.StringIO()
+    with redirect_stdout(legacy):
+        legacy_print_movies(movies[:50])
+    formatter.print_movies(movies[:50], out=buffered)
+    assert legacy.getvalue() == buffered.getvalue(), "rendered text differs"
+    formatter._rendered.clear()
+
+    print(f"{args.movies} movies, {len(pages)} pages of {args.page_size}")
+    print(f"{'renderer':<24} {'total, ms':>10} {'per page, ms':>13} {'write() calls':>14}")
+    runs = {
+        "six print() per movie": legacy_print_movies,
+        "buffered, cold": formatter.print_movies,
+        "buffered, memoized": formatter.print_movies,
+        "buffered, plain": lambda page: formatter.print_movies(page, plain=True),
+    }
+    for label, print_page in runs.items():
+        elapsed, writes = render(print_page, pages)
+        print(f"{label:<24} {elapsed:>10.1f} {elapsed / len(pages):>13.3f} {writes:>14}")
+
+
+if __name__ == "__main__":
+    main()
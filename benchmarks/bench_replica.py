@@ -0,0 +1,85 @@
+"""
+Поиск через MySQL против локальной копии в SQLite (replica.py) на синтетическом каталоге.
+
+Выводит время первичной и инкрементальной синхронизации (после изменения --touch
+фильмов и без изменений — она не должна переносить ни одной строки), результат проверки
+согласованности и медианную задержку поиска в обоих режимах. Сетевая задержка
+MySQL имитируется параметром --rtt.
+
+Запуск:
+    python benchmarks/bench_replica.py --films 100000 --rtt 0.5
+    python benchmarks/bench_replica.py --real
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from standins import install_config, patch_mysql, temp_sakila
+
+
+def timed(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--real", action="store_true", help="использовать настоящий MySQL из config.py")
+    parser.add_argument("--films", type=int, default=100000, help="размер синтетического каталога")
+    parser.add_argument("--rtt", type=float, default=0.5, help="имитация RTT запроса к MySQL, мс")
+    parser.add_argument("--keywords", default="al,dinosaur,holy trip,zzz", help="ключевые слова через запятую")
+    parser.add_argument("--touch", type=int, default=100, help="сколько фильмов изменить перед инкрементальной синхронизацией")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    replica_path = os.path.join(tempfile.mkdtemp(prefix="replica-"), "replica.sqlite3")
+    install_config(SEARCH_CACHE_SIZE=0, REPLICA_PATH=replica_path, REPLICA_REFRESH_INTERVAL=0)
+    import mysql_connector as mc
+    import replica
+
+    source = None
+    if not args.real:
+        source = temp_sakila(args.films)
+        patch_mysql(mc, source, query_latency=args.rtt / 1000)
+
+    for label, full in (("initial sync", True), ("incremental sync", False), ("unchanged sync", False)):
+        if source and label == "incremental sync":
+            with sqlite3.connect(source) as db:
+                db.execute("UPDATE film SET title = title || ' II', last_update = CURRENT_TIMESTAMP "
+                           "WHERE film_id <= ?", (args.touch,))
+            # Строки текущей секунды переносятся и при следующей синхронизации: ждём, пока она пройдёт.
+            time.sleep(1)
+        started = time.perf_counter()
+        copied = replica.sync_replica(full=full)
+        print(f"{label}: {(time.perf_counter() - started) * 1000:.1f} ms, {sum(copied.values())} rows")
+
+    keywords = args.keywords.split(",")
+    problems = replica.check_consistency(keywords)
+    print(f"consistency: {'ok' if not problems else '; '.join(problems)}\n")
+
+    min_year, max_year = mc._mysql_get_min_max_years()
+    genre = mc._mysql_get_all_genres()[0]["name"]
+    queries = {f"keyword {keyword!r}": ("search_by_keyword", (keyword,)) for keyword in keywords}
+    queries[f"genre {genre}, all years"] = ("search_by_genre_and_years", (genre, min_year, max_year))
+    queries[f"genre {genre}, one year"] = ("search_by_genre_and_years", (genre, max_year, max_year))
+
+    print(f"{'query':<28} {'mysql, ms':>10} {'replica, ms':>12}")
+    for label, (name, query) in queries.items():
+        timings = {}
+        for backend in ("mysql", "replica"):
+            mc.SEARCH_BACKEND = backend
+            search = getattr(mc, name).__wrapped__
+            timings[backend] = timed(lambda: search(*query), args.repeat)
+        print(f"{label:<28} {timings['mysql']:>10.3f} {timings['replica']:>12.3f}")
+    mc.close_pool()
+
+
+if __name__ == "__main__":
+    main()
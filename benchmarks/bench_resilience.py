@@ -0,0 +1,206 @@
+"""
+Повторы и выключатель (resilience.py) под внедрёнными сбоями MySQL и MongoDB.
+
+Заменители соединений по команде «роняют» сервер: каждая попытка подключения ждёт
+--connect-timeout и завершается ошибкой (или ошибается с вероятностью --flaky).
+Сценарий: исправный сервер → кратковременные сбои → полный отказ с --threads
+одновременными клиентами → восстановление; затем отказ MongoDB при чтении статистики
+и записи лога. Для отказа выводится число попыток подключения и задержка вызова
+с выключателем и без слоя устойчивости (одна попытка, выключатель не срабатывает,
+запасных результатов нет — как до появления resilience.py).
+После каждой фазы проверяются состояние выключателя, число срабатываний, повторов
+и запасных результатов; при расхождении скрипт завершается с AssertionError.
+
+Запуск:
+    python benchmarks/bench_resilience.py --films 2000 --threads 20
+"""
+import argparse
+import io
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+
+from pymongo.errors import ServerSelectionTimeoutError
+
+from standins import install_config, patch_mongo, patch_mysql, temp_sakila
+
+
+class Faults:
+    """Управляемый отказ сервера: down — все попытки неудачны, flaky — доля неудачных."""
+
+    def __init__(self, connect_timeout: float) -> None:
+        self.connect_timeout = connect_timeout
+        self.down = False
+        self.flaky = 0.0
+        self.attempts = 0
+        self._lock = threading.Lock()
+
+    def fails(self) -> bool:
+        with self._lock:
+            self.attempts += 1
+        if self.down or random.random() < self.flaky:
+            time.sleep(self.connect_timeout)
+            return True
+        return False
+
+
+def inject_mysql(mc, faults: Faults) -> None:
+    connect = mc.connect_mysql
+
+    def faulty_connect():
+        # Настоящий connect_mysql печатает ошибку и возвращает None.
+        return None if faults.fails() else connect()
+
+    mc.connect_mysql = faulty_connect
+
+
+def inject_mongo(log_writer, faults: Faults) -> None:
+    client = log_writer.MongoClient
+
+    def faulty_client(*args, **kwargs):
+        if faults.fails():
+            raise ServerSelectionTimeoutError("injected outage")
+        return client(*args, **kwargs)
+
+    log_writer.MongoClient = faulty_client
+
+
+def run(calls, threads: int = 1) -> dict:
+    """Выполняет вызовы и возвращает долю непустых ответов и задержки."""
+    latencies, answered = [], 0
+
+    def one(call):
+        started = time.perf_counter()
+        result = call()
+        return (time.perf_counter() - started) * 1000, bool(result)
+
+    with redirect_stdout(io.StringIO()), ThreadPoolExecutor(threads) as pool:
+        for elapsed, ok in pool.map(one, calls):
+            latencies.append(elapsed)
+            answered += ok
+    return {"answered": answered, "calls": len(latencies),
+            "p50": statistics.median(latencies), "max": max(latencies)}
+
+
+def report(label: str, stats: dict, faults: Faults, resilience, backend: str) -> dict:
+    """
+    Выводит итоги фазы и возвращает их для проверок.
+
+    :return: stats, а также connects — попытки подключения за фазу, retries и stale —
+             накопленные счётчики resilience, state и trips — выключатель backend.
+    """
+    counters = resilience.resilience_stats()
+    breakers = ", ".join(f"{name}={b['state']}/trips={b['trips']}" for name, b in counters["breakers"].items())
+    print(f"{label:<34} answered {stats['answered']:>4}/{stats['calls']:<4} p50 {stats['p50']:>7.1f} ms  "
+          f"max {stats['max']:>7.1f} ms  connects {faults.attempts:>4}  retries {counters['retries']:>4}  "
+          f"stale {counters['stale_results']:>4}  {breakers}")
+    breaker = counters["breakers"].get(backend, {"state": "closed", "trips": 0})
+    phase = dict(stats, connects=faults.attempts, retries=counters["retries"], stale=counters["stale_results"],
+                 state=breaker["state"], trips=breaker["trips"])
+    faults.attempts = 0
+    return phase
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--films", type=int, default=2000, help="размер синтетического каталога")
+    parser.add_argument("--calls", type=int, default=200, help="вызовов в каждой фазе")
+    parser.add_argument("--threads", type=int, default=20, help="одновременных клиентов при отказе")
+    parser.add_argument("--connect-timeout", type=float, default=0.05, help="длительность неудачного подключения, с")
+    parser.add_argument("--flaky", type=float, default=0.3, help="доля неудачных подключений при кратких сбоях")
+    args = parser.parse_args()
+
+    install_config(SEARCH_CACHE_SIZE=0, REFERENCE_CACHE_SIZE=0, MYSQL_POOL_SIZE=0, LOG_ASYNC=False,
+                   RETRY_BACKOFF=0.01, RETRY_BACKOFF_MAX=0.1, BREAKER_RESET_TIMEOUT=0.5)
+    import log_stats
+    import log_writer
+    import mysql_connector as mc
+    import resilience
+
+    patch_mysql(mc, temp_sakila(args.films))
+    patch_mongo(log_writer)
+    faults = Faults(args.connect_timeout)
+    inject_mysql(mc, faults)
+    keywords = ["al", "ace", "trip", "holy", "egg"]
+    searches = [lambda k=keywords[i % len(keywords)]: mc.search_by_keyword(k) for i in range(args.calls)]
+
+    def outage(label: str) -> dict:
+        faults.down = True
+        phase = report(label, run(searches, args.threads), faults, resilience, "mysql")
+        faults.down = False
+        return phase
+
+    print("MySQL")
+    healthy = report("healthy", run(searches), faults, resilience, "mysql")
+    assert healthy["answered"] == args.calls, "healthy server: every search must be answered"
+    assert healthy["retries"] == healthy["stale"] == 0, "healthy server: no retries or stale results expected"
+    assert (healthy["state"], healthy["trips"]) == ("closed", 0), "healthy server: breaker must stay closed"
+
+    faults.flaky = args.flaky
+    flaky = report(f"flaky ({args.flaky:.0%} of connects fail)", run(searches), faults, resilience, "mysql")
+    faults.flaky = 0.0
+    assert flaky["answered"] == args.calls, "flaky server: retries and stale results must answer every search"
+    assert flaky["retries"] > healthy["retries"] or args.flaky == 0, "flaky server: failed connects must be retried"
+
+    time.sleep(resilience.BREAKER_RESET_TIMEOUT)
+    down = outage(f"outage, {args.threads} clients")
+    assert down["answered"] == args.calls, "outage: every search must be answered from stale results"
+    assert down["stale"] - flaky["stale"] == args.calls, "outage: every search must be a stale result"
+    assert down["state"] == "open" and down["trips"] > flaky["trips"], "outage: breaker must trip and stay open"
+
+    time.sleep(resilience.BREAKER_RESET_TIMEOUT)
+    recovered = report("recovered (half-open probe)", run(searches), faults, resilience, "mysql")
+    assert recovered["answered"] == args.calls, "recovery: every search must be answered"
+    assert recovered["state"] == "closed", "recovery: the half-open probe must close the breaker"
+    assert (recovered["retries"], recovered["stale"]) == (down["retries"], down["stale"]), \
+        "recovery: no retries or stale results expected"
+
+    resilience.reset()
+    saved = resilience.RETRY_ATTEMPTS, resilience.get_breaker("mysql").failure_threshold
+    resilience.RETRY_ATTEMPTS = 1
+    resilience.get_breaker("mysql").failure_threshold = 10 ** 9
+    plain = outage(f"outage, {args.threads} clients, no resilience")
+    resilience.RETRY_ATTEMPTS, resilience.get_breaker("mysql").failure_threshold = saved
+    assert plain["answered"] == plain["retries"] == plain["stale"] == 0, \
+        "outage without resilience: searches must fail without retries or stale results"
+    assert plain["connects"] == args.calls and plain["trips"] == 0, "outage without resilience: one connect per search"
+    # Подключаться успевают только клиенты, начавшие до размыкания выключателя.
+    assert down["connects"] <= args.threads + resilience.BREAKER_FAILURE_THRESHOLD * resilience.RETRY_ATTEMPTS, \
+        "outage: the open breaker must stop further connects"
+
+    print("\nMongoDB")
+    resilience.reset()
+    faults = Faults(args.connect_timeout)
+    inject_mongo(log_writer, faults)
+    log_writer.log_search("keyword", {"keyword": "al"}, 10)
+    reads = [lambda: log_stats.get_popular_requests()] * args.calls
+    healthy = report("healthy", run(reads), faults, resilience, "mongodb")
+    assert healthy["answered"] == args.calls, "healthy MongoDB: every read must be answered"
+    assert healthy["retries"] == healthy["stale"] == 0 and healthy["state"] == "closed", \
+        "healthy MongoDB: no retries, stale results or open breaker expected"
+
+    faults.down = True
+    down = report("outage: popular requests", run(reads, args.threads), faults, resilience, "mongodb")
+    assert down["answered"] == args.calls and down["stale"] == args.calls, \
+        "MongoDB outage: every read must be answered from stale results"
+    assert down["state"] == "open" and down["trips"] >= 1, "MongoDB outage: breaker must trip"
+
+    writes = [lambda: _logged(log_writer)] * 20
+    failed = report("outage: synchronous log_search", run(writes), faults, resilience, "mongodb")
+    assert failed["answered"] == 0 and failed["stale"] == down["stale"], \
+        "MongoDB outage: writes must fail instead of getting stale results"
+    assert failed["connects"] == 0, "MongoDB outage: the open breaker must reject writes without connecting"
+
+
+def _logged(log_writer) -> bool:
+    try:
+        return log_writer.log_search("keyword", {"keyword": "al"}, 10)
+    except RuntimeError:
+        return False
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Время запуска main.py: от старта интерпретатора до первого меню.
+
+Каждый прогон запускает `python -X importtime main.py` в отдельном процессе, ждёт
+приглашения «Choose option:» и выбирает выход. Выводится медиана и максимум времени
+до первого меню, суммарное время импортов до меню, самые дорогие импорты и то,
+загружены ли к этому моменту драйверы баз данных. Для сравнения тот же замер
+выполняется для `python -X importtime -c "import <модуль>"` по модулям доступа к данным.
+
+config.py для дочерних процессов создаётся во временном каталоге (если он не найден
+в корне репозитория), поэтому к базам данных процессы не подключаются.
+
+Запуск:
+    python benchmarks/bench_startup.py --runs 20
+    python benchmarks/bench_startup.py --runs 20 --warmup
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+from standins import ROOT
+
+PROMPT = b"Choose option: "
+DRIVERS = ("pymysql", "pymongo", "numpy", "config")
+MODULES = ("mysql_connector", "log_writer", "log_stats", "formatter")
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+CONFIG_TEMPLATE = '''MYSQL_CONFIG = {"host": "127.0.0.1", "user": "bench", "password": "", "database": "sakila",
+                "connect_timeout": 1}
+DEFAULT_LIMIT = 10
+MONGODB_URI = "mongodb://127.0.0.1:1"
+MONGODB_DB = "bench"
+MONGODB_COLLECTION = "search_log"
+MONGODB_TIMEOUT_MS = 200
+RETRY_ATTEMPTS = 1
+STARTUP_WARMUP = %r
+'''
+
+
+def child_env(warmup: bool) -> Tuple[Dict[str, str], Optional[tempfile.TemporaryDirectory]]:
+    """Окружение дочернего процесса: корень репозитория и, при отсутствии config.py, временный config."""
+    env = dict(os.environ)
+    paths = [str(ROOT)]
+    workdir = None
+    if not (ROOT / "config.py").exists() or warmup:
+        workdir = tempfile.TemporaryDirectory(prefix="bench-startup-")
+        with open(os.path.join(workdir.name, "config.py"), "w", encoding="utf-8") as f:
+            f.write(CONFIG_TEMPLATE % warmup)
+        paths.insert(0, workdir.name)
+    env["PYTHONPATH"] = os.pathsep.join(paths + [env.get("PYTHONPATH", "")]).rstrip(os.pathsep)
+    return env, workdir
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """
+    Разбирает вывод -X importtime.
+
+    :return: Список (модуль, собственное время, накопленное время) в микросекундах;
+             накопленное время — только у модулей верхнего уровня.
+    """
+    imports = []
+    for line in stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            own, cumulative, indent, name = match.groups()
+            imports.append((name, int(own), int(cumulative) if not indent else 0))
+    return imports
+
+
+def time_to_first_menu(warmup: bool = False) -> Tuple[float, List[Tuple[str, int, int]]]:
+    """
+    Запускает main.py в отдельном процессе и измеряет время до приглашения меню.
+
+    :param warmup: Включить STARTUP_WARMUP (фоновое подключение к базам).
+    :return: (время до меню в миллисекундах, импорты до меню из -X importtime).
+    """
+    env, workdir = child_env(warmup)
+    try:
+        started = time.perf_counter()
+        process = subprocess.Popen([sys.executable, "-X", "importtime", str(ROOT / "main.py")], cwd=ROOT, env=env,
+                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        output = b""
+        while not output.endswith(PROMPT):
+            chunk = os.read(process.stdout.fileno(), 4096)
+            if not chunk:
+                raise RuntimeError(f"main.py exited before showing the menu: {output.decode(errors='replace')}")
+            output += chunk
+        elapsed = (time.perf_counter() - started) * 1000
+        _, stderr = process.communicate(b"0\n", timeout=30)
+    finally:
+        if workdir:
+            workdir.cleanup()
+    return elapsed, parse_importtime(stderr.decode(errors="replace"))
+
+
+def import_cost(module: str) -> int:
+    """Накопленное время импорта модуля по -X importtime, мкс."""
+    env, workdir = child_env(False)
+    try:
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT, env=env,
+                                capture_output=True, text=True, check=True)
+    finally:
+        if workdir:
+            workdir.cleanup()
+    return next((cumulative for name, _, cumulative in parse_importtime(result.stderr) if name == module), 0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=10, help="сколько самых дорогих импортов показать")
+    parser.add_argument("--warmup", action="store_true", help="с фоновым прогревом соединений (STARTUP_WARMUP)")
+    args = parser.parse_args()
+
+    samples, imports = [], []
+    for _ in range(args.runs):
+        elapsed, imports = time_to_first_menu(args.warmup)
+        samples.append(elapsed)
+    loaded = {name for name, _, _ in imports}
+    total_ms = sum(own for _, own, _ in imports) / 1000
+
+    print(f"time to first menu: median {statistics.median(samples):.1f} ms, max {max(samples):.1f} ms "
+          f"({args.runs} runs{', STARTUP_WARMUP' if args.warmup else ''})")
+    print(f"imports before menu: {len(imports)} modules, {total_ms:.1f} ms")
+    print("loaded before menu: " + ", ".join(f"{name}={'yes' if name in loaded else 'no'}" for name in DRIVERS))
+    print(f"\n{'top-level import':<32} {'cumulative, ms':>15}")
+    for name, _, cumulative in sorted(imports, key=lambda item: -item[2])[:args.top]:
+        print(f"{name:<32} {cumulative / 1000:>15.2f}")
+    print(f"\n{'deferred module':<32} {'import, ms':>15}")
+    for module in MODULES:
+        print(f"{module:<32} {import_cost(module) / 1000:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
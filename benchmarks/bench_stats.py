@@ -0,0 +1,65 @@
+"""
+Статистика запросов: агрегация по всему логу против чтения сводной коллекции.
+
+Запуск:
+    python benchmarks/bench_stats.py --events 100000   # mongomock
+    python benchmarks/bench_stats.py --real --events 1000000
+"""
+import argparse
+import time
+
+from datagen import load_log
+from standins import install_config, patch_mongo
+
+LEGACY_RECENT = [
+    {"$sort": {"timestamp": -1}},
+    {"$group": {"_id": "$params", "timestamp": {"$first": "$timestamp"}, "search_type": {"$first": "$search_type"}}},
+    {"$sort": {"timestamp": -1}},
+    {"$limit": 5},
+]
+LEGACY_POPULAR = [
+    {"$group": {"_id": "$params", "count": {"$sum": 1}, "search_type": {"$first": "$search_type"}}},
+    {"$sort": {"count": -1}},
+    {"$limit": 5},
+]
+
+
+def timed(func) -> float:
+    started = time.perf_counter()
+    func()
+    return (time.perf_counter() - started) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--real", action="store_true", help="использовать настоящий MongoDB из config.py")
+    parser.add_argument("--database", default="search_log_bench", help="база MongoDB (удаляется перед запуском)")
+    parser.add_argument("--events", type=int, default=100000)
+    args = parser.parse_args()
+
+    # mongomock проверяет TTL-индекс перебором всех документов при каждом обращении.
+    install_config(MONGODB_DB=args.database, **({} if args.real else {"LOG_RETENTION_DAYS": 0}))
+    import log_writer
+    import log_stats
+
+    client = log_writer.MongoClient(log_writer.MONGODB_URI) if args.real else patch_mongo(log_writer)
+    client.drop_database(args.database)
+    collection = client[args.database][log_writer.MONGODB_COLLECTION]
+
+    print(f"loading {args.events} events ...")
+    load_log(collection, args.events)
+
+    print(f"backfill          : {timed(log_stats.backfill_summary):10.1f} ms")
+    print(f"legacy recent     : {timed(lambda: list(collection.aggregate(LEGACY_RECENT, allowDiskUse=True))):10.1f} ms")
+    print(f"legacy popular    : {timed(lambda: list(collection.aggregate(LEGACY_POPULAR, allowDiskUse=True))):10.1f} ms")
+    print(f"summary recent    : {timed(log_stats.get_recent_requests):10.1f} ms")
+    print(f"summary popular   : {timed(log_stats.get_popular_requests):10.1f} ms")
+
+    legacy = [r["count"] for r in collection.aggregate(LEGACY_POPULAR, allowDiskUse=True)]
+    summary = [r["count"] for r in log_stats.get_popular_requests()]
+    print(f"top-5 counts match: {legacy == summary} ({summary})")
+    client.drop_database(args.database)
+
+
+if __name__ == "__main__":
+    main()
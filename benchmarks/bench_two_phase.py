@@ -0,0 +1,59 @@
+"""
+Одно-фазный поиск (JOIN + GROUP_CONCAT по всем совпадениям) против двухфазного
+(film_id страницы, затем актёры и жанры только для неё).
+
+Запуск:
+    python benchmarks/bench_two_phase.py --films 100000
+    python benchmarks/bench_two_phase.py --real
+"""
+import argparse
+import statistics
+import time
+
+from standins import install_config, patch_mysql, temp_sakila
+
+
+def timed(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--real", action="store_true", help="использовать настоящий MySQL из config.py")
+    parser.add_argument("--films", type=int, default=100000, help="размер синтетического каталога")
+    parser.add_argument("--genre", default="Action")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    install_config(SEARCH_CACHE_SIZE=0)
+    import mysql_connector as mc
+
+    if not args.real:
+        patch_mysql(mc, temp_sakila(args.films))
+
+    min_year, max_year = mc.get_min_max_years()
+    cases = {
+        "keyword 'a'": lambda: mc.search_by_keyword.__wrapped__("a"),
+        "keyword 'holy trip'": lambda: mc.search_by_keyword.__wrapped__("holy trip"),
+        f"genre {args.genre}, all years": lambda: mc.search_by_genre_and_years.__wrapped__(args.genre, min_year, max_year),
+        f"genre {args.genre}, one year": lambda: mc.search_by_genre_and_years.__wrapped__(args.genre, max_year, max_year),
+    }
+    print(f"{'case':<32} {'join, ms':>10} {'two-phase, ms':>14}  same results")
+    for name, search in cases.items():
+        timings, results = {}, {}
+        for strategy in ("join", "two_phase"):
+            mc.SEARCH_STRATEGY = strategy
+            timings[strategy] = timed(search, args.repeat)
+            results[strategy] = search()
+        print(f"{name:<32} {timings['join']:>10.3f} {timings['two_phase']:>14.3f}  "
+              f"{results['join'] == results['two_phase']}")
+    mc.close_pool()
+
+
+if __name__ == "__main__":
+    main()
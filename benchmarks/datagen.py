@@ -0,0 +1,245 @@
+"""
+Генератор синтетических данных для бенчмарков.
+
+Каталог в схеме Sakila (film, category, film_category, actor, film_actor) любого
+масштаба (10^3 … 10^6 фильмов) записывается в SQLite или MySQL/MariaDB; лог поиска —
+в MongoDB (или mongomock). Данные детерминированы зерном генератора.
+
+Запуск:
+    python benchmarks/datagen.py sqlite catalog.sqlite3 --films 100000
+    python benchmarks/datagen.py mysql sakila_bench --films 1000000
+    python benchmarks/datagen.py mongo --events 1000000 --database search_log_bench
+"""
+import argparse
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from standins import install_config
+
+CATEGORIES = [
+    "Action", "Animation", "Children", "Classics", "Comedy", "Documentary", "Drama", "Family",
+    "Foreign", "Games", "Horror", "Music", "New", "Sci-Fi", "Sports", "Travel",
+]
+WORDS = [
+    "academy", "dinosaur", "ace", "goldfinger", "adaptation", "holes", "affair", "prejudice",
+    "african", "egg", "agent", "truman", "airplane", "sierra", "airport", "pollock", "alabama",
+    "devil", "aladdin", "calendar", "alamo", "videotape", "alaska", "phantom", "ali", "forever",
+    "alice", "fantasia", "alien", "center", "alley", "evolution", "alone", "trip", "alter", "victory",
+    "amadeus", "holy", "amelie", "hellfighters", "american", "circus", "amistad", "midsummer",
+    "anaconda", "confessions", "analyze", "hoosiers", "angels", "life", "annie", "identity",
+]
+FIRST_NAMES = ["PENELOPE", "NICK", "ED", "JENNIFER", "JOHNNY", "BETTE", "GRACE", "MATTHEW", "JOE", "CHRISTIAN"]
+LAST_NAMES = ["GUINESS", "WAHLBERG", "CHASE", "DAVIS", "LOLLOBRIGIDA", "NICHOLSON", "MOSTEL", "JOHANSSON"]
+STAMP = "2006-02-15 05:03:42"
+ACTORS_PER_FILM = 5
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS category (category_id INTEGER PRIMARY KEY, name TEXT NOT NULL,
+                                     last_update TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS film (film_id INTEGER PRIMARY KEY, title TEXT NOT NULL, description TEXT,
+                                 release_year INTEGER, length INTEGER, last_update TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS film_category (film_id INTEGER NOT NULL, category_id INTEGER NOT NULL,
+                                          last_update TEXT NOT NULL, PRIMARY KEY (film_id, category_id));
+CREATE TABLE IF NOT EXISTS actor (actor_id INTEGER PRIMARY KEY, first_name TEXT NOT NULL,
+                                  last_name TEXT NOT NULL, last_update TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS film_actor (actor_id INTEGER NOT NULL, film_id INTEGER NOT NULL,
+                                       last_update TEXT NOT NULL, PRIMARY KEY (actor_id, film_id));
+CREATE INDEX IF NOT EXISTS idx_film_actor_film ON film_actor (film_id);
+CREATE INDEX IF NOT EXISTS idx_film_category_category ON film_category (category_id);
+CREATE INDEX IF NOT EXISTS idx_film_release_year ON film (release_year);
+"""
+
+MYSQL_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS category (
+        category_id TINYINT UNSIGNED PRIMARY KEY, name VARCHAR(25) NOT NULL,
+        last_update TIMESTAMP NOT NULL)""",
+    """CREATE TABLE IF NOT EXISTS film (
+        film_id INT UNSIGNED PRIMARY KEY, title VARCHAR(128) NOT NULL, description TEXT,
+        release_year YEAR, length SMALLINT UNSIGNED, last_update TIMESTAMP NOT NULL,
+        KEY idx_title (title), KEY idx_release_year (release_year))""",
+    """CREATE TABLE IF NOT EXISTS film_category (
+        film_id INT UNSIGNED NOT NULL, category_id TINYINT UNSIGNED NOT NULL,
+        last_update TIMESTAMP NOT NULL, PRIMARY KEY (film_id, category_id),
+        KEY fk_film_category_category (category_id))""",
+    """CREATE TABLE IF NOT EXISTS actor (
+        actor_id INT UNSIGNED PRIMARY KEY, first_name VARCHAR(45) NOT NULL,
+        last_name VARCHAR(45) NOT NULL, last_update TIMESTAMP NOT NULL)""",
+    """CREATE TABLE IF NOT EXISTS film_actor (
+        actor_id INT UNSIGNED NOT NULL, film_id INT UNSIGNED NOT NULL,
+        last_update TIMESTAMP NOT NULL, PRIMARY KEY (actor_id, film_id), KEY idx_fk_film_id (film_id))""",
+]
+
+INSERTS = {
+    "category": "INSERT INTO category VALUES ({0}, {0}, {0})",
+    "actor": "INSERT INTO actor VALUES ({0}, {0}, {0}, {0})",
+    "film": "INSERT INTO film VALUES ({0}, {0}, {0}, {0}, {0}, {0})",
+    "film_category": "INSERT INTO film_category VALUES ({0}, {0}, {0})",
+    "film_actor": "INSERT INTO film_actor VALUES ({0}, {0}, {0})",
+}
+
+
+def iter_catalog(films: int, actors: int, seed: int = 42) -> Iterator[Tuple[str, tuple]]:
+    """
+    Построчно генерирует каталог.
+
+    :param films: Количество фильмов.
+    :param actors: Количество актёров.
+    :param seed: Зерно генератора.
+    :return: Генератор пар (таблица, строка).
+    """
+    rnd = random.Random(seed)
+    for i, name in enumerate(CATEGORIES):
+        yield "category", (i + 1, name, STAMP)
+    for actor_id in range(1, actors + 1):
+        yield "actor", (actor_id, rnd.choice(FIRST_NAMES), rnd.choice(LAST_NAMES), STAMP)
+    for film_id in range(1, films + 1):
+        title = f"{rnd.choice(WORDS)} {rnd.choice(WORDS)}".upper()
+        description = " ".join(rnd.choice(WORDS) for _ in range(20)).capitalize()
+        yield "film", (film_id, title, description, rnd.randint(1990, 2020), rnd.randint(46, 185), STAMP)
+        yield "film_category", (film_id, rnd.randint(1, len(CATEGORIES)), STAMP)
+        for actor_id in rnd.sample(range(1, actors + 1), ACTORS_PER_FILM):
+            yield "film_actor", (actor_id, film_id, STAMP)
+
+
+def load_catalog(execute_many: Callable[[str, List[tuple]], Any], placeholder: str, films: int,
+                 actors: int, seed: int = 42, chunk: int = 10000) -> None:
+    """
+    Загружает каталог пачками через execute_many(sql, rows).
+
+    :param execute_many: Функция пакетной вставки (cursor.executemany).
+    :param placeholder: Маркер параметра драйвера ('?' для SQLite, '%s' для MySQL).
+    """
+    buffers: Dict[str, List[tuple]] = {table: [] for table in INSERTS}
+    for table, row in iter_catalog(films, actors, seed):
+        buffer = buffers[table]
+        buffer.append(row)
+        if len(buffer) >= chunk:
+            execute_many(INSERTS[table].format(placeholder), buffer)
+            buffer.clear()
+    for table in ("category", "actor", "film", "film_category", "film_actor"):
+        if buffers[table]:
+            execute_many(INSERTS[table].format(placeholder), buffers[table])
+
+
+def default_actors(films: int) -> int:
+    """Количество актёров, сохраняющее пропорции Sakila (200 актёров на 1000 фильмов)."""
+    return max(200, films // 5)
+
+
+def write_sqlite(path: str, films: int = 1000, actors: int = 0, seed: int = 42) -> str:
+    """
+    Создаёт SQLite-базу каталога.
+
+    :param path: Путь к файлу базы.
+    :param films: Количество фильмов.
+    :param actors: Количество актёров (0 — пропорционально числу фильмов).
+    :param seed: Зерно генератора.
+    :return: Путь к базе.
+    """
+    import sqlite3
+
+    db = sqlite3.connect(path)
+    db.executescript(SQLITE_SCHEMA)
+    load_catalog(db.executemany, "?", films, actors or default_actors(films), seed)
+    db.commit()
+    db.close()
+    return path
+
+
+def write_mysql(database: str, films: int = 1000, actors: int = 0, seed: int = 42) -> None:
+    """
+    Создаёт базу database на сервере из config.MYSQL_CONFIG и заполняет её каталогом.
+
+    Рабочая база из конфигурации не затрагивается.
+
+    :param database: Имя создаваемой базы (должна быть пустой или отсутствовать).
+    """
+    import pymysql
+    from config import MYSQL_CONFIG
+
+    connection = pymysql.connect(host=MYSQL_CONFIG['host'], user=MYSQL_CONFIG['user'],
+                                 password=MYSQL_CONFIG['password'], autocommit=False)
+    with connection:
+        with connection.cursor() as cursor:
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{database}`")
+            cursor.execute(f"USE `{database}`")
+            for ddl in MYSQL_SCHEMA:
+                cursor.execute(ddl)
+            load_catalog(cursor.executemany, "%s", films, actors or default_actors(films), seed)
+        connection.commit()
+
+
+def iter_log_events(count: int, seed: int = 1, start: Optional[datetime] = None,
+                    step: timedelta = timedelta(seconds=1), string_timestamps: bool = False) -> Iterator[dict]:
+    """
+    Генерирует документы лога поиска с реалистичным (степенным) распределением популярности.
+
+    :param count: Количество событий.
+    :param seed: Зерно генератора.
+    :param start: Время первого события (UTC; по умолчанию последнее событие приходится на текущий момент,
+                  чтобы лог не удалялся TTL-индексом).
+    :param step: Интервал между событиями.
+    :param string_timestamps: timestamp строкой ISO, как до перехода на даты (для проверки миграции).
+    :return: Генератор документов в формате log_writer.make_log_document.
+    """
+    rnd = random.Random(seed)
+    if start is None:
+        start = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0) - step * count
+    for i in range(count):
+        if rnd.random() < 0.6:
+            search_type, params = "keyword", {"keyword": rnd.choice(WORDS)[:int(rnd.paretovariate(1.2)) % 6 + 3]}
+        else:
+            year = rnd.randint(1990, 2015)
+            search_type = "genre&years"
+            params = {"genre": CATEGORIES[int(rnd.paretovariate(1.0)) % len(CATEGORIES)],
+                      "year_from": year, "year_to": year + 5}
+        timestamp = start + step * i
+        yield {"timestamp": timestamp.isoformat() if string_timestamps else timestamp, "search_type": search_type,
+               "params": params, "results_count": 10}
+
+
+def load_log(collection: Any, count: int, seed: int = 1, chunk: int = 10000, **options: Any) -> None:
+    """Загружает count событий лога в коллекцию пачками insert_many (options — см. iter_log_events)."""
+    batch: List[dict] = []
+    for event in iter_log_events(count, seed, **options):
+        batch.append(event)
+        if len(batch) >= chunk:
+            collection.insert_many(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_subparsers(dest="target", required=True)
+    sqlite = target.add_parser("sqlite", help="каталог в файле SQLite")
+    sqlite.add_argument("path")
+    mysql = target.add_parser("mysql", help="каталог в новой базе на сервере MySQL из config.py")
+    mysql.add_argument("database")
+    for sub in (sqlite, mysql):
+        sub.add_argument("--films", type=int, default=1000)
+        sub.add_argument("--actors", type=int, default=0)
+        sub.add_argument("--seed", type=int, default=42)
+    mongo = target.add_parser("mongo", help="лог поиска в отдельной базе на сервере MongoDB из config.py")
+    mongo.add_argument("--events", type=int, default=100000)
+    mongo.add_argument("--seed", type=int, default=1)
+    mongo.add_argument("--database", default="search_log_bench", help="база MongoDB для лога")
+    args = parser.parse_args()
+
+    install_config()
+    if args.target == "sqlite":
+        write_sqlite(args.path, args.films, args.actors, args.seed)
+    elif args.target == "mysql":
+        write_mysql(args.database, args.films, args.actors, args.seed)
+    else:
+        from pymongo import MongoClient
+        from config import MONGODB_URI, MONGODB_COLLECTION
+
+        with MongoClient(MONGODB_URI) as client:
+            load_log(client[args.database][MONGODB_COLLECTION], args.events, args.seed)
+
+
+if __name__ == "__main__":
+    main()
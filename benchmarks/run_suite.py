@@ -0,0 +1,180 @@
+"""
+Воспроизводимый набор бенчмарков всех публичных функций доступа к данным.
+
+Создаёт синтетический каталог (SQLite-заменитель или отдельная база MySQL) и лог
+поиска (mongomock или отдельная база MongoDB), измеряет функции mysql_connector, log_writer и
+log_stats и выводит p50/p95/p99 и пропускную способность в JSON, чтобы сравнивать
+результаты между коммитами. Кэши результатов отключаются, чтобы измерять доступ к БД.
+
+Запуск:
+    python benchmarks/run_suite.py --films 100000 --events 100000 -o bench.json
+    python benchmarks/run_suite.py --real --database sakila_bench --films 1000000
+"""
+import argparse
+import itertools
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from bench_startup import time_to_first_menu
+from standins import ROOT, install_config, patch_mongo, patch_mysql, temp_sakila
+
+KEYWORDS = ["ace", "al", "dinosaur", "holy trip", "zzz", "trip", "an"]
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def measure(func: Callable[[int], Any], iterations: int) -> Dict[str, float]:
+    """
+    Измеряет задержку func(i) на iterations вызовах после одного прогревочного.
+
+    :return: calls, p50_ms, p95_ms, p99_ms, mean_ms, ops_per_sec.
+    """
+    func(0)
+    samples = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        call_started = time.perf_counter()
+        func(i)
+        samples.append((time.perf_counter() - call_started) * 1000)
+    return summarize(samples, time.perf_counter() - started)
+
+
+def summarize(samples: List[float], elapsed: float) -> Dict[str, float]:
+    """Сводка задержек (мс) по выборке; elapsed — общее время выборки, с."""
+    iterations = len(samples)
+    return {
+        "calls": iterations,
+        "p50_ms": round(percentile(samples, 50), 4),
+        "p95_ms": round(percentile(samples, 95), 4),
+        "p99_ms": round(percentile(samples, 99), 4),
+        "mean_ms": round(sum(samples) / len(samples), 4),
+        "ops_per_sec": round(iterations / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--real", action="store_true", help="настоящие MySQL и MongoDB из config.py")
+    parser.add_argument("--database", default="sakila_bench", help="база MySQL для синтетического каталога")
+    parser.add_argument("--mongo-database", default="search_log_bench",
+                        help="база MongoDB для синтетического лога (удаляется после замеров)")
+    parser.add_argument("--skip-load", action="store_true", help="не генерировать данные (--real, уже загружены)")
+    parser.add_argument("--keep", action="store_true", help="не удалять базу лога (для запусков с --skip-load)")
+    parser.add_argument("--films", type=int, default=10000)
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--rtt-ms", type=float, default=0.0, help="имитация RTT для заменителей, мс")
+    parser.add_argument("--startup-runs", type=int, default=10, help="запусков main.py для времени до меню")
+    parser.add_argument("--output", "-o", default="-", help="файл результатов ('-' — stdout)")
+    args = parser.parse_args()
+
+    # mongomock проверяет TTL-индекс перебором всех документов при каждом обращении.
+    config = install_config(SEARCH_CACHE_SIZE=0, REFERENCE_CACHE_SIZE=0, LOG_ASYNC=False,
+                            MONGODB_DB=args.mongo_database, **({} if args.real else {"LOG_RETENTION_DAYS": 0}))
+    import datagen
+    import log_stats
+    import log_writer
+    import mysql_connector as mc
+
+    if args.real:
+        if not args.skip_load:
+            datagen.write_mysql(args.database, args.films)
+        config.MYSQL_CONFIG = dict(config.MYSQL_CONFIG, database=args.database)
+        mc.MYSQL_CONFIG = config.MYSQL_CONFIG
+        from pymongo import MongoClient
+        client = MongoClient(log_writer.MONGODB_URI)
+    else:
+        rtt = args.rtt_ms / 1000
+        patch_mysql(mc, temp_sakila(args.films), query_latency=rtt)
+        client = patch_mongo(log_writer, op_latency=rtt)
+    collection = client[args.mongo_database][log_writer.MONGODB_COLLECTION]
+    if not args.skip_load:
+        client.drop_database(args.mongo_database)
+        datagen.load_log(collection, args.events)
+        log_stats.backfill_summary()
+
+    min_year, max_year = mc.get_min_max_years()
+    keywords = itertools.cycle(KEYWORDS)
+    genres = itertools.cycle(datagen.CATEGORIES)
+    page = mc.search_by_keyword("a")
+    deep_token = mc.encode_page_token({"k": args.films // 2})
+    popular = log_stats.get_popular_requests(5)
+    pipeline = log_writer.SearchLogPipeline(batch_size=100)
+
+    cases: Dict[str, Callable[[int], Any]] = {
+        "mysql_connector.search_by_keyword": lambda i: mc.search_by_keyword(next(keywords)),
+        "mysql_connector.search_by_keyword[deep_page]": lambda i: mc.search_by_keyword("a", page_token=deep_token),
+        "mysql_connector.search_by_genre_and_years": lambda i: mc.search_by_genre_and_years(
+            next(genres), min_year, max_year),
+        "mysql_connector.get_all_genres": lambda i: mc.get_all_genres(),
+        "mysql_connector.get_min_max_years": lambda i: mc.get_min_max_years(),
+        "mysql_connector.next_page_token": lambda i: mc.next_page_token(page),
+        "mysql_connector.iter_search_by_genre_and_years[one_year]": lambda i: sum(
+            1 for _ in mc.iter_search_by_genre_and_years(next(genres), max_year, max_year)),
+        "mysql_connector.iter_search_by_keyword['holy trip']": lambda i: sum(
+            1 for _ in mc.iter_search_by_keyword("holy trip")),
+        "mysql_connector.warm_search_cache": lambda i: mc.warm_search_cache(popular),
+        "log_writer.make_log_document": lambda i: log_writer.make_log_document("keyword", {"keyword": "ace"}, 10),
+        "log_writer.log_search[sync]": lambda i: log_writer.log_search("keyword", {"keyword": next(keywords)}, 10),
+        "log_writer.SearchLogPipeline.submit": lambda i: pipeline.submit(
+            log_writer.make_log_document("keyword", {"keyword": next(keywords)}, 10)),
+        "log_stats.get_recent_requests": lambda i: log_stats.get_recent_requests(),
+        "log_stats.get_popular_requests": lambda i: log_stats.get_popular_requests(),
+    }
+
+    results = {}
+    for name, case in cases.items():
+        print(f"measuring {name} ...", file=sys.stderr)
+        results[name] = measure(case, args.iterations)
+    pipeline.close()
+    print("measuring log_stats.backfill_summary ...", file=sys.stderr)
+    results["log_stats.backfill_summary"] = measure(lambda i: log_stats.backfill_summary(),
+                                                    max(1, args.iterations // 50))
+    mc.close_pool()
+    if not args.keep:
+        client.drop_database(args.mongo_database)
+    print("measuring main.time_to_first_menu ...", file=sys.stderr)
+    started = time.perf_counter()
+    startups = [time_to_first_menu()[0] for _ in range(args.startup_runs)]
+    results["main.time_to_first_menu"] = summarize(startups, time.perf_counter() - started)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "backend": "real" if args.real else "standin",
+            "films": args.films,
+            "events": args.events,
+            "iterations": args.iterations,
+            "rtt_ms": args.rtt_ms,
+            "python": platform.python_version(),
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2) + "\n"
+    if args.output == "-":
+        sys.stdout.write(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""
+Локальные заменители MySQL для бенчмарков.
+
+StandInConnection повторяет ту часть API pymysql, которой пользуется mysql_connector
+(cursor(), ping(), close(), DictCursor-строки), но выполняет запросы в SQLite и
+имитирует сетевые задержки: рукопожатие при подключении и RTT на каждый запрос.
+"""
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+import types
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+def install_config(**overrides: Any) -> types.ModuleType:
+    """
+    Гарантирует наличие модуля config (в репозитории он не хранится).
+
+    Если config.py недоступен, регистрирует модуль с тестовыми значениями.
+    Переданные overrides записываются в модуль в любом случае.
+
+    :return: Модуль config.
+    """
+    try:
+        import config
+    except ImportError:
+        config = types.ModuleType("config")
+        config.MYSQL_CONFIG = {"host": "127.0.0.1", "user": "bench", "password": "", "database": "sakila"}
+        config.DEFAULT_LIMIT = 10
+        config.MONGODB_URI = "mongodb://localhost:27017"
+        config.MONGODB_DB = "bench"
+        config.MONGODB_COLLECTION = "search_log"
+        sys.modules["config"] = config
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    return config
+
+
+def temp_sakila(films: int = 1000) -> str:
+    """Создаёт временную SQLite-базу Sakila заданного размера и возвращает путь к ней."""
+    from datagen import write_sqlite
+
+    fd, path = tempfile.mkstemp(suffix=".sqlite3", prefix="sakila-")
+    os.close(fd)
+    os.unlink(path)
+    return write_sqlite(path, films=films)
+
+
+_CONCAT = re.compile(r"CONCAT\(([^()]*)\)")
+_SEPARATOR = re.compile(r"\s+SEPARATOR\s+('[^']*')")
+
+
+def translate_sql(sql: str) -> str:
+    """Переводит используемое подмножество диалекта MySQL в диалект SQLite."""
+    sql = _CONCAT.sub(lambda m: "(" + " || ".join(p.strip() for p in m.group(1).split(",")) + ")", sql)
+    sql = _SEPARATOR.sub(r", \1", sql)
+    return sql.replace("%s", "?")
+
+
+class StandInCursor:
+    """Курсор, возвращающий строки в виде словарей, как pymysql.cursors.DictCursor."""
+
+    def __init__(self, connection: "StandInConnection") -> None:
+        self._connection = connection
+        self._rows: List[Dict[str, Any]] = []
+        self.rowcount = -1
+
+    def execute(self, sql: str, params: Optional[Sequence[Any]] = None) -> int:
+        self._connection._round_trip()
+        result = self._connection._db.execute(translate_sql(sql), tuple(params or ()))
+        self._rows = [dict(row) for row in result.fetchall()]
+        self.rowcount = len(self._rows)
+        return self.rowcount
+
+    def fetchall(self) -> List[Dict[str, Any]]:
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchone(self) -> Optional[Dict[str, Any]]:
+        return self._rows.pop(0) if self._rows else None
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        rows, self._rows = self._rows, []
+        return iter(rows)
+
+    def close(self) -> None:
+        self._rows = []
+
+    def __enter__(self) -> "StandInCursor":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class StandInConnection:
+    """Соединение-заменитель pymysql.Connection поверх SQLite с имитацией задержек сети."""
+
+    def __init__(self, path: str, connect_latency: float = 0.0, query_latency: float = 0.0) -> None:
+        self.connect_latency = connect_latency
+        self.query_latency = query_latency
+        time.sleep(connect_latency)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self.open = True
+
+    def _round_trip(self) -> None:
+        if not self.open:
+            raise sqlite3.ProgrammingError("connection is closed")
+        if self.query_latency:
+            time.sleep(self.query_latency)
+
+    def cursor(self, cursor_class: Any = None) -> StandInCursor:
+        return StandInCursor(self)
+
+    def ping(self, reconnect: bool = True) -> None:
+        self._round_trip()
+
+    def close(self) -> None:
+        if self.open:
+            self._db.close()
+            self.open = False
+
+    def __enter__(self) -> "StandInConnection":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def patch_mysql(module: Any, path: str, connect_latency: float = 0.0, query_latency: float = 0.0) -> None:
+    """
+    Подменяет mysql_connector.connect_mysql фабрикой соединений-заменителей.
+
+    :param module: Импортированный модуль mysql_connector.
+    :param path: Путь к SQLite-базе Sakila.
+    :param connect_latency: Имитация времени рукопожатия TCP+auth, сек.
+    :param query_latency: Имитация RTT одного запроса, сек.
+    """
+    module.connect_mysql = lambda: StandInConnection(path, connect_latency, query_latency)
+
+
+class _LatencyProxy:
+    """Обёртка над объектом mongomock, добавляющая задержку к каждому вызову метода."""
+
+    def __init__(self, target: Any, latency: float) -> None:
+        self._target = target
+        self._latency = latency
+
+    def __getitem__(self, name: str) -> "_LatencyProxy":
+        return _LatencyProxy(self._target[name], self._latency)
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            if self._latency:
+                time.sleep(self._latency)
+            result = attr(*args, **kwargs)
+            return _LatencyProxy(result, self._latency) if name in ("get_collection", "get_database") else result
+        return call
+
+
+class StandInMongoClient:
+    """Заменитель pymongo.MongoClient поверх общего хранилища mongomock с имитацией задержек."""
+
+    def __init__(self, store: Any, connect_latency: float = 0.0, op_latency: float = 0.0) -> None:
+        time.sleep(connect_latency)
+        self._store = store
+        self._op_latency = op_latency
+
+    def __getitem__(self, name: str) -> _LatencyProxy:
+        return _LatencyProxy(self._store[name], self._op_latency)
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "StandInMongoClient":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def patch_mongo(*modules: Any, connect_latency: float = 0.0, op_latency: float = 0.0) -> Any:
+    """
+    Подменяет MongoClient в переданных модулях клиентом-заменителем с общим хранилищем.
+
+    :param modules: Модули, импортировавшие MongoClient (например, log_writer).
+    :param connect_latency: Имитация установления соединения, сек.
+    :param op_latency: Имитация RTT одной операции, сек.
+    :return: Общий клиент mongomock (для проверки содержимого).
+    """
+    import mongomock
+
+    store = mongomock.MongoClient()
+    for module in modules:
+        module.MongoClient = lambda *args, **kwargs: StandInMongoClient(store, connect_latency, op_latency)
+    return store
+
+
+class _AsyncStandInCursor:
+    def __init__(self, db: sqlite3.Connection, latency: float) -> None:
+        self._db = db
+        self._latency = latency
+        self._rows: List[Dict[str, Any]] = []
+
+    async def execute(self, sql: str, params: Optional[Sequence[Any]] = None) -> int:
+        import asyncio
+        await asyncio.sleep(self._latency)
+        self._rows = [dict(row) for row in self._db.execute(translate_sql(sql), tuple(params or ()))]
+        return len(self._rows)
+
+    async def fetchall(self) -> List[Dict[str, Any]]:
+        rows, self._rows = self._rows, []
+        return rows
+
+    async def fetchone(self) -> Optional[Dict[str, Any]]:
+        return self._rows.pop(0) if self._rows else None
+
+    async def __aenter__(self) -> "_AsyncStandInCursor":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        self._rows = []
+
+
+class _AsyncStandInConnection:
+    def __init__(self, pool: "AsyncStandInPool") -> None:
+        self._pool = pool
+
+    def cursor(self) -> _AsyncStandInCursor:
+        return _AsyncStandInCursor(self._pool._db, self._pool.query_latency)
+
+    async def __aenter__(self) -> "_AsyncStandInConnection":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        pass
+
+
+class AsyncStandInPool:
+    """Заменитель пула aiomysql поверх SQLite с имитацией RTT (await asyncio.sleep)."""
+
+    def __init__(self, path: str, query_latency: float = 0.0) -> None:
+        self.query_latency = query_latency
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+
+    def acquire(self) -> _AsyncStandInConnection:
+        return _AsyncStandInConnection(self)
+
+    def close(self) -> None:
+        self._db.close()
+
+    async def wait_closed(self) -> None:
+        pass
+
+
+class _AsyncMongoCursor:
+    def __init__(self, cursor: Any, latency: float) -> None:
+        self._cursor = cursor
+        self._latency = latency
+
+    def sort(self, *args: Any, **kwargs: Any) -> "_AsyncMongoCursor":
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, count: int) -> "_AsyncMongoCursor":
+        self._cursor = self._cursor.limit(count)
+        return self
+
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        import asyncio
+        await asyncio.sleep(self._latency)
+        return list(self._cursor)
+
+
+class _AsyncMongoCollection:
+    def __init__(self, collection: Any, latency: float) -> None:
+        self._collection = collection
+        self._latency = latency
+
+    def find(self, *args: Any, **kwargs: Any) -> _AsyncMongoCursor:
+        return _AsyncMongoCursor(self._collection.find(*args, **kwargs), self._latency)
+
+    def __getattr__(self, name: str) -> Any:
+        import asyncio
+        method = getattr(self._collection, name)
+
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            await asyncio.sleep(self._latency)
+            return method(*args, **kwargs)
+        return call
+
+
+class AsyncStandInMongoClient:
+    """Заменитель motor.AsyncIOMotorClient поверх общего хранилища mongomock."""
+
+    def __init__(self, store: Any, op_latency: float = 0.0) -> None:
+        self._store = store
+        self._op_latency = op_latency
+
+    def __getitem__(self, db_name: str) -> Any:
+        client = self
+
+        class _Database:
+            def __getitem__(self, name: str) -> _AsyncMongoCollection:
+                return _AsyncMongoCollection(client._store[db_name][name], client._op_latency)
+        return _Database()
+
+    def close(self) -> None:
+        pass
+
+
+def patch_async(module: Any, path: str, store: Any, query_latency: float = 0.0, op_latency: float = 0.0) -> None:
+    """
+    Подставляет в async_db пул MySQL и клиент MongoDB-заменители.
+
+    :param module: Импортированный модуль async_db.
+    :param path: Путь к SQLite-базе Sakila.
+    :param store: Общий клиент mongomock (результат patch_mongo).
+    :param query_latency: Имитация RTT запроса MySQL, сек.
+    :param op_latency: Имитация RTT операции MongoDB, сек.
+    """
+    module._mysql_pool = AsyncStandInPool(path, query_latency)
+    module._mongo_client = AsyncStandInMongoClient(store, op_latency)
@@ -0,0 +1,178 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+
+class CacheInfo(NamedTuple):
+    """Счётчики эффективности кэша."""
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+    bytes: int = 0
+    max_bytes: Optional[int] = None
+
+    @property
+    def hit_rate(self) -> float:
+        """Доля обращений, обслуженных из кэша."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Оценивает занимаемую значением память (в байтах) с учётом вложенных контейнеров.
+
+    :param value: Значение (строки, числа, списки, кортежи, словари).
+    :return: Приблизительный размер в байтах.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item) for item in value)
+    return size
+
+
+class TTLCache:
+    """
+    Потокобезопасный кэш с ограничением размера (вытеснение LRU) и временем жизни записей.
+
+    Запись, прожившая дольше ttl секунд, считается отсутствующей и удаляется при обращении.
+    Если задан max_bytes, кэш дополнительно ограничен по оценке занимаемой памяти.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: float = 300.0, max_bytes: Optional[int] = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[Hashable, Tuple[float, Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """
+        Ищет значение в кэше.
+
+        :param key: Ключ записи.
+        :return: Кортеж (найдено ли значение, значение).
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return False, None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Сохраняет значение, вытесняя самые давно использованные записи при переполнении.
+
+        :param key: Ключ записи.
+        :param value: Значение.
+        """
+        size = estimate_size(key) + estimate_size(value) if self.max_bytes else 0
+        if self.max_bytes and size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (time.monotonic() + self.ttl, value, size)
+            self.bytes += size
+            while len(self._data) > self.maxsize or (self.max_bytes and self.bytes > self.max_bytes):
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Удаляет одну запись из кэша."""
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def clear(self) -> None:
+        """Удаляет все записи (счётчики сохраняются)."""
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def info(self) -> CacheInfo:
+        """Возвращает текущие счётчики кэша."""
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.evictions, len(self._data), self.maxsize,
+                             self.bytes, self.max_bytes)
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, size = self._data.pop(key)
+        self.bytes -= size
+
+
+_registry: Dict[str, TTLCache] = {}
+
+
+def _has_data(value: Any) -> bool:
+    """Пустые результаты ([] или (None, None)) означают ошибку запроса и не кэшируются."""
+    if isinstance(value, tuple):
+        return any(item is not None for item in value)
+    return bool(value)
+
+
+def ttl_cache(ttl: float = 300.0, maxsize: int = 128, max_bytes: Optional[int] = None,
+              key: Optional[Callable[..., Hashable]] = None) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Декоратор, кэширующий результаты функции в TTLCache.
+
+    У обёрнутой функции появляются атрибуты cache_info(), cache_clear() и
+    cache_invalidate(*args, **kwargs) для явного сброса отдельной записи.
+
+    :param ttl: Время жизни записи, сек.
+    :param maxsize: Максимальное количество записей.
+    :param max_bytes: Ограничение кэша по памяти, байт (None — без ограничения).
+    :param key: Функция построения ключа из аргументов (по умолчанию — сами аргументы).
+    :return: Декоратор.
+    """
+    def make_key(*args, **kwargs) -> Hashable:
+        if key is not None:
+            return key(*args, **kwargs)
+        return args, tuple(sorted(kwargs.items()))
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        cache = TTLCache(maxsize=maxsize, ttl=ttl, max_bytes=max_bytes)
+        _registry[func.__name__] = cache
+
+        @wraps(func)
+        def wrapper(*args, **kwargs) -> Any:
+            found, value = cache.get(make_key(*args, **kwargs))
+            if found:
+                return value
+            value = func(*args, **kwargs)
+            if _has_data(value):
+                cache.set(make_key(*args, **kwargs), value)
+            return value
+
+        wrapper.cache = cache
+        wrapper.cache_info = cache.info
+        wrapper.cache_clear = cache.clear
+        wrapper.cache_invalidate = lambda *args, **kwargs: cache.invalidate(make_key(*args, **kwargs))
+        return wrapper
+
+    return decorator
+
+
+def cache_stats() -> Dict[str, CacheInfo]:
+    """
+    Возвращает счётчики всех кэшей, созданных через ttl_cache.
+
+    :return: Словарь {имя функции: CacheInfo}.
+    """
+    return {name: cache.info() for name, cache in _registry.items()}
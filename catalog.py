@@ -0,0 +1,371 @@
+"""
+Каталог фильмов в памяти в виде столбцов NumPy.
+
+Фильмы загружаются из MySQL один раз и хранятся компактно: film_id, release_year и
+length — числовыми массивами, жанры — битовой маской на фильм, названия и описания —
+смещениями в общем буфере байтов, актёры — смещениями в массиве actor_id. Фильтр по
+жанру и годам, границы лет и постраничный вывод считаются векторными масками, а
+словари для formatter.print_movies собираются только для строк текущей страницы.
+
+При SEARCH_BACKEND = 'catalog' через этот модуль обслуживаются search_by_keyword,
+search_by_genre_and_years, get_all_genres и get_min_max_years.
+
+Запуск (загрузка и отчёт о занимаемой памяти):
+    python catalog.py
+"""
+import re
+import threading
+import time
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pymysql
+
+import config
+import mysql_connector as mc
+from config import DEFAULT_LIMIT
+
+# Как часто (сек.) перечитывать каталог из MySQL в фоне; 0 — загрузить один раз.
+CATALOG_REFRESH_INTERVAL: float = getattr(config, "CATALOG_REFRESH_INTERVAL", 600.0)
+
+# Пропущенные значения в числовых столбцах (NULL в MySQL).
+NO_YEAR = np.iinfo(np.int16).min
+NO_LENGTH = -1
+# Разделитель названий в буфере: не встречается в названиях и не совпадает с шаблоном LIKE.
+TITLE_SEPARATOR = b'\n'
+
+
+def like_pattern(keyword: str) -> "re.Pattern[bytes]":
+    """
+    Переводит шаблон LIKE '%keyword%' в регулярное выражение, не выходящее за пределы названия.
+
+    Как и в MySQL, '%' и '_' — символы подстановки, обратная косая черта их экранирует.
+    Выражение применяется к названиям в нижнем регистре (Catalog.folded_titles).
+
+    :param keyword: Ключевое слово (может содержать '%' и '_').
+    :return: Скомпилированное выражение над байтами UTF-8.
+    """
+    parts = []
+    chars = iter(keyword)
+    for ch in chars:
+        if ch == '\\':
+            parts.append(re.escape(next(chars, '\\').encode().lower()))
+        elif ch == '%':
+            parts.append(b'[^\n]*')
+        elif ch == '_':
+            parts.append(b'[^\n]')
+        else:
+            parts.append(re.escape(ch.encode().lower()))
+    return re.compile(b''.join(parts))
+
+
+class Catalog:
+    """
+    Неизменяемый столбцовый снимок каталога, упорядоченный по film_id.
+
+    Массивы offsets имеют длину n + 1: значение строки i лежит в буфере
+    между offsets[i] и offsets[i + 1] (для названий — без завершающего разделителя).
+    """
+
+    def __init__(self, film_ids: np.ndarray, years: np.ndarray, lengths: np.ndarray, genres: np.ndarray,
+                 titles: bytes, title_offsets: np.ndarray, descriptions: bytes,
+                 description_offsets: np.ndarray, cast: np.ndarray, cast_offsets: np.ndarray,
+                 categories: List[Dict[str, Any]], actor_names: Dict[int, str]) -> None:
+        self.film_ids = film_ids
+        self.years = years
+        self.lengths = lengths
+        self.genres = genres
+        self.titles = titles
+        # bytes.lower() меняет регистр только латиницы и сохраняет длину, поэтому смещения общие.
+        self.folded_titles = titles.lower()
+        self.title_offsets = title_offsets
+        self.descriptions = descriptions
+        self.description_offsets = description_offsets
+        self.cast = cast
+        self.cast_offsets = cast_offsets
+        self.categories = categories
+        self.category_bits = {category['name']: np.uint64(1) << np.uint64(code)
+                              for code, category in enumerate(categories)}
+        self.actor_names = actor_names
+        known_years = years[years != NO_YEAR]
+        self.year_bounds = ((int(known_years.min()), int(known_years.max())) if len(known_years)
+                            else (None, None))
+        self.loaded_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.film_ids)
+
+    def _start(self, after_id: int) -> int:
+        """Индекс первой строки с film_id > after_id."""
+        return int(np.searchsorted(self.film_ids, after_id, side='right'))
+
+    def _genre_name(self, bits: int) -> Optional[str]:
+        # Как и GROUP BY в MySQL, для фильма с несколькими жанрами показывается один из них.
+        return self.categories[(bits & -bits).bit_length() - 1]['name'] if bits else None
+
+    def movie(self, row: int, genre: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Собирает словарь фильма в том виде, в каком его возвращает MySQL.
+
+        :param row: Номер строки в столбцах.
+        :param genre: Если задан, в поле genre попадает именно этот жанр фильма.
+        :return: Словарь с полями film_id, title, release_year, length, description, genre, actors.
+        """
+        year = int(self.years[row])
+        length = int(self.lengths[row])
+        cast = self.cast[self.cast_offsets[row]:self.cast_offsets[row + 1]]
+        return {
+            'film_id': int(self.film_ids[row]),
+            'title': self.titles[self.title_offsets[row]:self.title_offsets[row + 1] - 1].decode(),
+            'release_year': None if year == NO_YEAR else year,
+            'length': None if length == NO_LENGTH else length,
+            'description': self.descriptions[self.description_offsets[row]:
+                                             self.description_offsets[row + 1]].decode() or None,
+            'genre': genre if genre is not None else self._genre_name(int(self.genres[row])),
+            'actors': ', '.join(self.actor_names[actor_id] for actor_id in cast.tolist()) or None,
+        }
+
+    def genre_rows(self, genre: str, year_from: int, year_to: int, after_id: int = 0) -> np.ndarray:
+        """
+        Находит строки фильмов жанра в диапазоне лет.
+
+        :param genre: Название жанра.
+        :param year_from: Начальный год диапазона.
+        :param year_to: Конечный год диапазона.
+        :param after_id: Учитывать только фильмы с film_id больше этого.
+        :return: Номера строк в порядке film_id.
+        """
+        bit = self.category_bits.get(genre)
+        if bit is None:
+            return np.empty(0, dtype=np.int64)
+        start = self._start(after_id)
+        years = self.years[start:]
+        mask = (self.genres[start:] & bit) != 0
+        mask &= years >= year_from
+        mask &= years <= year_to
+        return np.flatnonzero(mask) + start
+
+    def keyword_rows(self, keyword: str, after_id: int = 0) -> Iterator[int]:
+        """
+        Выдаёт строки, название которых удовлетворяет LIKE '%keyword%', в порядке film_id.
+
+        Поиск идёт по общему буферу названий от первой строки после after_id,
+        поэтому для страницы читается ровно столько названий, сколько нужно.
+        Регистр букв латиницы не учитывается.
+        """
+        # Без символов подстановки хватает bytes.find, который заметно быстрее регулярного выражения.
+        pattern = like_pattern(keyword) if any(ch in keyword for ch in '%_\\') else None
+        needle = keyword.encode().lower()
+        position = int(self.title_offsets[self._start(after_id)])
+        while True:
+            if pattern is None:
+                found = self.folded_titles.find(needle, position)
+            else:
+                match = pattern.search(self.folded_titles, position)
+                found = match.start() if match else -1
+            if found < 0:
+                return
+            row = int(np.searchsorted(self.title_offsets, found, side='right')) - 1
+            yield row
+            position = int(self.title_offsets[row + 1])
+
+    def nbytes(self) -> Dict[str, int]:
+        """
+        Возвращает объём памяти, занимаемый столбцами.
+
+        :return: Словарь {столбец: байт}, включая итог под ключом 'total'.
+        """
+        sizes = {
+            'film_id': self.film_ids.nbytes,
+            'release_year': self.years.nbytes,
+            'length': self.lengths.nbytes,
+            'genres': self.genres.nbytes,
+            'titles': len(self.titles) + len(self.folded_titles) + self.title_offsets.nbytes,
+            'descriptions': len(self.descriptions) + self.description_offsets.nbytes,
+            'actors': self.cast.nbytes + self.cast_offsets.nbytes
+                      + sum(len(name) for name in self.actor_names.values()),
+        }
+        sizes['total'] = sum(sizes.values())
+        return sizes
+
+
+def _strings(values: List[bytes], separator: bytes = b'') -> Tuple[bytes, np.ndarray]:
+    """Склеивает строки в один буфер и возвращает его вместе со смещениями начала строк."""
+    lengths = np.fromiter((len(value) + len(separator) for value in values), dtype=np.int64, count=len(values))
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return b''.join(value + separator for value in values), offsets
+
+
+def load_catalog(connection: Any) -> Catalog:
+    """
+    Читает каталог из MySQL и строит столбцы.
+
+    :param connection: Соединение с MySQL.
+    :return: Новый снимок каталога.
+    :raises ValueError: Если жанров больше 64 (не помещаются в битовую маску).
+    """
+    with connection.cursor(pymysql.cursors.SSDictCursor) as cursor:
+        cursor.execute("SELECT category_id, name FROM category ORDER BY category_id")
+        categories = list(cursor)
+        if len(categories) > 64:
+            raise ValueError(f"Too many categories for a 64-bit genre mask: {len(categories)}")
+        codes = {category['category_id']: code for code, category in enumerate(categories)}
+
+        cursor.execute("SELECT actor_id, first_name, last_name FROM actor")
+        actor_names = {row['actor_id']: f"{row['first_name']} {row['last_name']}" for row in cursor}
+
+        film_ids, years, lengths, titles, descriptions = [], [], [], [], []
+        cursor.execute("SELECT film_id, title, description, release_year, length FROM film ORDER BY film_id")
+        for row in cursor:
+            film_ids.append(row['film_id'])
+            years.append(NO_YEAR if row['release_year'] is None else row['release_year'])
+            lengths.append(NO_LENGTH if row['length'] is None else row['length'])
+            titles.append(row['title'].encode())
+            descriptions.append((row['description'] or '').encode())
+        film_ids = np.array(film_ids, dtype=np.int64)
+
+        genres = np.zeros(len(film_ids), dtype=np.uint64)
+        cursor.execute("SELECT film_id, category_id FROM film_category")
+        links = [(row['film_id'], codes[row['category_id']]) for row in cursor]
+        if links:
+            link_films, link_codes = np.array(links, dtype=np.int64).T
+            rows = np.searchsorted(film_ids, link_films)
+            np.bitwise_or.at(genres, rows, np.left_shift(np.uint64(1), link_codes.astype(np.uint64)))
+
+        cursor.execute("SELECT film_id, actor_id FROM film_actor ORDER BY film_id, actor_id")
+        cast = np.array([(row['film_id'], row['actor_id']) for row in cursor], dtype=np.int64).reshape(-1, 2)
+    counts = np.bincount(np.searchsorted(film_ids, cast[:, 0]), minlength=len(film_ids))
+    cast_offsets = np.zeros(len(film_ids) + 1, dtype=np.int64)
+    np.cumsum(counts, out=cast_offsets[1:])
+
+    title_buffer, title_offsets = _strings(titles, TITLE_SEPARATOR)
+    description_buffer, description_offsets = _strings(descriptions)
+    return Catalog(film_ids.astype(np.int32), np.array(years, dtype=np.int16), np.array(lengths, dtype=np.int32),
+                   genres, title_buffer, title_offsets, description_buffer, description_offsets,
+                   cast[:, 1].astype(np.int32), cast_offsets, categories, actor_names)
+
+
+_catalog: Optional[Catalog] = None
+_catalog_lock = threading.Lock()
+_reloading = False
+
+
+def reload_catalog() -> Optional[Catalog]:
+    """
+    Загружает каталог из MySQL и подменяет текущий снимок.
+
+    :return: Новый снимок или None, если MySQL недоступен.
+    """
+    global _catalog
+    try:
+        with mc.mysql_connection() as connection:
+            if not connection:
+                return None
+            catalog = load_catalog(connection)
+    except pymysql.MySQLError as e:
+        print(f"MySQL error in reload_catalog: {e}")
+        return None
+    _catalog = catalog
+    return catalog
+
+
+def _reload_in_background() -> None:
+    global _reloading
+    try:
+        reload_catalog()
+    finally:
+        _reloading = False
+
+
+def get_catalog() -> Optional[Catalog]:
+    """
+    Возвращает текущий снимок каталога, загружая его при первом обращении.
+
+    По истечении CATALOG_REFRESH_INTERVAL новый снимок строится в фоновом потоке,
+    а запросы до его готовности обслуживает прежний.
+
+    :return: Снимок или None, если каталог ещё не загружен и MySQL недоступен.
+    """
+    global _reloading
+    catalog = _catalog
+    if catalog is None:
+        with _catalog_lock:
+            return _catalog or reload_catalog()
+    if (CATALOG_REFRESH_INTERVAL > 0 and not _reloading
+            and time.monotonic() - catalog.loaded_at >= CATALOG_REFRESH_INTERVAL):
+        _reloading = True
+        threading.Thread(target=_reload_in_background, name="catalog-reload", daemon=True).start()
+    return catalog
+
+
+def search_by_keyword(keyword: str, offset: int = 0, limit: int = DEFAULT_LIMIT,
+                      page_token: Optional[str] = None) -> List[Dict]:
+    """
+    Выполняет поиск фильмов по ключевому слову в каталоге в памяти.
+
+    :param keyword: Ключевое слово для поиска в названии фильма.
+    :param offset: Смещение для постраничного вывода (если page_token не задан).
+    :param limit: Количество фильмов для вывода(константа в config).
+    :param page_token: Токен продолжения из next_page_token().
+    :return: Список фильмов, удовлетворяющих критерию.
+    """
+    catalog = get_catalog()
+    if catalog is None:
+        return []
+    after_id, offset = mc.decode_page_token(page_token) if page_token else (0, offset)
+    rows = islice(catalog.keyword_rows(keyword, after_id), offset, offset + limit)
+    return [catalog.movie(row) for row in rows]
+
+
+def search_by_genre_and_years(genre: str, year_from: int, year_to: int, offset: int = 0,
+                              limit: int = DEFAULT_LIMIT, page_token: Optional[str] = None) -> List[Dict]:
+    """
+    Ищет фильмы по жанру и диапазону лет в каталоге в памяти.
+
+    :param genre: Название жанра.
+    :param year_from: Начальный год диапазона.
+    :param year_to: Конечный год диапазона.
+    :param offset: Смещение (для постраничного вывода, если page_token не задан).
+    :param limit: Лимит количества фильмов на страницу(константа в config).
+    :param page_token: Токен продолжения из next_page_token().
+    :return: Список фильмов по жанру и диапазону лет.
+    """
+    catalog = get_catalog()
+    if catalog is None:
+        return []
+    after_id, offset = mc.decode_page_token(page_token) if page_token else (0, offset)
+    rows = catalog.genre_rows(genre, int(year_from), int(year_to), after_id)[offset:offset + limit]
+    return [catalog.movie(row, genre) for row in rows.tolist()]
+
+
+def get_all_genres() -> List[Dict[str, Any]]:
+    """
+    Возвращает список всех жанров с номерами(ID) из каталога в памяти.
+
+    :return: Список словарей с полями category_id и name.
+    """
+    catalog = get_catalog()
+    return sorted(catalog.categories, key=lambda category: category['name']) if catalog else []
+
+
+def get_min_max_years() -> Tuple[Optional[int], Optional[int]]:
+    """
+    Определяет минимальный и максимальный год выпуска фильмов по каталогу в памяти.
+
+    :return: Кортеж из минимального и максимального года.
+    """
+    catalog = get_catalog()
+    return catalog.year_bounds if catalog else (None, None)
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    loaded = reload_catalog()
+    if loaded is None:
+        print("❌ Не удалось загрузить каталог: MySQL недоступен.")
+        raise SystemExit(1)
+    print(f"✅ {len(loaded)} фильмов загружено за {time.perf_counter() - started:.1f} с")
+    for column, size in loaded.nbytes().items():
+        print(f"{column:<14} {size / 1024 / 1024:>10.2f} MiB")
@@ -0,0 +1,211 @@
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from typing import Any, Dict, List, Optional, TextIO
+
+import metrics
+import resilience
+from config import DEFAULT_LIMIT
+from export import add_export_arguments, run_export
+from formatter import print_movies
+from log_stats import get_recent_requests, get_popular_requests, get_request_counts, WINDOWS
+from log_writer import log_search
+from mysql_connector import search_by_keyword, search_by_genre_and_years, next_page_token
+
+BATCH_WORKERS = 4
+
+# Поток для результатов. Диагностика модулей доступа к данным (print) на время
+# выполнения команды перенаправляется в stderr, чтобы не смешиваться с JSON.
+_output: TextIO = sys.stdout
+
+
+def _dump(record: Dict[str, Any]) -> None:
+    print(json.dumps(record, ensure_ascii=False, default=str), file=_output, flush=True)
+
+
+def run_query(query: Dict[str, Any], log: bool = True) -> Dict[str, Any]:
+    """
+    Выполняет один поисковый запрос и записывает его в лог так же, как интерактивное меню.
+
+    Если база недоступна, поиск возвращает пустую страницу; такой ответ (по resilience.track_outcome)
+    записывается как ошибка, а страница из запасных результатов помечается stale.
+
+    :param query: {'type': 'keyword', 'keyword': ...} или
+                  {'type': 'genre', 'genre': ..., 'year_from': ..., 'year_to': ...};
+                  необязательные поля: 'page_token', 'limit'.
+    :param log: Записывать ли запрос в лог MongoDB.
+    :return: Запись результата: query, ok, count, latency_ms, movies, next_page_token (или error).
+    """
+    started = time.perf_counter()
+    try:
+        page_token = query.get("page_token")
+        limit = int(query.get("limit", DEFAULT_LIMIT))
+        with resilience.track_outcome() as outcome:
+            if query.get("type") == "keyword":
+                if not isinstance(query["keyword"], str):
+                    raise ValueError(f"Keyword must be a string, got {query['keyword']!r}")
+                movies = search_by_keyword(query["keyword"], limit=limit, page_token=page_token)
+                search_type, params = "keyword", {"keyword": query["keyword"]}
+            elif query.get("type") == "genre":
+                if not isinstance(query["genre"], str):
+                    raise ValueError(f"Genre must be a string, got {query['genre']!r}")
+                year_from, year_to = int(query["year_from"]), int(query["year_to"])
+                movies = search_by_genre_and_years(query["genre"], year_from, year_to,
+                                                   limit=limit, page_token=page_token)
+                search_type, params = "genre&years", {"genre": query["genre"], "year_from": year_from,
+                                                      "year_to": year_to}
+            else:
+                raise ValueError(f"Unknown query type: {query.get('type')!r}")
+        if outcome["errors"]:
+            raise RuntimeError("; ".join(outcome["errors"]))
+        if log and movies:
+            log_search(search_type, params, len(movies))
+    except (KeyError, ValueError, TypeError, AttributeError, RuntimeError) as e:
+        return {"query": query, "ok": False, "error": str(e),
+                "latency_ms": round((time.perf_counter() - started) * 1000, 3)}
+
+    record = {
+        "query": query,
+        "ok": True,
+        "count": len(movies),
+        "latency_ms": round((time.perf_counter() - started) * 1000, 3),
+        "movies": movies,
+        "next_page_token": next_page_token(movies, page_token),
+    }
+    if outcome["stale"]:
+        record["stale"] = True
+    return record
+
+
+def _parse_query(line: str) -> Dict[str, Any]:
+    """Разбирает строку файла запросов: {'query': ...} или {'error': запись об ошибке} для неверной строки."""
+    try:
+        query = json.loads(line)
+    except ValueError as e:
+        return {"error": {"query": line.strip(), "ok": False, "error": f"Invalid JSON: {e}"}}
+    if not isinstance(query, dict):
+        return {"error": {"query": query, "ok": False, "error": "Query must be a JSON object"}}
+    return {"query": query}
+
+
+def run_batch(path: str, workers: int = BATCH_WORKERS, log: bool = True) -> int:
+    """
+    Выполняет запросы из файла JSON Lines в пуле потоков и печатает результаты в том же порядке.
+
+    :param path: Путь к файлу запросов ('-' — stdin), по одному JSON-объекту в строке.
+    :param workers: Максимальное число одновременно выполняемых запросов.
+    :param log: Записывать ли запросы в лог MongoDB.
+    :return: Код завершения: 0, если все запросы выполнены успешно, иначе 1.
+    """
+    source = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    with source:
+        queries = [_parse_query(line) for line in source if line.strip()]
+
+    def run(query: Dict[str, Any]) -> Dict[str, Any]:
+        return query["error"] if "error" in query else run_query(query["query"], log)
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for record in pool.map(run, queries):
+            failed += not record["ok"]
+            _dump(record)
+    return 1 if failed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Поиск фильмов и статистика запросов без интерактивного меню.")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="собрать метрики и сохранить их в файл (.json — JSON, иначе формат Prometheus)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    search = commands.add_parser("search", help="один поисковый запрос")
+    search.add_argument("--page-token", help="токен следующей страницы из предыдущего ответа")
+    search.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help="размер страницы")
+    search.add_argument("--pretty", action="store_true", help="вывод как в интерактивном меню вместо JSON")
+    search.add_argument("--plain", action="store_true", help="как --pretty, но без эмодзи (для конвейеров)")
+    search.add_argument("--no-log", dest="log", action="store_false", help="не записывать запрос в лог")
+    kind = search.add_subparsers(dest="type", required=True)
+    by_keyword = kind.add_parser("keyword", help="поиск по ключевому слову")
+    by_keyword.add_argument("keyword")
+    by_genre = kind.add_parser("genre", help="поиск по жанру и диапазону лет")
+    by_genre.add_argument("genre")
+    by_genre.add_argument("--from", dest="year_from", type=int, required=True)
+    by_genre.add_argument("--to", dest="year_to", type=int, required=True)
+
+    stats = commands.add_parser("stats", help="статистика запросов из лога")
+    stats.add_argument("kind", choices=["recent", "popular", "counts"])
+    stats.add_argument("--limit", type=int, default=5, help="количество запросов (для popular)")
+    stats.add_argument("--window", choices=list(WINDOWS),
+                       help="период для popular (по умолчанию — всё время) и counts (по умолчанию — day)")
+
+    export = commands.add_parser("export", help="выгрузка всех найденных фильмов в CSV/JSONL")
+    add_export_arguments(export)
+
+    batch = commands.add_parser("batch", help="пакетное выполнение запросов из файла JSON Lines")
+    batch.add_argument("file", help="файл запросов ('-' — stdin)")
+    batch.add_argument("--workers", type=int, default=BATCH_WORKERS, help="число параллельных запросов")
+    batch.add_argument("--no-log", dest="log", action="store_false", help="не записывать запросы в лог")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Точка входа командной строки.
+
+    :param argv: Аргументы (по умолчанию sys.argv[1:]).
+    :return: Код завершения процесса.
+    """
+    global _output
+    args = build_parser().parse_args(argv)
+    if args.metrics:
+        metrics.set_enabled(True)
+    _output = sys.stdout
+    try:
+        with redirect_stdout(sys.stderr):
+            return _run_command(args)
+    finally:
+        if args.metrics:
+            metrics.export_metrics(args.metrics)
+
+
+def _run_command(args: argparse.Namespace) -> int:
+    if args.command == "search":
+        query = {"type": args.type, "limit": args.limit, "page_token": args.page_token}
+        if args.type == "keyword":
+            query["keyword"] = args.keyword
+        else:
+            query.update(genre=args.genre, year_from=args.year_from, year_to=args.year_to)
+        record = run_query(query, args.log)
+        if (args.pretty or args.plain) and record["ok"]:
+            with redirect_stdout(_output):
+                print_movies(record["movies"], plain=args.plain or None)
+        else:
+            _dump(record)
+        return 0 if record["ok"] else 1
+
+    if args.command == "stats":
+        try:
+            if args.kind == "recent":
+                results = get_recent_requests()
+            elif args.kind == "popular":
+                results = get_popular_requests(args.limit, window=args.window)
+            else:
+                results = get_request_counts(args.window or "day")
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            return 1
+        for result in results:
+            _dump(result)
+        return 0
+
+    if args.command == "export":
+        return run_export(args, _output)
+
+    return run_batch(args.file, args.workers, args.log)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import argparse
+import csv
+import json
+import sys
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional, TextIO
+
+import pymysql
+
+from mysql_connector import iter_search_by_keyword, iter_search_by_genre_and_years
+
+EXPORT_FIELDS = ["film_id", "title", "release_year", "length", "genre", "actors", "description"]
+
+
+def write_csv(rows: Iterable[Dict[str, Any]], out: TextIO) -> int:
+    """
+    Построчно записывает фильмы в CSV.
+
+    :param rows: Итератор фильмов.
+    :param out: Открытый текстовый поток.
+    :return: Количество записанных строк.
+    """
+    writer = csv.DictWriter(out, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def write_jsonl(rows: Iterable[Dict[str, Any]], out: TextIO) -> int:
+    """
+    Построчно записывает фильмы в JSON Lines.
+
+    :param rows: Итератор фильмов.
+    :param out: Открытый текстовый поток.
+    :return: Количество записанных строк.
+    """
+    count = 0
+    for row in rows:
+        out.write(json.dumps({field: row.get(field) for field in EXPORT_FIELDS}, ensure_ascii=False, default=str))
+        out.write("\n")
+        count += 1
+    return count
+
+
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl}
+
+
+def peak_rss_mib() -> float:
+    """Возвращает пиковый размер резидентной памяти процесса в МиБ (0.0, если модуль resource недоступен)."""
+    try:
+        import resource  # только Unix
+    except ImportError:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux сообщает значение в КиБ, macOS — в байтах.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def export_movies(rows: Iterator[Dict[str, Any]], fmt: str, out: TextIO) -> Dict[str, float]:
+    """
+    Выгружает результаты поиска в файл, не загружая их в память целиком.
+
+    :param rows: Генератор фильмов (iter_search_by_keyword / iter_search_by_genre_and_years).
+    :param fmt: Формат: 'csv' или 'jsonl'.
+    :param out: Открытый текстовый поток.
+    :return: Статистика: rows, seconds, rows_per_sec, peak_rss_mib.
+    """
+    started = time.perf_counter()
+    count = WRITERS[fmt](rows, out)
+    elapsed = time.perf_counter() - started
+    return {
+        "rows": count,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(count / elapsed, 1) if elapsed else 0.0,
+        "peak_rss_mib": round(peak_rss_mib(), 1),
+    }
+
+
+def add_export_arguments(parser: argparse.ArgumentParser) -> None:
+    """Добавляет в парсер аргументы выгрузки (используется и в отдельном запуске, и в CLI)."""
+    parser.add_argument("--format", choices=sorted(WRITERS), default="jsonl", help="формат файла")
+    parser.add_argument("--output", "-o", default="-", help="путь к файлу ('-' — stdout)")
+    target = parser.add_subparsers(dest="search", required=True)
+    by_keyword = target.add_parser("keyword", help="фильмы по ключевому слову")
+    by_keyword.add_argument("keyword")
+    by_genre = target.add_parser("genre", help="фильмы по жанру и диапазону лет")
+    by_genre.add_argument("genre")
+    by_genre.add_argument("--from", dest="year_from", type=int, required=True)
+    by_genre.add_argument("--to", dest="year_to", type=int, required=True)
+
+
+def run_export(args: argparse.Namespace, stdout: Optional[TextIO] = None) -> int:
+    """
+    Выполняет выгрузку по разобранным аргументам и печатает статистику в stderr.
+
+    :param args: Аргументы из add_export_arguments.
+    :param stdout: Поток для выгрузки при --output - (по умолчанию sys.stdout).
+    :return: Код завершения процесса.
+    """
+    if args.search == "keyword":
+        rows = iter_search_by_keyword(args.keyword)
+    else:
+        rows = iter_search_by_genre_and_years(args.genre, args.year_from, args.year_to)
+
+    stdout = stdout or sys.stdout
+    out = stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        stats = export_movies(rows, args.format, out)
+    except pymysql.MySQLError as e:
+        print(f"MySQL error during export: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if out is not stdout:
+            out.close()
+
+    print(f"Exported {stats['rows']} rows in {stats['seconds']} s "
+          f"({stats['rows_per_sec']} rows/s, peak RSS {stats['peak_rss_mib']} MiB)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Выгрузка всех найденных фильмов в CSV или JSON Lines.")
+    add_export_arguments(parser)
+    sys.exit(run_export(parser.parse_args()))
@@ -1,6 +1,60 @@
-from typing import List, Dict, Any
+import sys
+from typing import List, Dict, Any, Optional, TextIO
 
-def print_movies(movies: List[Dict[str, Any]]) -> None:
+import config
+from cache import TTLCache
+from config import DEFAULT_LIMIT
+from metrics import instrument
+
+# Сколько фильмов показывать на одной странице результатов.
+PAGE_SIZE: int = getattr(config, "PAGE_SIZE", DEFAULT_LIMIT)
+# Вывод без эмодзи (для перенаправления в файл или другую программу).
+PLAIN_OUTPUT: bool = getattr(config, "PLAIN_OUTPUT", False)
+# Сколько отформатированных карточек фильмов хранить для повторного вывода.
+RENDER_CACHE_SIZE: int = getattr(config, "RENDER_CACHE_SIZE", 1024)
+DESCRIPTION_LIMIT = 300
+
+_LABELS = {
+    False: ("🎬 ", "📚 Genre: ", "📅 Release year: ", "⏱️ Duration: ", "👥 Actors: ", "📝 Description: "),
+    True: ("", "Genre: ", "Release year: ", "Duration: ", "Actors: ", "Description: "),
+}
+_rendered = TTLCache(maxsize=RENDER_CACHE_SIZE, ttl=3600.0)
+
+
+def format_movie(movie: Dict[str, Any], plain: bool = False) -> str:
+    """
+    Формирует карточку фильма: заглавное название и подробности (жанр, год,
+    продолжительность, актёры, описание до 300 символов).
+
+    Готовые карточки запоминаются, поэтому повторный вывод того же фильма
+    (например, страницы из кэша результатов) не форматирует его заново.
+
+    :param movie: Словарь с информацией о фильме.
+    :param plain: Без эмодзи.
+    :return: Текст карточки, начинающийся с пустой строки.
+    """
+    key = (plain, movie.get('film_id'), movie.get('genre'), movie.get('title'), movie.get('release_year'),
+           movie.get('length'), movie.get('actors'), movie.get('description'))
+    found, block = _rendered.get(key)
+    if found:
+        return block
+
+    title, genre, year, duration, actors, description = _LABELS[plain]
+    text = movie.get('description') or 'No description provided'
+    block = (
+        f"\n{title}{(movie.get('title') or 'UNKNOWN TITLE').upper()}\n"
+        f"{genre}{movie.get('genre') or 'Unknown Genre'}\n"
+        f"{year}{movie.get('release_year') or 'Unknown Year'}\n"
+        f"{duration}{movie.get('length') or 'Unknown Duration'} min\n"
+        f"{actors}{(movie.get('actors') or 'No actors listed').title()}\n"
+        f"{description}{text[:DESCRIPTION_LIMIT]}{'...' if len(text) > DESCRIPTION_LIMIT else ''}\n"
+    )
+    _rendered.set(key, block)
+    return block
+
+
+@instrument(phase="render")
+def print_movies(movies: List[Dict[str, Any]], plain: Optional[bool] = None, out: Optional[TextIO] = None) -> None:
     """
     Форматированный вывод списка фильмов.
 
@@ -11,30 +65,25 @@ def print_movies(movies: List[Dict[str, Any]]) -> None:
     - Актёры
     - Описание
 
+    Вся страница собирается в одну строку и записывается в поток одним вызовом.
     Если список пуст, выводится сообщение "No movies found."
 
     :param movies: Список словарей, каждый из которых содержит информацию о фильме.
+    :param plain: Без эмодзи (по умолчанию PLAIN_OUTPUT из config).
+    :param out: Поток вывода (по умолчанию sys.stdout).
     :return: None
     """
+    out = out or sys.stdout
     if not movies:
-        print("No movies found.")
+        out.write("No movies found.\n")
         return
 
+    plain = PLAIN_OUTPUT if plain is None else plain
+    blocks = []
     for movie in movies:
         try:
-            title = movie.get('title', 'UNKNOWN TITLE').upper()
-            genre = movie.get('genre', 'Unknown Genre')
-            year = movie.get('release_year', 'Unknown Year')
-            duration = movie.get('length', 'Unknown Duration')
-            actors = movie.get('actors', 'No actors listed').title()
-            description = movie.get('description', 'No description provided')
-
-            print(f"\n🎬 {title}")
-            print(f"📚 Genre: {genre}")
-            print(f"📅 Release year: {year}")
-            print(f"⏱️ Duration: {duration} min")
-            print(f"👥 Actors: {actors}")
-            print(f"📝 Description: {description[:300]}{'...' if len(description) > 300 else ''}")
-
+            blocks.append(format_movie(movie, plain))
         except Exception as e:
-            print(f"Error displaying movie: {e}")
\ No newline at end of file
+            blocks.append(f"Error displaying movie: {e}\n")
+    out.write(''.join(blocks))
+    out.flush()
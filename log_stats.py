@@ -1,29 +1,59 @@
-from datetime import datetime
-from pymongo.errors import PyMongoError
-from log_writer import with_mongo_connection
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.collection import Collection
+from pymongo.errors import OperationFailure
+import config
+from cache import cache_stats
+from resilience import resilience_stats
+from log_writer import (with_mongo_connection, ensure_indexes, MONGODB_SUMMARY_COLLECTION,
+                        MONGODB_ROLLUP_COLLECTION)
+
+# Если почасовые сводки отстают от текущего времени больше чем на столько секунд,
+# статистика за период сначала досчитывает их (0 — только командой compact).
+LOG_COMPACTION_INTERVAL: float = getattr(config, "LOG_COMPACTION_INTERVAL", 3600)
+# Документ с границей уже сведённых событий: всё, что раньше неё, учтено в почасовых сводках.
+COMPACTION_STATE_COLLECTION = f"{MONGODB_ROLLUP_COLLECTION}_state"
+# Периоды статистики.
+WINDOWS: Dict[str, timedelta] = {"hour": timedelta(hours=1), "day": timedelta(days=1), "week": timedelta(weeks=1)}
+# Час сводится с запасом: события доходят до MongoDB с задержкой фоновой записи.
+_LATE_EVENTS = timedelta(minutes=1)
+_HOUR = {"$dateFromParts": {"year": {"$year": "$timestamp"}, "month": {"$month": "$timestamp"},
+                            "day": {"$dayOfMonth": "$timestamp"}, "hour": {"$hour": "$timestamp"}}}
+_ROLLUP_BATCH_SIZE = 1000
 
 
 def show_statistics() -> None:
     """
     Запрашивает у пользователя тип статистики и выводит результат:
     1 — последние 5 уникальных запросов;
-    2 — топ-5 популярных запросов по количеству.
+    2 — топ-5 популярных запросов по количеству;
+    3 — эффективность кэшей (доля попаданий и занимаемая память), упреждающей загрузки
+        и состояние выключателей источников данных;
+    4 — число запросов и топ-5 популярных за последний час, день или неделю.
     """
     print("\nWhich statistics would you like to see?")
     print("1 — Last 5 unique requests")
     print("2 — Top 5 popular requests")
+    print("3 — Cache efficiency")
+    print("4 — Requests for the last hour, day or week")
 
-    choice = input("Enter number (1 or 2): ").strip()
+    choice = input("Enter number (1, 2, 3 or 4): ").strip()
 
     if choice == "1":
-        results = get_recent_requests()
+        try:
+            results = get_recent_requests()
+        except RuntimeError as e:
+            print(f"❗ Unable to retrieve statistics: {e}")
+            return
         if not results:
             print("❗ Unable to retrieve statistics.")
             return
 
         print("\n📌 Last 5 unique requests:")
         for r in results:
-            ts = datetime.fromisoformat(r['timestamp']).strftime("%Y-%m-%d %H:%M:%S")
+            ts = local_time(r['timestamp']).strftime("%Y-%m-%d %H:%M:%S")
             search_type = r.get("search_type", "unknown")
             params = r["_id"]
 
@@ -37,74 +67,380 @@ def show_statistics() -> None:
                 print(f"📅 Date: {ts} | 🔍 Type: {search_type:<12} | 🎬 Genre: {genre} ({y_from}–{y_to})")
 
     elif choice == "2":
-        results = get_popular_requests()
+        try:
+            results = get_popular_requests()
+        except RuntimeError as e:
+            print(f"❗ Unable to retrieve statistics: {e}")
+            return
         if not results:
             print("❗ Unable to retrieve statistics.")
             return
 
         print("\n⭐ Top 5 popular requests:")
-        for r in results:
-            search_type = r.get("search_type", "unknown")
-            params = r["_id"]
-            count = r.get("count", "?")
+        _print_popular(results)
 
-            if search_type == "keyword":
-                keyword = params.get("keyword", "?")
-                print(f"🔍 Type: {search_type:<12} | 🔑 Keyword: '{keyword}' → {count} requests")
-            else:
-                genre = params.get("genre", "?")
-                y_from = params.get("year_from", "?")
-                y_to = params.get("year_to", "?")
-                print(f"🔍 Type: {search_type:<12} | 🎬 Genre: {genre} ({y_from}–{y_to}) → {count} requests")
+    elif choice == "3":
+        print("\n🗄️ Cache efficiency:")
+        for name, info in cache_stats().items():
+            print(f"{name:<26} | hit rate: {info.hit_rate:6.1%} | hits: {info.hits:<6} | misses: {info.misses:<6} "
+                  f"| entries: {info.size}/{info.maxsize} | memory: {info.bytes / 1024:.1f} KiB")
+        # prefetch тянет за собой mysql_connector, поэтому импортируется только здесь.
+        from prefetch import prefetch_stats
+        stats = prefetch_stats()
+        print(f"{'page prefetch':<26} | hits: {stats['hits']:<6} | misses: {stats['misses']:<6} "
+              f"| wasted: {stats['wasted']}")
+        resilience = resilience_stats()
+        for name, breaker in resilience["breakers"].items():
+            print(f"{name + ' breaker':<26} | state: {breaker['state']:<9} | trips: {breaker['trips']:<6} "
+                  f"| rejected: {breaker['rejections']}")
+        print(f"{'retries / stale results':<26} | {resilience['retries']} / {resilience['stale_results']}")
+
+    elif choice == "4":
+        window = {"1": "hour", "2": "day", "3": "week"}.get(input("Period (1 — hour, 2 — day, 3 — week): ").strip())
+        if window is None:
+            print("Invalid input. Returning to menu.")
+            return
+        try:
+            counts = get_request_counts(window)
+            results = get_popular_requests(window=window)
+        except RuntimeError as e:
+            print(f"❗ Unable to retrieve statistics: {e}")
+            return
+
+        total = sum(c["count"] for c in counts)
+        by_type = ", ".join(f"{c['search_type']}: {c['count']}" for c in counts)
+        print(f"\n🕒 Last {window}: {total} requests" + (f" ({by_type})" if by_type else ""))
+        if results:
+            print(f"⭐ Top {len(results)} popular requests:")
+            _print_popular(results)
 
     else:
         print("Invalid input. Returning to menu.")
 
 
+def _print_popular(results: List[dict]) -> None:
+    for r in results:
+        search_type = r.get("search_type", "unknown")
+        params = r["_id"]
+        count = r.get("count", "?")
+
+        if search_type == "keyword":
+            keyword = params.get("keyword", "?")
+            print(f"🔍 Type: {search_type:<12} | 🔑 Keyword: '{keyword}' → {count} requests")
+        else:
+            genre = params.get("genre", "?")
+            y_from = params.get("year_from", "?")
+            y_to = params.get("year_to", "?")
+            print(f"🔍 Type: {search_type:<12} | 🎬 Genre: {genre} ({y_from}–{y_to}) → {count} requests")
+
+
+def local_time(value: Any) -> datetime:
+    """
+    Переводит timestamp лога в местное время.
+
+    :param value: Дата в UTC из MongoDB или строка ISO (записи до migrate_timestamps).
+    :return: Дата в местном часовом поясе.
+    """
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value.replace(tzinfo=timezone.utc).astimezone() if value.tzinfo is None else value.astimezone()
+
+
+def _utc_now() -> datetime:
+    # pymongo возвращает даты без часового пояса в UTC, поэтому и границы считаются так же.
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _floor_hour(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _compacted_until(collection: Collection) -> Optional[datetime]:
+    state = collection.database[COMPACTION_STATE_COLLECTION].find_one({"_id": "compaction"})
+    return state["until"] if state else None
+
+
 @with_mongo_connection
 def get_recent_requests(collection) -> list[dict]:
     """
     Возвращает последние 5 уникальных запросов.
 
+    Читает сводную коллекцию по индексу timestamp, а не агрегирует весь лог.
+
     :param collection: Коллекция MongoDB (передаётся декоратором).
     :return: Список уникальных запросов.
     """
     try:
-        pipeline = [
-            {"$sort": {"timestamp": -1}},
-            {"$group": {
-                "_id": "$params",
-                "timestamp": {"$first": "$timestamp"},
-                "search_type": {"$first": "$search_type"}
-            }},
-            {"$sort": {"timestamp": -1}},
-            {"$limit": 5}
-        ]
-        return list(collection.aggregate(pipeline))
-    except PyMongoError as e:
-        print(f"Aggregation error (recent): {e}")
+        summary = collection.database[MONGODB_SUMMARY_COLLECTION]
+        return list(summary.find({}, {"timestamp": 1, "search_type": 1}).sort("timestamp", DESCENDING).limit(5))
+    except OperationFailure as e:
+        print(f"Query error (recent): {e}")
         return []
 
 
 @with_mongo_connection
-def get_popular_requests(collection) -> list[dict]:
+def get_popular_requests(collection, limit: int = 5, window: Optional[str] = None) -> list[dict]:
     """
-    Возвращает 5 самых популярных запросов.
+    Возвращает самые популярные запросы (по умолчанию 5) за всё время или за период.
+
+    За всё время читает сводную коллекцию по индексу count, а не агрегирует весь лог.
+    За период складывает почасовые сводки и исходные события неполных часов (см. window_counts).
 
     :param collection: Коллекция MongoDB (передаётся декоратором).
+    :param limit: Количество запросов.
+    :param window: Период: 'hour', 'day', 'week' или None — всё время.
     :return: Список популярных запросов с числом вызовов.
+    :raises ValueError: Если период неизвестен.
     """
+    if window is not None:
+        counts = window_counts(collection, window)
+        return sorted(counts.values(), key=lambda entry: -entry["count"])[:limit]
     try:
-        pipeline = [
-            {"$group": {
-                "_id": "$params",
-                "count": {"$sum": 1},
-                "search_type": {"$first": "$search_type"}
-            }},
-            {"$sort": {"count": -1}},
-            {"$limit": 5}
-        ]
-        return list(collection.aggregate(pipeline))
-    except PyMongoError as e:
-        print(f"Aggregation error (popular): {e}")
+        summary = collection.database[MONGODB_SUMMARY_COLLECTION]
+        return list(summary.find({}, {"count": 1, "search_type": 1}).sort("count", DESCENDING).limit(limit))
+    except OperationFailure as e:
+        print(f"Query error (popular): {e}")
         return []
+
+
+@with_mongo_connection
+def backfill_summary(collection) -> int:
+    """
+    Перестраивает сводную коллекцию по почасовым сводкам и ещё не сведённым событиям лога.
+
+    Нужна один раз для логов, записанных до появления сводной коллекции,
+    либо для восстановления после сбоя. События до границы сведения берутся из почасовых
+    сводок, а не из лога: исходные события старше LOG_RETENTION_DAYS TTL-индекс уже удалил.
+    Поэтому история сохраняется на срок хранения сводок (LOG_ROLLUP_RETENTION_DAYS).
+    Для запросов, известных только по сводкам, timestamp — начало последнего часа с ними.
+    Новая коллекция собирается отдельно и заменяет прежнюю целиком (renameCollection).
+
+    :param collection: Коллекция MongoDB (передаётся декоратором).
+    :return: Количество уникальных запросов в сводной коллекции.
+    """
+    compacted = _compacted_until(collection)
+    summary: Dict[Tuple, dict] = {}
+
+    def add(rows) -> None:
+        for row in rows:
+            timestamp = _to_utc(row["timestamp"]) if isinstance(row["timestamp"], str) else row["timestamp"]
+            entry = summary.setdefault(tuple(row["_id"].items()), {"_id": row["_id"], "count": 0,
+                                                                    "timestamp": timestamp,
+                                                                    "search_type": row["search_type"]})
+            entry["count"] += row["count"]
+            entry["timestamp"] = max(entry["timestamp"], timestamp)
+
+    if compacted is not None:
+        add(collection.database[MONGODB_ROLLUP_COLLECTION].aggregate([
+            {"$match": {"hour": {"$lt": compacted}}},
+            {"$group": {"_id": "$params", "count": {"$sum": "$count"}, "timestamp": {"$max": "$hour"},
+                        "search_type": {"$first": "$search_type"}}},
+        ], allowDiskUse=True))
+    # Строковые timestamp (до migrate_timestamps) не попадают в сводки и отбираются отдельно.
+    for match in ({"timestamp": {"$gte": compacted or datetime.min}}, {"timestamp": {"$type": "string"}}):
+        add(collection.aggregate([
+            {"$match": match},
+            {"$group": {"_id": "$params", "count": {"$sum": 1}, "timestamp": {"$max": "$timestamp"},
+                        "search_type": {"$first": "$search_type"}}},
+        ], allowDiskUse=True))
+
+    rebuilt = collection.database[f"{MONGODB_SUMMARY_COLLECTION}_backfill"]
+    rebuilt.drop()
+    documents = list(summary.values())
+    for i in range(0, len(documents), _ROLLUP_BATCH_SIZE):
+        rebuilt.insert_many(documents[i:i + _ROLLUP_BATCH_SIZE], ordered=False)
+    if documents:
+        rebuilt.rename(MONGODB_SUMMARY_COLLECTION, dropTarget=True)
+    else:
+        collection.database[MONGODB_SUMMARY_COLLECTION].drop()
+    ensure_indexes(collection, force=True)
+    return len(documents)
+
+
+@with_mongo_connection
+def get_request_counts(collection, window: str) -> list[dict]:
+    """
+    Возвращает число запросов каждого типа за период.
+
+    :param collection: Коллекция MongoDB (передаётся декоратором).
+    :param window: Период: 'hour', 'day' или 'week'.
+    :return: Список {'search_type': тип, 'count': n} по убыванию числа запросов.
+    :raises ValueError: Если период неизвестен.
+    """
+    by_type: Dict[str, int] = {}
+    for entry in window_counts(collection, window).values():
+        by_type[entry["search_type"]] = by_type.get(entry["search_type"], 0) + entry["count"]
+    return [{"search_type": search_type, "count": count}
+            for search_type, count in sorted(by_type.items(), key=lambda item: -item[1])]
+
+
+def window_counts(collection: Collection, window: str, now: Optional[datetime] = None) -> Dict[Tuple, dict]:
+    """
+    Считает запросы за период [now - window, now] по уникальным параметрам.
+
+    Часы, целиком попавшие в период и уже сведённые compact_log, читаются из почасовых
+    сводок; из исходного лога (по индексу timestamp) — только неполный первый час
+    и события после последнего сведения. Поэтому стоимость не зависит от объёма лога,
+    а результат совпадает с подсчётом по исходным событиям. Если сводки отстают
+    больше чем на LOG_COMPACTION_INTERVAL, они сначала досчитываются.
+
+    :param collection: Коллекция лога поиска.
+    :param window: Период: 'hour', 'day' или 'week'.
+    :param now: Конец периода (UTC без часового пояса; по умолчанию — текущее время).
+    :return: {ключ параметров: {'_id': параметры, 'count': n, 'search_type': тип}}.
+    :raises ValueError: Если период неизвестен.
+    """
+    if window not in WINDOWS:
+        raise ValueError(f"Unknown window: {window}. Use one of: {', '.join(WINDOWS)}")
+    now = now or _utc_now()
+    since = now - WINDOWS[window]
+    compacted = _compacted_until(collection)
+    if LOG_COMPACTION_INTERVAL and (compacted is None or (now - compacted).total_seconds() > LOG_COMPACTION_INTERVAL):
+        _compact(collection, _floor_hour(now - _LATE_EVENTS))
+        compacted = _compacted_until(collection)
+
+    first_hour = _floor_hour(since) + (timedelta(hours=1) if since != _floor_hour(since) else timedelta(0))
+    rollup_until = min(compacted, _floor_hour(now)) if compacted else first_hour
+    counts: Dict[Tuple, dict] = {}
+
+    def add(rows) -> None:
+        for row in rows:
+            key = tuple(row["_id"].items())
+            entry = counts.setdefault(key, {"_id": row["_id"], "count": 0, "search_type": row["search_type"]})
+            entry["count"] += row["count"]
+
+    try:
+        if rollup_until > first_hour:
+            add(collection.database[MONGODB_ROLLUP_COLLECTION].aggregate([
+                {"$match": {"hour": {"$gte": first_hour, "$lt": rollup_until}}},
+                {"$group": {"_id": "$params", "count": {"$sum": "$count"}, "search_type": {"$first": "$search_type"}}},
+            ]))
+            raw = {"$or": [{"timestamp": {"$gte": since, "$lt": first_hour}},
+                           {"timestamp": {"$gte": rollup_until, "$lte": now}}]}
+        else:
+            raw = {"timestamp": {"$gte": since, "$lte": now}}
+        add(collection.aggregate([
+            {"$match": raw},
+            {"$group": {"_id": "$params", "count": {"$sum": 1}, "search_type": {"$first": "$search_type"}}},
+        ]))
+    except OperationFailure as e:
+        print(f"Query error (window): {e}")
+        return {}
+    return counts
+
+
+def _compact(collection: Collection, until: datetime) -> int:
+    """
+    Сводит исходные события от прошлой границы до until в почасовые сводки и сдвигает границу.
+
+    Сводки интервала заменяются целиком (удаление и вставка), а граница сохраняется
+    последней, поэтому повторное сведение того же интервала (например, после сбоя)
+    не удваивает счётчики.
+
+    :return: Количество записанных почасовых сводок.
+    """
+    ensure_indexes(collection)
+    start = _compacted_until(collection)
+    if start is None:
+        first = collection.find_one({"timestamp": {"$gte": datetime.min}}, {"timestamp": 1},
+                                    sort=[("timestamp", ASCENDING)])
+        if first is None:
+            return 0
+        start = _floor_hour(first["timestamp"])
+    if start >= until:
+        return 0
+
+    rollups = collection.database[MONGODB_ROLLUP_COLLECTION]
+    rollups.delete_many({"hour": {"$gte": start, "$lt": until}})
+    written, batch = 0, []
+    for row in collection.aggregate([
+        {"$match": {"timestamp": {"$gte": start, "$lt": until}}},
+        {"$group": {"_id": {"hour": _HOUR, "params": "$params"}, "count": {"$sum": 1},
+                    "search_type": {"$first": "$search_type"}}},
+    ], allowDiskUse=True):
+        batch.append({"hour": row["_id"]["hour"], "params": row["_id"]["params"],
+                      "count": row["count"], "search_type": row["search_type"]})
+        if len(batch) >= _ROLLUP_BATCH_SIZE:
+            rollups.insert_many(batch, ordered=False)
+            written += len(batch)
+            batch = []
+    if batch:
+        rollups.insert_many(batch, ordered=False)
+        written += len(batch)
+    collection.database[COMPACTION_STATE_COLLECTION].update_one(
+        {"_id": "compaction"}, {"$set": {"until": until}}, upsert=True)
+    return written
+
+
+@with_mongo_connection
+def compact_log(collection, until: Optional[datetime] = None) -> int:
+    """
+    Досчитывает почасовые сводки лога для всех завершённых часов.
+
+    Запускается периодически (python log_stats.py compact по расписанию) или
+    автоматически из статистики за период. Исходные события после сведения
+    остаются в логе до истечения LOG_RETENTION_DAYS (TTL-индекс).
+
+    :param collection: Коллекция MongoDB (передаётся декоратором).
+    :param until: Граница сведения (UTC, начало часа; по умолчанию — начало текущего часа).
+    :return: Количество записанных почасовых сводок.
+    """
+    try:
+        return _compact(collection, until or _floor_hour(_utc_now() - _LATE_EVENTS))
+    except OperationFailure as e:
+        print(f"Compaction error: {e}")
+        return 0
+
+
+def _to_utc(value: str) -> datetime:
+    moment = datetime.fromisoformat(value)
+    # Строки писались через datetime.now().isoformat() — местное время без часового пояса.
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@with_mongo_connection
+def migrate_timestamps(collection, batch_size: int = 10000) -> int:
+    """
+    Переводит строковые timestamp лога и сводной коллекции в даты (UTC).
+
+    События обрабатываются по возрастанию времени пачками; после каждой пачки
+    почасовые сводки досчитываются до её последнего часа, чтобы события, которые
+    TTL-индекс удалит как устаревшие, успели попасть в сводки. Граница сведения
+    перед началом сбрасывается: уже существующие сводки пересчитываются целиком.
+    Миграцию можно прервать и запустить снова — она продолжит с оставшихся строк.
+
+    :param collection: Коллекция MongoDB (передаётся декоратором).
+    :param batch_size: Документов в одной пачке bulk_write.
+    :return: Количество переведённых документов лога.
+    """
+    legacy = {"timestamp": {"$type": "string"}}
+    converted = 0
+    if collection.find_one(legacy, {"_id": 1}) is not None:
+        collection.database[COMPACTION_STATE_COLLECTION].delete_one({"_id": "compaction"})
+    while True:
+        documents = list(collection.find(legacy, {"timestamp": 1}).sort("timestamp", ASCENDING).limit(batch_size))
+        if not documents:
+            break
+        updates = [UpdateOne({"_id": d["_id"]}, {"$set": {"timestamp": _to_utc(d["timestamp"])}}) for d in documents]
+        collection.bulk_write(updates, ordered=False)
+        converted += len(documents)
+        _compact(collection, _floor_hour(_to_utc(documents[-1]["timestamp"])))
+
+    summary = collection.database[MONGODB_SUMMARY_COLLECTION]
+    updates = [UpdateOne({"_id": d["_id"]}, {"$set": {"timestamp": _to_utc(d["timestamp"])}})
+               for d in summary.find(legacy, {"timestamp": 1})]
+    for i in range(0, len(updates), batch_size):
+        summary.bulk_write(updates[i:i + batch_size], ordered=False)
+    _compact(collection, _floor_hour(_utc_now() - _LATE_EVENTS))
+    return converted
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["backfill"]:
+        print(f"Summary rebuilt: {backfill_summary()} unique requests.")
+    elif sys.argv[1:] == ["compact"]:
+        print(f"Hourly rollups written: {compact_log()}.")
+    elif sys.argv[1:] == ["migrate"]:
+        print(f"Timestamps converted: {migrate_timestamps()}.")
+    else:
+        print("Usage: python log_stats.py backfill | compact | migrate")
@@ -1,51 +1,470 @@
-from datetime import datetime
-from pymongo import MongoClient
-from pymongo.errors import PyMongoError
-from typing import Callable, Any
+import atexit
+import json
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from functools import wraps
+from pymongo import MongoClient, UpdateOne, DESCENDING
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError, ConnectionFailure, OperationFailure, PyMongoError
+from typing import Callable, Any, Optional, List, Dict, Tuple
+
+import config
+import metrics
+import resilience
 from config import MONGODB_URI, MONGODB_DB, MONGODB_COLLECTION
 
+# Писать лог в фоновом потоке пачками (False — синхронная запись на каждый вызов).
+LOG_ASYNC: bool = getattr(config, "LOG_ASYNC", True)
+# Ёмкость очереди, размер пачки insert_many и максимальная задержка записи (сек.).
+LOG_QUEUE_SIZE: int = getattr(config, "LOG_QUEUE_SIZE", 1000)
+LOG_BATCH_SIZE: int = getattr(config, "LOG_BATCH_SIZE", 50)
+LOG_FLUSH_INTERVAL: float = getattr(config, "LOG_FLUSH_INTERVAL", 1.0)
+# Поведение при переполнении очереди: 'block', 'drop_oldest' или 'spill' (дописать в локальный файл).
+LOG_BACKPRESSURE: str = getattr(config, "LOG_BACKPRESSURE", "block")
+LOG_SPILL_PATH: str = getattr(config, "LOG_SPILL_PATH", "search_log_spill.jsonl")
+# Сводная коллекция: один документ на уникальные параметры (счётчик и время последнего запроса).
+MONGODB_SUMMARY_COLLECTION: str = getattr(config, "MONGODB_SUMMARY_COLLECTION", f"{MONGODB_COLLECTION}_summary")
+# Сколько дней хранить исходные события лога (TTL-индекс по timestamp; 0 — хранить всегда).
+# Статистика за прошедшие часы берётся из почасовых сводок, которые хранятся дольше.
+LOG_RETENTION_DAYS: float = getattr(config, "LOG_RETENTION_DAYS", 30)
+# Почасовые сводки лога (log_stats.compact_log): один документ на час и уникальные параметры.
+MONGODB_ROLLUP_COLLECTION: str = getattr(config, "MONGODB_ROLLUP_COLLECTION", f"{MONGODB_COLLECTION}_hourly")
+LOG_ROLLUP_RETENTION_DAYS: float = getattr(config, "LOG_ROLLUP_RETENTION_DAYS", 400)
+# Сколько ждать доступного сервера MongoDB (мс); драйвер по умолчанию ждёт 30 с на каждую попытку.
+MONGODB_TIMEOUT_MS: int = getattr(config, "MONGODB_TIMEOUT_MS", 5000)
+# Ошибки, означающие недоступность сервера (их имеет смысл повторять).
+MONGODB_RETRYABLE_ERRORS = (ConnectionFailure,)
+
+# Коды ошибок MongoDB: индекс с тем же ключом уже существует с другими параметрами.
+INDEX_CONFLICT_CODES = (85, 86)
+# Код ошибки MongoDB: документ с таким _id уже есть.
+_DUPLICATE_KEY = 11000
+
+_indexes_ready = False
+
+
+def ttl_options(days: Optional[float]) -> Dict[str, Any]:
+    """
+    Параметры create_index для TTL-индекса.
+
+    :param days: Срок хранения в днях (0 или None — без срока).
+    :return: {'expireAfterSeconds': n} или пустой словарь.
+    """
+    return {"expireAfterSeconds": int(days * 86400)} if days else {}
+
+
+def _ensure_ttl_index(collection: Collection, field: str, days: Optional[float]) -> None:
+    keys = [(field, DESCENDING)]
+    try:
+        collection.create_index(keys, **ttl_options(days))
+    except OperationFailure as e:
+        if e.code not in INDEX_CONFLICT_CODES:
+            raise
+        # Индекс создан раньше без срока хранения или с другим сроком: пересоздаётся.
+        collection.drop_index(keys)
+        collection.create_index(keys, **ttl_options(days))
+
+
+def index_specs(collection: Any) -> List[Tuple[Any, str, Optional[float]]]:
+    """
+    Перечень индексов лога поиска — общий для ensure_indexes и async_db.
+
+    :param collection: Коллекция лога поиска (pymongo или motor).
+    :return: Список (коллекция, поле, срок хранения в днях или None — обычный индекс).
+    """
+    database = collection.database
+    return [
+        (collection, "timestamp", LOG_RETENTION_DAYS),
+        (database[MONGODB_SUMMARY_COLLECTION], "count", None),
+        (database[MONGODB_SUMMARY_COLLECTION], "timestamp", None),
+        (database[MONGODB_ROLLUP_COLLECTION], "hour", LOG_ROLLUP_RETENTION_DAYS),
+    ]
+
+
+def ensure_indexes(collection: Collection, force: bool = False) -> None:
+    """
+    Создаёт индексы лога, сводной коллекции и почасовых сводок (один раз за время работы процесса).
+
+    Индексы по timestamp лога и по hour почасовых сводок — TTL-индексы: MongoDB сам
+    удаляет документы старше LOG_RETENTION_DAYS и LOG_ROLLUP_RETENTION_DAYS. Они же
+    обслуживают выборки по периоду.
+    Документы со строковым timestamp (записанные до перехода на дату) не удаляются,
+    их переводит log_stats.migrate_timestamps.
+
+    :param collection: Коллекция лога поиска.
+    :param force: Создать индексы повторно, даже если это уже делалось.
+    """
+    global _indexes_ready
+    if _indexes_ready and not force:
+        return
+    for target, field, days in index_specs(collection):
+        _ensure_ttl_index(target, field, days)
+    _indexes_ready = True
+
+
+def summary_updates(documents: List[dict]) -> List[UpdateOne]:
+    """
+    Формирует upsert-операции сводной коллекции для пачки документов лога.
+
+    Одинаковые параметры внутри пачки объединяются в одну операцию с суммарным $inc.
+
+    :param documents: Документы лога.
+    :return: Список операций для bulk_write.
+    """
+    grouped: Dict[Tuple, Dict[str, Any]] = {}
+    for document in documents:
+        key = (document["search_type"], tuple(document["params"].items()))
+        entry = grouped.setdefault(key, {"params": document["params"], "search_type": document["search_type"],
+                                         "count": 0, "timestamp": document["timestamp"]})
+        entry["count"] += 1
+        entry["timestamp"] = max(entry["timestamp"], document["timestamp"])
+    return [
+        UpdateOne(
+            {"_id": entry["params"]},
+            {"$inc": {"count": entry["count"]},
+             "$max": {"timestamp": entry["timestamp"]},
+             "$set": {"search_type": entry["search_type"]}},
+            upsert=True
+        )
+        for entry in grouped.values()
+    ]
+
+
+def insert_logs(collection: Collection, documents: List[dict]) -> None:
+    """
+    Записывает документы в лог.
+
+    insert_many проставляет _id в самих документах, поэтому повтор после частичной записи
+    (обрыв соединения посреди пачки) дописывает только недостающие документы: уже
+    записанные отклоняются как дубликаты, и это не считается ошибкой.
+
+    :param collection: Коллекция лога поиска.
+    :param documents: Документы лога.
+    :raises PyMongoError: При ошибке записи.
+    """
+    ensure_indexes(collection)
+    try:
+        collection.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        if e.details.get("writeConcernErrors") or any(
+                error["code"] != _DUPLICATE_KEY for error in e.details["writeErrors"]):
+            raise
+
+
+def update_summary(collection: Collection, documents: List[dict]) -> None:
+    """
+    Добавляет документы лога в сводную коллекцию.
+
+    :param collection: Коллекция лога поиска.
+    :param documents: Документы лога.
+    :raises PyMongoError: При ошибке записи.
+    """
+    collection.database[MONGODB_SUMMARY_COLLECTION].bulk_write(summary_updates(documents), ordered=False)
+
+
+def write_logs(collection: Collection, documents: List[dict]) -> None:
+    """
+    Записывает документы в лог и обновляет сводную коллекцию.
+
+    Повторять вызов целиком безопасно, пока сводная коллекция не обновлена (см. insert_logs).
+
+    :param collection: Коллекция лога поиска.
+    :param documents: Документы лога.
+    :raises PyMongoError: При ошибке записи.
+    """
+    insert_logs(collection, documents)
+    update_summary(collection, documents)
+
 
 def with_mongo_connection(func: Callable[..., Any]) -> Callable[..., Any]:
     """
     Декоратор, подключающийся к MongoDB и передающий коллекцию в функцию.
 
-    Если подключение к MongoDB не удалось, выбрасывает RuntimeError и
-    прерывает выполнение функции.
+    Обращение выполняется через resilience.call: при сбое соединения оно повторяется
+    с нарастающей задержкой, а пока выключатель MongoDB разомкнут, читающие функции
+    получают последний успешный результат того же вызова.
+    Если получить результат не удалось, выбрасывает RuntimeError.
 
     :param func: Функция, ожидающая первым аргументом MongoDB-коллекцию.
     :return: Результат выполнения обёрнутой функции.
     :raises RuntimeError: При ошибке подключения к MongoDB.
     """
+    name = func.__name__
+
+    @wraps(func)
     def wrapper(*args, **kwargs) -> Any:
-        try:
-            with MongoClient(MONGODB_URI) as client:
+        timed = metrics.METRICS_ENABLED
+        if timed:
+            # Вызов считается один раз, сколько бы попыток ни сделал resilience.call.
+            metrics.registry.inc("calls", name)
+
+        def attempt() -> Any:
+            started = time.perf_counter()
+            with MongoClient(MONGODB_URI, serverSelectionTimeoutMS=MONGODB_TIMEOUT_MS) as client:
                 db = client[MONGODB_DB]
                 collection = db[MONGODB_COLLECTION]
-                return func(collection, *args, **kwargs)
-        except PyMongoError as e:
-            raise RuntimeError(f"MongoDB error in {func.__name__}: {e}")
+                if not timed:
+                    return func(collection, *args, **kwargs)
+                # MongoClient подключается лениво, поэтому "connect" — только создание клиента,
+                # а установление соединения входит в "execute".
+                metrics.observe_since(name, "connect", started)
+                executed = time.perf_counter()
+                result = func(collection, *args, **kwargs)
+                metrics.observe_since(name, "execute", executed)
+                if isinstance(result, list):
+                    metrics.registry.inc("rows", name, len(result))
+                return result
+
+        try:
+            return resilience.call("mongodb", attempt, name, MONGODB_RETRYABLE_ERRORS, args, kwargs)
+        except (PyMongoError, resilience.CircuitOpenError) as e:
+            if timed:
+                metrics.registry.inc("errors", name)
+            raise RuntimeError(f"MongoDB error in {name}: {e}")
     return wrapper
 
 
-@with_mongo_connection
-def log_search(collection, search_type: str, params: dict, results_count: int) -> bool:
+class SearchLogPipeline:
+    """
+    Фоновая запись лога поиска в MongoDB.
+
+    Документы складываются в ограниченную очередь, откуда их забирает рабочий поток
+    и записывает через insert_many — когда набралась пачка LOG_BATCH_SIZE или прошло
+    LOG_FLUSH_INTERVAL секунд. Поток использует один MongoClient на всё время работы.
+    Запись повторяется через resilience.call; если она всё же не удалась или выключатель
+    MongoDB разомкнут, пачка дописывается в файл LOG_SPILL_PATH, чтобы не потерять лог.
+    """
+
+    _STOP = object()
+
+    def __init__(self, maxsize: int = LOG_QUEUE_SIZE, batch_size: int = LOG_BATCH_SIZE,
+                 flush_interval: float = LOG_FLUSH_INTERVAL, backpressure: str = LOG_BACKPRESSURE,
+                 spill_path: str = LOG_SPILL_PATH) -> None:
+        if backpressure not in ("block", "drop_oldest", "spill"):
+            raise ValueError(f"Unknown backpressure policy: {backpressure}")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.backpressure = backpressure
+        self.spill_path = spill_path
+        self.written = self.dropped = self.spilled = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize)
+        self._spill_lock = threading.Lock()
+        self._client: Optional[MongoClient] = None
+        self._closed = False
+        # Пачка, которую собирает или записывает рабочий поток (для сброса в файл при close).
+        self._batch: List[dict] = []
+        self._thread = threading.Thread(target=self._run, name="search-log-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, document: dict) -> bool:
+        """
+        Ставит документ в очередь на запись, не дожидаясь MongoDB.
+
+        :param document: Документ лога.
+        :return: True, если документ принят (в очередь или в файл), False — если отброшен.
+        """
+        if self._closed:
+            return False
+        if self.backpressure == "block":
+            self._queue.put(document)
+            return True
+        while True:
+            try:
+                self._queue.put_nowait(document)
+                return True
+            except queue.Full:
+                if self.backpressure == "spill":
+                    self._spill([document])
+                    return True
+            try:
+                self._queue.get_nowait()
+                self._queue.task_done()
+                self.dropped += 1
+            except queue.Empty:
+                pass
+
+    def flush(self) -> None:
+        """Блокирует выполнение, пока все принятые документы не будут записаны."""
+        self._queue.join()
+
+    def close(self, timeout: float = 10.0) -> None:
+        """
+        Дописывает очередь, останавливает рабочий поток и закрывает клиент MongoDB.
+
+        Если за timeout секунд запись не завершилась, оставшиеся в очереди документы
+        и пачка, которую записывает рабочий поток, дописываются в файл LOG_SPILL_PATH.
+        Пачка, которую поток всё же успеет записать, окажется и в файле: при выходе
+        лог может продублироваться, но не теряется. Ожидание не превышает timeout,
+        даже если очередь заполнена, а рабочий поток завис на записи.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        deadline = time.monotonic() + timeout
+        try:
+            self._queue.put(self._STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        else:
+            self._thread.join(max(deadline - time.monotonic(), 0))
+            if not self._thread.is_alive():
+                return
+        leftover = list(self._batch)
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not self._STOP:
+                leftover.append(item)
+        if leftover:
+            self._spill(leftover)
+        try:
+            # Очередь только что опустошена; если её успели заполнить, поток всё равно демон.
+            self._queue.put_nowait(self._STOP)
+        except queue.Full:
+            pass
+
+    def _run(self) -> None:
+        batch = self._batch
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                item = None
+
+            stop = item is self._STOP
+            if item is not None and not stop:
+                batch.append(item)
+            if batch and (stop or item is None or len(batch) >= self.batch_size):
+                self._write(batch)
+                for _ in batch:
+                    self._queue.task_done()
+                batch = self._batch = []
+            if item is None or not batch:
+                deadline = time.monotonic() + self.flush_interval
+            if stop:
+                self._queue.task_done()
+                break
+
+        if self._client is not None:
+            self._client.close()
+
+    def _write(self, batch: List[dict]) -> None:
+        started = time.perf_counter() if metrics.METRICS_ENABLED else None
+        try:
+            if self._client is None:
+                self._client = MongoClient(MONGODB_URI, serverSelectionTimeoutMS=MONGODB_TIMEOUT_MS)
+            collection = self._client[MONGODB_DB][MONGODB_COLLECTION]
+            resilience.call("mongodb", lambda: insert_logs(collection, batch), "log_batch_write",
+                            MONGODB_RETRYABLE_ERRORS)
+        except (PyMongoError, resilience.CircuitOpenError) as e:
+            if started is not None:
+                metrics.registry.inc("errors", "log_batch_write")
+            print(f"MongoDB logging error: {e}")
+            self._spill(batch)
+            return
+        self.written += len(batch)
+        if started is not None:
+            metrics.registry.inc("rows", "log_batch_write", len(batch))
+        # Сводка обновляется отдельно: её повтор не повторяет запись лога,
+        # а при неудаче пачка остаётся в логе (сводку восстанавливает log_stats.backfill_summary).
+        try:
+            resilience.call("mongodb", lambda: update_summary(collection, batch), "log_batch_write",
+                            MONGODB_RETRYABLE_ERRORS)
+            if started is not None:
+                metrics.observe_since("log_batch_write", "execute", started)
+        except (PyMongoError, resilience.CircuitOpenError) as e:
+            if started is not None:
+                metrics.registry.inc("errors", "log_batch_write")
+            print(f"MongoDB summary update error: {e}")
+
+    def _spill(self, documents: List[dict]) -> None:
+        with self._spill_lock:
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for document in documents:
+                    f.write(json.dumps(document, default=str, ensure_ascii=False) + "\n")
+        self.spilled += len(documents)
+
+
+_pipeline: Optional[SearchLogPipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def get_log_pipeline() -> SearchLogPipeline:
+    """
+    Возвращает общий фоновый конвейер записи лога, запуская его при первом обращении.
+
+    :return: Экземпляр SearchLogPipeline.
+    """
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = SearchLogPipeline()
+        return _pipeline
+
+
+@atexit.register
+def close_log_pipeline() -> None:
+    """Дописывает накопленный лог и останавливает конвейер (вызывается автоматически при выходе)."""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is not None:
+            _pipeline.close()
+            _pipeline = None
+
+
+def make_log_document(search_type: str, params: dict, results_count: int) -> dict:
+    """
+    Формирует документ лога поискового запроса.
+
+    :param search_type: Тип поиска ('keyword' или 'genre&years').
+    :param params: Параметры поиска.
+    :param results_count: Кол-во найденных результатов.
+    :return: Документ для записи в MongoDB (timestamp — дата в UTC).
+    """
+    return {
+        "timestamp": datetime.now(timezone.utc),
+        "search_type": search_type,
+        "params": params,
+        "results_count": results_count
+    }
+
+
+def log_search(search_type: str, params: dict, results_count: int) -> bool:
     """
     Сохраняет лог поискового запроса в MongoDB.
 
-    :param collection: Коллекция MongoDB (передаётся декоратором).
+    При LOG_ASYNC документ передаётся фоновому конвейеру и функция возвращается сразу,
+    иначе запись выполняется синхронно.
+
     :param search_type: Тип поиска ('keyword' или 'genre&years').
     :param params: Параметры поиска.
     :param results_count: Кол-во найденных результатов.
     :return: True при успехе, иначе False.
+    :raises RuntimeError: При ошибке подключения к MongoDB (только в синхронном режиме).
+    """
+    document = make_log_document(search_type, params, results_count)
+    if LOG_ASYNC:
+        return get_log_pipeline().submit(document)
+    return _insert_log(document)
+
+
+@with_mongo_connection
+def _insert_log(collection, document: dict) -> bool:
+    """
+    Синхронно записывает один документ лога.
+
+    :param collection: Коллекция MongoDB (передаётся декоратором).
+    :param document: Документ лога.
+    :return: True при успехе, иначе False.
     """
     try:
-        collection.insert_one({
-            "timestamp": datetime.now().isoformat(),
-            "search_type": search_type,
-            "params": params,
-            "results_count": results_count
-        })
+        write_logs(collection, [document])
         return True
-    except PyMongoError as e:
+    except OperationFailure as e:
         print(f"MongoDB logging error: {e}")
         return False
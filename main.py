@@ -1,19 +1,158 @@
-from mysql_connector import search_by_keyword, search_by_genre_and_years, get_all_genres, get_min_max_years
-from log_writer import log_search
-from log_stats import show_statistics
-from formatter import print_movies
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+# Отсчёт времени до первого меню. Модули доступа к данным (а с ними pymysql, pymongo
+# и config) импортируются при первом обращении, чтобы меню появлялось сразу.
+_STARTED = time.perf_counter()
+
+
+def warm_up() -> None:
+    """Прогревает кэш результатов первыми страницами популярных запросов из лога."""
+    from formatter import PAGE_SIZE
+    from log_stats import get_popular_requests
+    from mysql_connector import warm_search_cache, SEARCH_CACHE_WARMUP
+
+    try:
+        warmed = warm_search_cache(get_popular_requests(SEARCH_CACHE_WARMUP), limit=PAGE_SIZE)
+        print(f"ℹ️ Search cache warmed up with {warmed} popular requests.")
+    except RuntimeError as e:
+        print(f"Cache warm-up skipped: {e}")
+
+
+def warm_connections() -> None:
+    """
+    Создаёт пул соединений MySQL, заполняет кэш справочников (жанры и диапазон лет),
+    строит индекс триграмм названий (при KEYWORD_SEARCH_ENGINE = 'trigram'),
+    а при SEARCH_CACHE_WARMUP — и кэш результатов популярных запросов.
+    """
+    from mysql_connector import get_all_genres, get_min_max_years, warm_title_index, SEARCH_CACHE_WARMUP
+
+    get_all_genres()
+    get_min_max_years()
+    warm_title_index()
+    if SEARCH_CACHE_WARMUP:
+        warm_up()
+
+
+def build_title_index() -> None:
+    """Строит индекс триграмм названий (при KEYWORD_SEARCH_ENGINE = 'trigram') до первого поиска."""
+    from mysql_connector import warm_title_index
+
+    warm_title_index()
+
+
+def start_warm_up(target: Callable[[], None] = warm_connections) -> threading.Thread:
+    """
+    Запускает прогрев в фоновом потоке, чтобы меню не ждало подключения к базам.
+
+    :param target: Функция прогрева (по умолчанию warm_connections).
+    :return: Запущенный поток (демон: не задерживает выход из программы).
+    """
+    thread = threading.Thread(target=target, name="startup-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def record_first_menu(shown_at: float) -> None:
+    """
+    Записывает в метрики время от запуска до первого показа меню (функция main, фаза first_menu).
+
+    :param shown_at: Момент показа меню (time.perf_counter()).
+    """
+    import metrics
+
+    if metrics.METRICS_ENABLED:
+        metrics.registry.observe("main", "first_menu", (shown_at - _STARTED) * 1000)
+
+
+def browse_results(fetch_page: Callable[[Optional[str]], List[Dict]], search_type: str, params: dict) -> None:
+    """
+    Постраничный просмотр результатов поиска с записью каждой показанной страницы в лог.
+
+    При PREFETCH_DEPTH > 0 следующие страницы загружаются заранее, пока пользователь
+    читает текущую; при возврате в меню упреждающая загрузка отменяется.
+
+    :param fetch_page: Функция загрузки страницы по токену продолжения (None — первая страница).
+    :param search_type: Тип поиска для лога.
+    :param params: Параметры поиска для лога.
+    """
+    from formatter import print_movies, PAGE_SIZE
+    from log_writer import log_search
+    from mysql_connector import next_page_token
+    from prefetch import PagePrefetcher, PREFETCH_DEPTH
+
+    prefetcher = PagePrefetcher(fetch_page) if PREFETCH_DEPTH > 0 else None
+    page_token = None
+    try:
+        while True:
+            movies = prefetcher.get(page_token) if prefetcher else fetch_page(page_token)
+            if (movies is None or movies == []) and page_token is None:
+                retry = input("Failed to load results. Try again? (yes/no): ").strip().lower()
+                if retry == 'yes':
+                    continue
+                else:
+                    break
+
+            if not movies:
+                print("No more results found.")
+                break
+
+            try:
+                log_search(search_type, params, len(movies))
+            except RuntimeError as e:
+                # Без лога поиск продолжает работать; повторы и выключатель MongoDB — в resilience.
+                print(f"⚠️ Search was not logged: {e}")
+
+            print_movies(movies)
+
+            next_page = input(f"\nShow next {PAGE_SIZE} movies? (1 - yes, 2 - back to menu): ")
+            if next_page == '1':
+                page_token = next_page_token(movies, page_token)
+            else:
+                break
+    finally:
+        if prefetcher:
+            prefetcher.close()
 
 
 def main() -> None:
-    """Главная функция, обеспечивающая пользовательский интерфейс для поиска фильмов и просмотра статистики."""
+    """
+    Главная функция, обеспечивающая пользовательский интерфейс для поиска фильмов и просмотра статистики.
+
+    При STARTUP_WARMUP подключение к базам и заполнение кэшей выполняются в фоновом потоке,
+    пока пользователь выбирает пункт меню; иначе — при первом обращении (и, если задан
+    SEARCH_CACHE_WARMUP, прогрев кэша результатов — до показа меню). Индекс триграмм
+    (KEYWORD_SEARCH_ENGINE = 'trigram') в любом случае строится в фоне при запуске.
+    """
+    import config
+
+    if getattr(config, "STARTUP_WARMUP", False):
+        start_warm_up()
+    else:
+        if getattr(config, "KEYWORD_SEARCH_ENGINE", "like") == "trigram":
+            start_warm_up(build_title_index)
+        if getattr(config, "SEARCH_CACHE_WARMUP", 0):
+            warm_up()
+
+    menu_shown_at = None
     while True:
         print("\n1 - Search by keyword")
         print("2 - Search by genre and years")
         print("3 - Show statistic")
         print("0 - Exit")
+        first_menu = menu_shown_at is None
+        if first_menu:
+            menu_shown_at = time.perf_counter()
         choice = input("Choose option: ")
+        if first_menu:
+            record_first_menu(menu_shown_at)
 
         if choice == '1':
+            from formatter import PAGE_SIZE
+            from mysql_connector import search_by_keyword
+
             while True:
                 keyword = input("Enter keyword: ").strip()
                 if not keyword:
@@ -23,36 +162,13 @@ def main() -> None:
                     print("ℹ️ Note: You've entered only numbers. Searching for movies with numbers in the title.")
                 break
 
-            offset = 0
-            while True:
-                movies = search_by_keyword(keyword, offset)
-                if (movies is None or movies == []) and offset == 0:
-                    retry = input("Failed to load results. Try again? (yes/no): ").strip().lower()
-                    if retry == 'yes':
-                        continue
-                    else:
-                        break
-
-                if not movies:
-                    print("No more results found.")
-                    break
-
-                try:
-                    log_search("keyword", {"keyword": keyword}, len(movies))
-                except RuntimeError as e:
-                    print(e)
-                    print("❌ Program stopped due to logging failure.")
-                    return
-
-                print_movies(movies)
-
-                next_page = input("\nShow next 10 movies? (1 - yes, 2 - back to menu): ")
-                if next_page == '1':
-                    offset += 10
-                else:
-                    break
+            browse_results(lambda token: search_by_keyword(keyword, limit=PAGE_SIZE, page_token=token),
+                           "keyword", {"keyword": keyword})
 
         elif choice == '2':
+            from formatter import PAGE_SIZE
+            from mysql_connector import search_by_genre_and_years, get_all_genres, get_min_max_years
+
             while True:
                 genres_data = get_all_genres()
                 min_year, max_year = get_min_max_years()
@@ -129,40 +245,16 @@ def main() -> None:
                             print("❗ Please enter a valid number for years.")
                     break
 
-            offset = 0
-            while True:
-                movies = search_by_genre_and_years(selected_genre, year_from, year_to, offset)
-                if (movies is None or movies == []) and offset == 0:
-                    retry = input("Failed to load results. Try again? (yes/no): ").strip().lower()
-                    if retry == 'yes':
-                        continue
-                    else:
-                        break
-
-                if not movies:
-                    print("No more results found.")
-                    break
-
-                try:
-                    log_search("genre&years", {
-                        "genre": selected_genre,
-                        "year_from": year_from,
-                        "year_to": year_to
-                    }, len(movies))
-                except RuntimeError as e:
-                    print(e)
-                    print("❌ Program stopped due to logging failure.")
-                    return
-
-                print_movies(movies)
-
-                next_page = input("\nShow next 10 movies? (1 - yes, 2 - back to menu): ")
-                if next_page == '1':
-                    offset += 10
-                else:
-                    break
+            browse_results(
+                lambda token: search_by_genre_and_years(selected_genre, year_from, year_to,
+                                                        limit=PAGE_SIZE, page_token=token),
+                "genre&years",
+                {"genre": selected_genre, "year_from": year_from, "year_to": year_to}
+            )
 
         elif choice == "3":
+            from log_stats import show_statistics
+
             try:
                 show_statistics()
             except Exception as e:
@@ -175,4 +267,7 @@ def main() -> None:
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        from cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
     main()
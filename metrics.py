@@ -0,0 +1,223 @@
+import atexit
+import json
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import config
+
+# Сбор метрик включается явно: в выключенном состоянии обёртки делают одну проверку флага.
+METRICS_ENABLED: bool = getattr(config, "METRICS_ENABLED", False)
+# Файл, в который метрики выгружаются при выходе ('.json' — JSON, иначе текстовый формат Prometheus).
+METRICS_EXPORT_PATH: Optional[str] = getattr(config, "METRICS_EXPORT_PATH", None)
+# Порог медленного запроса (мс) и файл журнала медленных запросов (None — журнал не ведётся).
+SLOW_QUERY_MS: float = getattr(config, "SLOW_QUERY_MS", 200.0)
+SLOW_QUERY_LOG: Optional[str] = getattr(config, "SLOW_QUERY_LOG", None)
+
+BUCKETS_MS: Tuple[float, ...] = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float("inf"))
+
+
+class Histogram:
+    """Гистограмма задержек с фиксированными границами корзин (в миллисекундах)."""
+
+    def __init__(self, buckets: Sequence[float] = BUCKETS_MS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value_ms: float) -> None:
+        self.counts[bisect_left(self.buckets, value_ms)] += 1
+        self.count += 1
+        self.sum += value_ms
+
+    def cumulative(self) -> List[int]:
+        """Накопленные количества по корзинам, как в формате Prometheus."""
+        total, result = 0, []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+
+class MetricsRegistry:
+    """Потокобезопасное хранилище гистограмм (функция, фаза) и счётчиков (метрика, функция)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.counters: Dict[Tuple[str, str], int] = {}
+
+    def observe(self, function: str, phase: str, value_ms: float) -> None:
+        with self._lock:
+            histogram = self.histograms.get((function, phase))
+            if histogram is None:
+                histogram = self.histograms[(function, phase)] = Histogram()
+            histogram.observe(value_ms)
+
+    def inc(self, metric: str, function: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[(metric, function)] = self.counters.get((metric, function), 0) + value
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Возвращает снимок метрик в виде словаря, пригодного для JSON.
+
+        :return: {'latency_ms': {функция: {фаза: {...}}}, 'counters': {метрика: {функция: значение}}}.
+        """
+        with self._lock:
+            latency: Dict[str, Dict[str, Any]] = {}
+            for (function, phase), h in sorted(self.histograms.items()):
+                latency.setdefault(function, {})[phase] = {
+                    "count": h.count,
+                    "sum": round(h.sum, 3),
+                    "buckets": {("+Inf" if b == float("inf") else str(b)): c
+                                for b, c in zip(h.buckets, h.cumulative())},
+                }
+            counters: Dict[str, Dict[str, int]] = {}
+            for (metric, function), value in sorted(self.counters.items()):
+                counters.setdefault(metric, {})[function] = value
+            return {"latency_ms": latency, "counters": counters}
+
+    def to_prometheus(self, prefix: str = "movie_search") -> str:
+        """Формирует метрики в текстовом формате Prometheus."""
+        snapshot = self.snapshot()
+        lines = [f"# TYPE {prefix}_latency_ms histogram"]
+        for function, phases in snapshot["latency_ms"].items():
+            for phase, h in phases.items():
+                labels = f'function="{function}",phase="{phase}"'
+                for bound, count in h["buckets"].items():
+                    lines.append(f'{prefix}_latency_ms_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f"{prefix}_latency_ms_sum{{{labels}}} {h['sum']}")
+                lines.append(f"{prefix}_latency_ms_count{{{labels}}} {h['count']}")
+        for metric, values in snapshot["counters"].items():
+            lines.append(f"# TYPE {prefix}_{metric}_total counter")
+            for function, value in values.items():
+                lines.append(f'{prefix}_{metric}_total{{function="{function}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+_slow_log_lock = threading.Lock()
+
+
+def set_enabled(enabled: bool) -> None:
+    """Включает или выключает сбор метрик во время работы."""
+    global METRICS_ENABLED
+    METRICS_ENABLED = enabled
+
+
+def observe_since(function: str, phase: str, started: float) -> float:
+    """
+    Записывает в гистограмму время, прошедшее с момента started (time.perf_counter()).
+
+    :return: Прошедшее время в миллисекундах.
+    """
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    registry.observe(function, phase, elapsed_ms)
+    return elapsed_ms
+
+
+def log_slow_query(function: str, elapsed_ms: float, sql: str, params: Any) -> None:
+    """Дописывает медленный запрос (SQL и параметры) в журнал SLOW_QUERY_LOG."""
+    if not SLOW_QUERY_LOG or elapsed_ms < SLOW_QUERY_MS:
+        return
+    record = {
+        "timestamp": datetime.now().isoformat(),
+        "function": function,
+        "elapsed_ms": round(elapsed_ms, 3),
+        "sql": " ".join(sql.split()),
+        "params": params,
+    }
+    with _slow_log_lock:
+        with open(SLOW_QUERY_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+
+class TimedCursor:
+    """
+    Обёртка курсора MySQL, раздельно измеряющая выполнение запроса и чтение строк.
+
+    Используется декоратором with_mysql_connection только при включённых метриках.
+    """
+
+    def __init__(self, cursor: Any, function: str) -> None:
+        self._cursor = cursor
+        self._function = function
+
+    def execute(self, sql: str, params: Any = None) -> Any:
+        started = time.perf_counter()
+        result = self._cursor.execute(sql, params)
+        log_slow_query(self._function, observe_since(self._function, "execute", started), sql, params)
+        return result
+
+    def fetchall(self) -> Any:
+        started = time.perf_counter()
+        rows = self._cursor.fetchall()
+        observe_since(self._function, "fetch", started)
+        registry.inc("rows", self._function, len(rows))
+        return rows
+
+    def fetchone(self) -> Any:
+        started = time.perf_counter()
+        row = self._cursor.fetchone()
+        observe_since(self._function, "fetch", started)
+        registry.inc("rows", self._function, int(row is not None))
+        return row
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+
+def instrument(phase: str = "total") -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Декоратор, измеряющий время выполнения функции и число вызовов и ошибок.
+
+    :param phase: Имя фазы в гистограмме.
+    :return: Декоратор.
+    """
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        name = func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs) -> Any:
+            if not METRICS_ENABLED:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            registry.inc("calls", name)
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                registry.inc("errors", name)
+                raise
+            finally:
+                observe_since(name, phase, started)
+        return wrapper
+    return decorator
+
+
+def export_metrics(path: str) -> None:
+    """
+    Сохраняет метрики в файл: JSON-снимок для '.json', иначе текстовый формат Prometheus.
+
+    :param path: Путь к файлу.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        if path.endswith(".json"):
+            json.dump(registry.snapshot(), f, ensure_ascii=False, indent=2)
+        else:
+            f.write(registry.to_prometheus())
+
+
+@atexit.register
+def _export_on_exit() -> None:
+    if METRICS_ENABLED and METRICS_EXPORT_PATH:
+        export_metrics(METRICS_EXPORT_PATH)
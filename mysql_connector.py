@@ -1,9 +1,115 @@
+import atexit
+import base64
+import importlib
+import json
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
 import pymysql
 from pymysql.connections import Connection
 from pymysql.cursors import Cursor
-from typing import Optional, List, Dict, Callable, Any, Tuple
+from typing import Optional, List, Dict, Callable, Any, Tuple, Iterator
+
+import config
+import metrics
+import resilience
+from cache import ttl_cache
+from title_index import TrigramIndex
 from config import MYSQL_CONFIG, DEFAULT_LIMIT
 
+# Размер пула соединений (0 — открывать новое соединение на каждый вызов).
+MYSQL_POOL_SIZE: int = getattr(config, "MYSQL_POOL_SIZE", 5)
+# Сколько секунд ждать свободного соединения из пула.
+MYSQL_POOL_TIMEOUT: float = getattr(config, "MYSQL_POOL_TIMEOUT", 5.0)
+# Соединения, простаивавшие дольше этого срока (сек.), проверяются ping() перед выдачей.
+MYSQL_POOL_PING_INTERVAL: float = getattr(config, "MYSQL_POOL_PING_INTERVAL", 30.0)
+# Режим постраничного вывода: 'keyset' (продолжение после последнего film_id) или 'offset'.
+PAGINATION_MODE: str = getattr(config, "PAGINATION_MODE", "keyset")
+# Время жизни (сек.) и размер кэша справочных данных (жанры, диапазон лет).
+REFERENCE_CACHE_TTL: float = getattr(config, "REFERENCE_CACHE_TTL", 600.0)
+REFERENCE_CACHE_SIZE: int = getattr(config, "REFERENCE_CACHE_SIZE", 32)
+# Кэш страниц результатов поиска: время жизни (сек.), число страниц и предел по памяти (байт).
+SEARCH_CACHE_TTL: float = getattr(config, "SEARCH_CACHE_TTL", 300.0)
+SEARCH_CACHE_SIZE: int = getattr(config, "SEARCH_CACHE_SIZE", 512)
+SEARCH_CACHE_MAX_BYTES: int = getattr(config, "SEARCH_CACHE_MAX_BYTES", 16 * 1024 * 1024)
+# Сколько популярных запросов из лога прогревать при старте (0 — не прогревать).
+SEARCH_CACHE_WARMUP: int = getattr(config, "SEARCH_CACHE_WARMUP", 0)
+# Стратегия поиска: 'two_phase' (сначала film_id страницы, затем актёры и жанры только для неё)
+# или 'join' (один запрос с GROUP_CONCAT по всем совпавшим фильмам).
+SEARCH_STRATEGY: str = getattr(config, "SEARCH_STRATEGY", "two_phase")
+# Поиск по ключевому слову: 'like' (LIKE '%...%' в MySQL) или 'trigram' (индекс триграмм в памяти).
+KEYWORD_SEARCH_ENGINE: str = getattr(config, "KEYWORD_SEARCH_ENGINE", "like")
+# Как часто (сек.) дочитывать изменённые названия в индекс триграмм.
+TITLE_INDEX_REFRESH_INTERVAL: float = getattr(config, "TITLE_INDEX_REFRESH_INTERVAL", 60.0)
+# Откуда обслуживать поиск и справочные данные: 'mysql', 'replica' (локальная копия в SQLite)
+# или 'catalog' (столбцы NumPy в памяти).
+SEARCH_BACKEND: str = getattr(config, "SEARCH_BACKEND", "mysql")
+# Модули альтернативных источников данных; импортируются только при выборе.
+SEARCH_BACKENDS: Dict[str, str] = {'replica': 'replica', 'catalog': 'catalog'}
+
+# Ошибки, означающие недоступность сервера (их имеет смысл повторять).
+MYSQL_RETRYABLE_ERRORS = (pymysql.OperationalError, pymysql.InterfaceError)
+
+
+class PoolExhaustedError(resilience.LocalError, pymysql.MySQLError):
+    """Все соединения пула заняты: сервер при этом может быть исправен, поэтому повтора и сбоя выключателя нет."""
+
+
+FILM_COLUMNS = """
+        SELECT f.film_id, f.title, f.release_year, f.length, f.description,
+               c.name AS genre,
+               GROUP_CONCAT(CONCAT(a.first_name, ' ', a.last_name) SEPARATOR ', ') AS actors
+"""
+# Источник и фильтр поиска по ключевому слову (параметр: шаблон LIKE).
+KEYWORD_SEARCH_SOURCE = """
+        FROM film f
+        LEFT JOIN film_category fc ON f.film_id = fc.film_id
+        LEFT JOIN category c ON fc.category_id = c.category_id
+        LEFT JOIN film_actor fa ON f.film_id = fa.film_id
+        LEFT JOIN actor a ON fa.actor_id = a.actor_id
+        WHERE f.title LIKE %s
+"""
+# Источник и фильтр поиска по жанру и годам (параметры: жанр, год с, год по).
+GENRE_SEARCH_SOURCE = """
+        FROM film f
+        JOIN film_category fc ON f.film_id = fc.film_id
+        JOIN category c ON fc.category_id = c.category_id
+        LEFT JOIN film_actor fa ON f.film_id = fa.film_id
+        LEFT JOIN actor a ON fa.actor_id = a.actor_id
+        WHERE c.name = %s AND f.release_year BETWEEN %s AND %s
+"""
+ALL_GENRES_SQL = "SELECT category_id, name FROM category ORDER BY name"
+YEAR_BOUNDS_SQL = "SELECT MIN(release_year) as min_year, MAX(release_year) as max_year FROM film"
+# Первая фаза двухфазного поиска: только film_id страницы.
+KEYWORD_PAGE_IDS_SQL = """
+        SELECT f.film_id
+        FROM film f
+        WHERE f.title LIKE %s AND f.film_id > %s
+        ORDER BY f.film_id
+        LIMIT %s OFFSET %s
+"""
+GENRE_PAGE_IDS_SQL = """
+        SELECT f.film_id
+        FROM film f
+        WHERE f.release_year BETWEEN %s AND %s AND f.film_id > %s
+          AND EXISTS (SELECT 1
+                      FROM film_category fc
+                      JOIN category c ON fc.category_id = c.category_id
+                      WHERE fc.film_id = f.film_id AND c.name = %s)
+        ORDER BY f.film_id
+        LIMIT %s OFFSET %s
+"""
+# Одно-фазный поиск: JOIN и GROUP_CONCAT по всем совпадениям.
+PAGE_TAIL_SQL = """
+          AND f.film_id > %s
+        GROUP BY f.film_id
+        ORDER BY f.film_id
+        LIMIT %s OFFSET %s
+"""
+
 
 def connect_mysql() -> Optional[Connection]:
     """
@@ -17,72 +123,448 @@ def connect_mysql() -> Optional[Connection]:
             user=MYSQL_CONFIG['user'],
             password=MYSQL_CONFIG['password'],
             database=MYSQL_CONFIG['database'],
-            cursorclass=pymysql.cursors.DictCursor
+            cursorclass=pymysql.cursors.DictCursor,
+            autocommit=True
         )
     except pymysql.MySQLError as e:
         print(f"Connection error: {e}")
         return None
 
 
+class ConnectionPool:
+    """
+    Пул переиспользуемых соединений с MySQL.
+
+    Свободные соединения хранятся в стеке (последнее возвращённое выдаётся первым),
+    количество одновременно выданных соединений ограничено размером пула.
+    Перед повторной выдачей долго простаивавшее соединение проверяется через ping(),
+    который при необходимости переподключается; «мёртвые» соединения отбрасываются.
+    """
+
+    def __init__(self, size: int, timeout: float = MYSQL_POOL_TIMEOUT,
+                 ping_interval: float = MYSQL_POOL_PING_INTERVAL) -> None:
+        self.size = size
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+        self._idle: "queue.LifoQueue[Tuple[Connection, float]]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+
+    def acquire(self) -> Optional[Connection]:
+        """
+        Выдаёт соединение из пула или открывает новое.
+
+        :return: Соединение или None, если подключиться не удалось.
+        :raises PoolExhaustedError: Если за MYSQL_POOL_TIMEOUT не освободилось ни одного соединения.
+        """
+        if self._closed:
+            return None
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolExhaustedError(f"MySQL connection pool exhausted (no free connection in {self.timeout} s)")
+
+        connection = self._take_idle() or connect_mysql()
+        if connection is None:
+            self._slots.release()
+        return connection
+
+    def release(self, connection: Connection, broken: bool = False) -> None:
+        """
+        Возвращает соединение в пул.
+
+        :param connection: Ранее выданное соединение.
+        :param broken: True, если во время работы произошла ошибка — соединение будет закрыто.
+        """
+        if broken or self._closed:
+            self._discard(connection)
+        else:
+            self._idle.put((connection, time.monotonic()))
+        self._slots.release()
+
+    def close(self) -> None:
+        """Закрывает все свободные соединения; выданные закрываются при возврате."""
+        self._closed = True
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(connection)
+
+    def _take_idle(self) -> Optional[Connection]:
+        while True:
+            try:
+                connection, released_at = self._idle.get_nowait()
+            except queue.Empty:
+                return None
+            if time.monotonic() - released_at < self.ping_interval or self._is_alive(connection):
+                return connection
+            self._discard(connection)
+
+    @staticmethod
+    def _is_alive(connection: Connection) -> bool:
+        try:
+            connection.ping(reconnect=True)
+            return True
+        except (pymysql.MySQLError, OSError):
+            return False
+
+    @staticmethod
+    def _discard(connection: Connection) -> None:
+        try:
+            connection.close()
+        except (pymysql.MySQLError, OSError):
+            pass
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Возвращает общий пул соединений, создавая его при первом обращении.
+
+    :return: Экземпляр ConnectionPool размером MYSQL_POOL_SIZE.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool._closed:
+            _pool = ConnectionPool(MYSQL_POOL_SIZE)
+        return _pool
+
+
+@atexit.register
+def close_pool() -> None:
+    """Закрывает общий пул соединений (вызывается автоматически при выходе)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+@contextmanager
+def mysql_connection() -> Iterator[Optional[Connection]]:
+    """
+    Контекстный менеджер, выдающий соединение с MySQL.
+
+    При MYSQL_POOL_SIZE > 0 соединение берётся из пула и возвращается в него,
+    иначе открывается новое и закрывается по выходе из блока.
+
+    :return: Соединение или None, если подключиться не удалось.
+    :raises PoolExhaustedError: Если в пуле нет свободного соединения.
+    """
+    if MYSQL_POOL_SIZE <= 0:
+        connection = connect_mysql()
+        try:
+            yield connection
+        finally:
+            if connection:
+                connection.close()
+        return
+
+    pool = get_pool()
+    connection = pool.acquire()
+    broken = False
+    try:
+        yield connection
+    except Exception:
+        broken = True
+        raise
+    finally:
+        if connection:
+            pool.release(connection, broken=broken)
+
+
 def with_mysql_connection(func: Callable[..., Any]) -> Callable[..., Any]:
     """
     Декоратор для функций, работающих с MySQL.
-    Управляет подключением к базе данных и созданием курсора.
+    Берёт соединение из пула (см. mysql_connection) и создаёт курсор.
+
+    Обращение выполняется через resilience.call: при сбое соединения оно повторяется
+    с нарастающей задержкой, а пока выключатель MySQL разомкнут, возвращается последний
+    успешный результат того же вызова (или пустой список).
+
+    При включённых метриках (metrics.METRICS_ENABLED) раздельно измеряются получение
+    соединения, выполнение запросов и чтение строк, считаются вызовы, строки и ошибки.
 
     :param func: Целевая функция, получающая курсор как первый аргумент.
     :return: Обёрнутая функция с автоматическим управлением соединением.
     """
+    name = func.__name__
+
+    @wraps(func)
     def wrapper(*args, **kwargs) -> Any:
-        connection = connect_mysql()
-        if not connection:
-            return []
+        timed = metrics.METRICS_ENABLED
+        if timed:
+            # Вызов считается один раз, сколько бы попыток ни сделал resilience.call.
+            metrics.registry.inc("calls", name)
 
-        try:
-            with connection:
+        def attempt() -> Any:
+            started = time.perf_counter()
+            with mysql_connection() as connection:
+                if timed:
+                    metrics.observe_since(name, "connect", started)
+                if not connection:
+                    raise pymysql.OperationalError("Unable to connect to MySQL")
                 with connection.cursor() as cursor:
+                    if timed:
+                        cursor = metrics.TimedCursor(cursor, name)
                     return func(cursor, *args, **kwargs)
-        except pymysql.MySQLError as e:
-            print(f"MySQL error in {func.__name__}: {e}")
+
+        try:
+            return resilience.call("mysql", attempt, name, MYSQL_RETRYABLE_ERRORS, args, kwargs)
+        except (pymysql.MySQLError, resilience.CircuitOpenError) as e:
+            if timed:
+                metrics.registry.inc("errors", name)
+            print(f"MySQL error in {name}: {e}")
             return []
 
     return wrapper
 
 
+def encode_page_token(state: Dict[str, int]) -> str:
+    """
+    Кодирует состояние постраничного вывода в непрозрачный токен.
+
+    :param state: {'k': последний film_id} или {'o': смещение}.
+    :return: Токен в base64url.
+    """
+    raw = json.dumps(state, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_page_token(page_token: str) -> Tuple[int, int]:
+    """
+    Разбирает токен продолжения.
+
+    :param page_token: Токен, полученный из next_page_token().
+    :return: Кортеж (последний показанный film_id, смещение).
+    :raises ValueError: Если токен повреждён.
+    """
+    try:
+        padded = page_token + '=' * (-len(page_token) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded))
+        return int(state.get('k', 0)), int(state.get('o', 0))
+    except (ValueError, TypeError, AttributeError) as e:
+        raise ValueError(f"Invalid page token: {page_token!r}") from e
+
+
+def next_page_token(movies: List[Dict[str, Any]], page_token: Optional[str] = None) -> Optional[str]:
+    """
+    Формирует непрозрачный токен для запроса следующей страницы.
+
+    В режиме 'keyset' токен хранит film_id последнего фильма страницы, и следующая
+    страница начинается сразу после него (без сканирования пропущенных строк).
+    В режиме 'offset' токен хранит накопленное смещение.
+
+    :param movies: Текущая страница результатов.
+    :param page_token: Токен, по которому была получена текущая страница (None для первой).
+    :return: Токен следующей страницы или None, если страница пуста.
+    """
+    if not movies:
+        return None
+    if PAGINATION_MODE == 'offset':
+        _, offset = decode_page_token(page_token) if page_token else (0, 0)
+        return encode_page_token({'o': offset + len(movies)})
+    return encode_page_token({'k': movies[-1]['film_id']})
+
+
+_title_index = TrigramIndex()
+# _title_index_lock охраняет сам индекс (изменение и поиск), _title_index_refresh_lock —
+# обновление целиком, включая запросы к MySQL, которые идут без блокировки поиска.
+_title_index_lock = threading.Lock()
+_title_index_refresh_lock = threading.Lock()
+_title_index_checked = 0.0
+_title_index_refreshing = False
+
+
+def _refresh_title_index(cursor: Cursor) -> None:
+    """
+    Строит индекс триграмм при первом вызове, затем дочитывает изменённые названия
+    и убирает удалённые фильмы.
+
+    Отметка last_update сдвигается только до секунд, которые уже прошли по часам MySQL:
+    строки текущей секунды перечитываются в следующий раз, а строки прошедших секунд —
+    больше никогда (выборка по last_update > отметки). Поэтому неизменённые названия
+    повторно не читаются, даже если у всех фильмов один last_update, как в Sakila.
+    Удаления по last_update не видны: если фильмов в индексе больше, чем в таблице,
+    сверяются списки film_id.
+
+    :param cursor: Курсор базы данных.
+    """
+    global _title_index_checked
+    with _title_index_refresh_lock:
+        cursor.execute("SELECT CURRENT_TIMESTAMP AS now")
+        now = cursor.fetchone()['now']
+        watermark = _title_index.last_update
+        if watermark is None:
+            cursor.execute("SELECT film_id, title, last_update FROM film")
+        else:
+            cursor.execute("SELECT film_id, title, last_update FROM film WHERE last_update > %s", (watermark,))
+        rows = cursor.fetchall()
+        cursor.execute("SELECT COUNT(*) AS films FROM film")
+        films = cursor.fetchone()['films']
+        with _title_index_lock:
+            _title_index.update((row['film_id'], row['title']) for row in rows)
+            passed = [row['last_update'] for row in rows if row['last_update'] < now]
+            if passed:
+                _title_index.last_update = max(passed)
+            stale = len(_title_index) > films
+        if stale:
+            cursor.execute("SELECT film_id FROM film")
+            present = {row['film_id'] for row in cursor.fetchall()}
+            with _title_index_lock:
+                for film_id in _title_index.ids() - present:
+                    _title_index.remove(film_id)
+        _title_index_checked = time.monotonic()
+
+
 @with_mysql_connection
-def search_by_keyword(cursor: Cursor, keyword: str, offset: int = 0, limit: int = DEFAULT_LIMIT) -> List[Dict]:
+def warm_title_index(cursor: Cursor) -> int:
     """
-    Выполняет поиск фильмов по ключевому слову.
+    Строит (или обновляет) индекс триграмм вне поиска: при запуске и в фоновом потоке.
+
+    Индекс строится только при KEYWORD_SEARCH_ENGINE = 'trigram' и поиске в MySQL.
 
     :param cursor: Курсор базы данных (автоматически передаётся декоратором).
-    :param keyword: Ключевое слово для поиска в названии фильма.
-    :param offset: Смещение для постраничного вывода.
-    :param limit: Количество фильмов для вывода(константа в config).
-    :return: Список фильмов, удовлетворяющих критерию.
+    :return: Количество названий в индексе.
     """
-    cursor.execute("""
-        SELECT f.title, f.release_year, f.length, f.description,
-               c.name AS genre,
-               GROUP_CONCAT(CONCAT(a.first_name, ' ', a.last_name) SEPARATOR ', ') AS actors
+    if KEYWORD_SEARCH_ENGINE != 'trigram' or SEARCH_BACKEND != 'mysql':
+        return 0
+    _refresh_title_index(cursor)
+    return len(_title_index)
+
+
+def _refresh_title_index_in_background() -> None:
+    global _title_index_refreshing
+    try:
+        warm_title_index()
+    finally:
+        _title_index_refreshing = False
+
+
+def _search_title_index(cursor: Cursor, keyword: str, after_id: int, offset: int, limit: int) -> List[int]:
+    """
+    Ищет film_id по индексу триграмм.
+
+    Индекс строится при первом поиске (если его не построили при запуске — тогда поиск
+    дожидается построения), а по истечении TITLE_INDEX_REFRESH_INTERVAL обновляется
+    в фоновом потоке: поиск тем временем идёт по прежнему индексу.
+    """
+    global _title_index_refreshing
+    if not _title_index_checked:
+        _refresh_title_index(cursor)
+    elif (not _title_index_refreshing
+          and time.monotonic() - _title_index_checked >= TITLE_INDEX_REFRESH_INTERVAL):
+        _title_index_refreshing = True
+        threading.Thread(target=_refresh_title_index_in_background, name="title-index-refresh",
+                         daemon=True).start()
+    with _title_index_lock:
+        return _title_index.search(keyword, after_id, offset, limit)
+
+
+def films_by_ids_query(film_ids: List[int], genre: Optional[str] = None) -> Tuple[str, Tuple]:
+    """
+    Строит запрос загрузки полных данных фильмов (жанр, актёры) по идентификаторам.
+
+    :param film_ids: Идентификаторы фильмов (непустой список).
+    :param genre: Если задан, в поле genre попадает именно этот жанр фильма.
+    :return: Кортеж (SQL, параметры).
+    """
+    placeholders = ', '.join(['%s'] * len(film_ids))
+    genre_filter = "AND c.name = %s" if genre is not None else ""
+    sql = FILM_COLUMNS + f"""
         FROM film f
         LEFT JOIN film_category fc ON f.film_id = fc.film_id
         LEFT JOIN category c ON fc.category_id = c.category_id
         LEFT JOIN film_actor fa ON f.film_id = fa.film_id
         LEFT JOIN actor a ON fa.actor_id = a.actor_id
-        WHERE f.title LIKE %s
+        WHERE f.film_id IN ({placeholders}) {genre_filter}
         GROUP BY f.film_id
-        LIMIT %s OFFSET %s
-    """, (f'%{keyword}%', limit, offset))
+    """
+    return sql, (*film_ids, genre) if genre is not None else tuple(film_ids)
+
+
+def order_by_ids(rows: List[Dict], film_ids: List[int]) -> List[Dict]:
+    """Упорядочивает строки фильмов в порядке film_ids, пропуская отсутствующие."""
+    by_id = {row['film_id']: row for row in rows}
+    return [by_id[film_id] for film_id in film_ids if film_id in by_id]
+
+
+def _fetch_films_by_ids(cursor: Cursor, film_ids: List[int], genre: Optional[str] = None) -> List[Dict]:
+    """
+    Загружает полные данные фильмов (жанр, актёры) по списку идентификаторов.
+
+    :param cursor: Курсор базы данных.
+    :param film_ids: Идентификаторы фильмов.
+    :param genre: Если задан, в поле genre попадает именно этот жанр фильма.
+    :return: Фильмы в порядке film_ids.
+    """
+    if not film_ids:
+        return []
+    cursor.execute(*films_by_ids_query(film_ids, genre))
+    return order_by_ids(cursor.fetchall(), film_ids)
+
+
+def _keyword_page_key(keyword: str, offset: int = 0, limit: int = DEFAULT_LIMIT,
+                      page_token: Optional[str] = None) -> Tuple:
+    # LIKE сравнивает без учёта регистра, но пробелы значимы: их в ключе не убирать.
+    return 'keyword', keyword.lower(), offset, limit, page_token
+
+
+def _genre_page_key(genre: str, year_from: int, year_to: int, offset: int = 0, limit: int = DEFAULT_LIMIT,
+                    page_token: Optional[str] = None) -> Tuple:
+    return 'genre&years', genre, int(year_from), int(year_to), offset, limit, page_token
+
+
+@with_mysql_connection
+def _mysql_search_by_keyword(
+    cursor: Cursor,
+    keyword: str,
+    offset: int = 0,
+    limit: int = DEFAULT_LIMIT,
+    page_token: Optional[str] = None
+) -> List[Dict]:
+    """
+    Выполняет поиск фильмов по ключевому слову.
+
+    Результаты упорядочены по film_id, поэтому страницы стабильны. При
+    KEYWORD_SEARCH_ENGINE = 'trigram' подходящие фильмы ищутся в индексе названий,
+    при SEARCH_STRATEGY = 'two_phase' — отдельным запросом к таблице film; в обоих
+    случаях актёры и жанр загружаются только для фильмов текущей страницы.
+
+    :param cursor: Курсор базы данных (автоматически передаётся декоратором).
+    :param keyword: Ключевое слово для поиска в названии фильма.
+    :param offset: Смещение для постраничного вывода (если page_token не задан).
+    :param limit: Количество фильмов для вывода(константа в config).
+    :param page_token: Токен продолжения из next_page_token().
+    :return: Список фильмов, удовлетворяющих критерию.
+    """
+    after_id, offset = decode_page_token(page_token) if page_token else (0, offset)
+    # Символы LIKE ('%', '_' и экранирующий '\\') индекс не поддерживает — такие запросы идут в MySQL.
+    if KEYWORD_SEARCH_ENGINE == 'trigram' and not any(ch in keyword for ch in '%_\\'):
+        film_ids = _search_title_index(cursor, keyword, after_id, offset, limit)
+        return _fetch_films_by_ids(cursor, film_ids)
+
+    if SEARCH_STRATEGY == 'two_phase':
+        cursor.execute(KEYWORD_PAGE_IDS_SQL, (f'%{keyword}%', after_id, limit, offset))
+        return _fetch_films_by_ids(cursor, [row['film_id'] for row in cursor.fetchall()])
+
+    cursor.execute(FILM_COLUMNS + KEYWORD_SEARCH_SOURCE + PAGE_TAIL_SQL,
+                   (f'%{keyword}%', after_id, limit, offset))
     return cursor.fetchall()
 
 
 @with_mysql_connection
-def search_by_genre_and_years(
+def _mysql_search_by_genre_and_years(
     cursor: Cursor,
     genre: str,
     year_from: int,
     year_to: int,
     offset: int = 0,
-    limit: int = DEFAULT_LIMIT
+    limit: int = DEFAULT_LIMIT,
+    page_token: Optional[str] = None
 ) -> List[Dict]:
     """
     Ищет фильмы по жанру и диапазону лет.
@@ -91,46 +573,186 @@ def search_by_genre_and_years(
     :param genre: Название жанра.
     :param year_from: Начальный год диапазона.
     :param year_to: Конечный год диапазона.
-    :param offset: Смещение (для постраничного вывода).
+    :param offset: Смещение (для постраничного вывода, если page_token не задан).
     :param limit: Лимит количества фильмов на страницу(константа в config).
+    :param page_token: Токен продолжения из next_page_token().
     :return: Список фильмов по жанру и диапазону лет.
     """
-    cursor.execute("""
-        SELECT f.title, f.release_year, f.length, f.description,
-               c.name AS genre,
-               GROUP_CONCAT(CONCAT(a.first_name, ' ', a.last_name) SEPARATOR ', ') AS actors
-        FROM film f
-        JOIN film_category fc ON f.film_id = fc.film_id
-        JOIN category c ON fc.category_id = c.category_id
-        LEFT JOIN film_actor fa ON f.film_id = fa.film_id
-        LEFT JOIN actor a ON fa.actor_id = a.actor_id
-        WHERE c.name = %s AND f.release_year BETWEEN %s AND %s
-        GROUP BY f.film_id
-        LIMIT %s OFFSET %s
-    """, (genre, year_from, year_to, limit, offset))
+    after_id, offset = decode_page_token(page_token) if page_token else (0, offset)
+    if SEARCH_STRATEGY == 'two_phase':
+        cursor.execute(GENRE_PAGE_IDS_SQL, (year_from, year_to, after_id, genre, limit, offset))
+        return _fetch_films_by_ids(cursor, [row['film_id'] for row in cursor.fetchall()], genre)
+
+    cursor.execute(FILM_COLUMNS + GENRE_SEARCH_SOURCE + PAGE_TAIL_SQL,
+                   (genre, year_from, year_to, after_id, limit, offset))
     return cursor.fetchall()
 
 
+def _stream_films(source: str, params: Tuple) -> Iterator[Dict[str, Any]]:
+    """
+    Построчно выдаёт все фильмы выборки через небуферизованный курсор (SSDictCursor).
+
+    Строки читаются с сервера по мере потребления, поэтому память не зависит от
+    размера результата. Соединение занято, пока генератор не будет исчерпан или закрыт.
+
+    :param source: KEYWORD_SEARCH_SOURCE или GENRE_SEARCH_SOURCE.
+    :param params: Параметры фильтра.
+    :return: Генератор словарей того же вида, что и у функций поиска.
+    :raises pymysql.MySQLError: При ошибке запроса.
+    """
+    with mysql_connection() as connection:
+        if not connection:
+            raise pymysql.OperationalError("Unable to connect to MySQL")
+        with connection.cursor(pymysql.cursors.SSDictCursor) as cursor:
+            cursor.execute(FILM_COLUMNS + source + """
+                GROUP BY f.film_id
+                ORDER BY f.film_id
+            """, params)
+            yield from cursor
+
+
+def iter_search_by_keyword(keyword: str) -> Iterator[Dict[str, Any]]:
+    """
+    Потоково выдаёт все фильмы, найденные по ключевому слову (без постраничного вывода).
+
+    :param keyword: Ключевое слово для поиска в названии фильма.
+    :return: Генератор фильмов в порядке film_id.
+    """
+    return _stream_films(KEYWORD_SEARCH_SOURCE, (f'%{keyword}%',))
+
+
+def iter_search_by_genre_and_years(genre: str, year_from: int, year_to: int) -> Iterator[Dict[str, Any]]:
+    """
+    Потоково выдаёт все фильмы жанра в диапазоне лет (без постраничного вывода).
+
+    :param genre: Название жанра.
+    :param year_from: Начальный год диапазона.
+    :param year_to: Конечный год диапазона.
+    :return: Генератор фильмов в порядке film_id.
+    """
+    return _stream_films(GENRE_SEARCH_SOURCE, (genre, year_from, year_to))
+
+
 @with_mysql_connection
-def get_all_genres(cursor: Cursor) -> List[Dict[str, Any]]:
+def _mysql_get_all_genres(cursor: Cursor) -> List[Dict[str, Any]]:
     """
     Возвращает список всех жанров с номерами(ID).
 
     :param cursor: Курсор базы данных.
     :return: Список словарей с полями category_id и name.
     """
-    cursor.execute("SELECT category_id, name FROM category ORDER BY name")
+    cursor.execute(ALL_GENRES_SQL)
     return cursor.fetchall()
 
 
 @with_mysql_connection
-def get_min_max_years(cursor: Cursor) -> Tuple[Optional[int], Optional[int]]:
+def _mysql_get_min_max_years(cursor: Cursor) -> Tuple[Optional[int], Optional[int]]:
     """
     Определяет минимальный и максимальный год выпуска фильмов.
 
     :param cursor: Курсор базы данных.
     :return: Кортеж из минимального и максимального года.
     """
-    cursor.execute("SELECT MIN(release_year) as min_year, MAX(release_year) as max_year FROM film")
+    cursor.execute(YEAR_BOUNDS_SQL)
     years = cursor.fetchone()
     return years['min_year'], years['max_year']
+
+
+def _search_backend() -> Any:
+    """Возвращает модуль выбранного источника данных или None для MySQL."""
+    if SEARCH_BACKEND == 'mysql':
+        return None
+    return importlib.import_module(SEARCH_BACKENDS[SEARCH_BACKEND])
+
+
+@ttl_cache(ttl=SEARCH_CACHE_TTL, maxsize=SEARCH_CACHE_SIZE, max_bytes=SEARCH_CACHE_MAX_BYTES,
+           key=_keyword_page_key)
+def search_by_keyword(keyword: str, offset: int = 0, limit: int = DEFAULT_LIMIT,
+                      page_token: Optional[str] = None) -> List[Dict]:
+    """
+    Выполняет поиск фильмов по ключевому слову в источнике SEARCH_BACKEND.
+
+    :param keyword: Ключевое слово для поиска в названии фильма.
+    :param offset: Смещение для постраничного вывода (если page_token не задан).
+    :param limit: Количество фильмов для вывода(константа в config).
+    :param page_token: Токен продолжения из next_page_token().
+    :return: Список фильмов, удовлетворяющих критерию.
+    """
+    backend = _search_backend()
+    if backend is not None:
+        return backend.search_by_keyword(keyword, offset, limit, page_token)
+    return _mysql_search_by_keyword(keyword, offset, limit, page_token)
+
+
+@ttl_cache(ttl=SEARCH_CACHE_TTL, maxsize=SEARCH_CACHE_SIZE, max_bytes=SEARCH_CACHE_MAX_BYTES,
+           key=_genre_page_key)
+def search_by_genre_and_years(genre: str, year_from: int, year_to: int, offset: int = 0,
+                              limit: int = DEFAULT_LIMIT, page_token: Optional[str] = None) -> List[Dict]:
+    """
+    Ищет фильмы по жанру и диапазону лет в источнике SEARCH_BACKEND.
+
+    :param genre: Название жанра.
+    :param year_from: Начальный год диапазона.
+    :param year_to: Конечный год диапазона.
+    :param offset: Смещение (для постраничного вывода, если page_token не задан).
+    :param limit: Лимит количества фильмов на страницу(константа в config).
+    :param page_token: Токен продолжения из next_page_token().
+    :return: Список фильмов по жанру и диапазону лет.
+    """
+    backend = _search_backend()
+    if backend is not None:
+        return backend.search_by_genre_and_years(genre, year_from, year_to, offset, limit, page_token)
+    return _mysql_search_by_genre_and_years(genre, year_from, year_to, offset, limit, page_token)
+
+
+@ttl_cache(ttl=REFERENCE_CACHE_TTL, maxsize=REFERENCE_CACHE_SIZE)
+def get_all_genres() -> List[Dict[str, Any]]:
+    """
+    Возвращает список всех жанров с номерами(ID).
+
+    :return: Список словарей с полями category_id и name.
+    """
+    backend = _search_backend()
+    return backend.get_all_genres() if backend is not None else _mysql_get_all_genres()
+
+
+@ttl_cache(ttl=REFERENCE_CACHE_TTL, maxsize=REFERENCE_CACHE_SIZE)
+def get_min_max_years() -> Tuple[Optional[int], Optional[int]]:
+    """
+    Определяет минимальный и максимальный год выпуска фильмов.
+
+    :return: Кортеж из минимального и максимального года; (None, None), если база недоступна.
+    """
+    backend = _search_backend()
+    if backend is not None:
+        return backend.get_min_max_years()
+    # with_mysql_connection возвращает [] при ошибке — приводим к форме, которую ждут вызывающие.
+    return _mysql_get_min_max_years() or (None, None)
+
+
+def invalidate_reference_cache() -> None:
+    """Сбрасывает кэш справочных данных (после изменения таблиц category или film)."""
+    get_all_genres.cache_clear()
+    get_min_max_years.cache_clear()
+
+
+def warm_search_cache(popular_requests: List[Dict[str, Any]], limit: int = DEFAULT_LIMIT) -> int:
+    """
+    Прогревает кэш первыми страницами популярных запросов.
+
+    :param popular_requests: Записи из log_stats.get_popular_requests() (поля _id и search_type).
+    :param limit: Размер страницы, с которым их будут запрашивать.
+    :return: Количество загруженных страниц.
+    """
+    warmed = 0
+    for request in popular_requests:
+        params = request.get('_id') or {}
+        if request.get('search_type') == 'keyword' and params.get('keyword'):
+            movies = search_by_keyword(params['keyword'], limit=limit)
+        elif request.get('search_type') == 'genre&years' and params.get('genre'):
+            movies = search_by_genre_and_years(params['genre'], params['year_from'], params['year_to'],
+                                               limit=limit)
+        else:
+            continue
+        warmed += bool(movies)
+    return warmed
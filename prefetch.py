@@ -0,0 +1,116 @@
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import config
+from mysql_connector import next_page_token
+
+# Сколько следующих страниц загружать заранее, пока пользователь читает текущую (0 — не загружать).
+PREFETCH_DEPTH: int = getattr(config, "PREFETCH_DEPTH", 1)
+
+Page = Tuple[Optional[str], List[Dict]]
+
+_stats = {"hits": 0, "misses": 0, "wasted": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name: str, value: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] += value
+
+
+def _count_if_wasted(future: "Future[Page]") -> None:
+    if not future.cancelled() and future.exception() is None and future.result()[1]:
+        _count("wasted")
+
+
+def prefetch_stats() -> Dict[str, int]:
+    """
+    Возвращает счётчики упреждающей загрузки по всем сеансам просмотра.
+
+    :return: hits — страница уже была загружена заранее; misses — пришлось ждать запроса;
+             wasted — загруженные заранее страницы, которые так и не понадобились.
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+
+class PagePrefetcher:
+    """
+    Упреждающая загрузка страниц результатов в фоновом потоке.
+
+    После выдачи страницы N в фоне запрашиваются страницы N+1 … N+depth. Страницы
+    грузятся последовательно одним потоком: токен каждой следующей страницы
+    вычисляется по предыдущей.
+    """
+
+    def __init__(self, fetch_page: Callable[[Optional[str]], List[Dict]], depth: int = PREFETCH_DEPTH) -> None:
+        """
+        :param fetch_page: Функция загрузки страницы по токену продолжения (None — первая страница).
+        :param depth: Глубина упреждения.
+        """
+        self._fetch_page = fetch_page
+        self.depth = depth
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+        self._ahead: Deque["Future[Page]"] = deque()
+
+    def get(self, page_token: Optional[str]) -> List[Dict]:
+        """
+        Возвращает страницу по токену — из упреждающей загрузки, если она уже запрошена.
+
+        Пустая страница из упреждения не выдаётся: пустой ответ может означать сбой
+        базы, поэтому такая страница запрашивается заново (например, при повторной попытке).
+
+        :param page_token: Токен продолжения (None — первая страница).
+        :return: Страница фильмов.
+        """
+        movies = None
+        if self._ahead:
+            token, prefetched = self._ahead[0].result()
+            if token == page_token and prefetched:
+                self._ahead.popleft()
+                movies = prefetched
+                _count("hits")
+            else:
+                self.cancel()
+        if movies is None:
+            _count("misses")
+            movies = self._fetch_page(page_token)
+        self._top_up((page_token, movies))
+        return movies
+
+    def cancel(self) -> None:
+        """
+        Отменяет ещё не начатые загрузки, не дожидаясь выполняющейся.
+
+        Уже загруженные (или догружающиеся) непустые страницы учитываются как лишние.
+        """
+        while self._ahead:
+            future = self._ahead.pop()
+            if not future.cancel():
+                future.add_done_callback(_count_if_wasted)
+
+    def close(self) -> None:
+        """Отменяет упреждение и останавливает фоновый поток (при возврате в меню)."""
+        self.cancel()
+        self._executor.shutdown(wait=False)
+
+    def _top_up(self, current: Page) -> None:
+        previous: Optional["Future[Page]"] = self._ahead[-1] if self._ahead else None
+        if previous is None:
+            if not current[1]:
+                # После пустой страницы загружать нечего.
+                return
+            previous = Future()
+            previous.set_result(current)
+        while len(self._ahead) < self.depth:
+            previous = self._executor.submit(self._fetch_after, previous)
+            self._ahead.append(previous)
+
+    def _fetch_after(self, previous: "Future[Page]") -> Page:
+        token, movies = previous.result()
+        if not movies:
+            return None, []
+        next_token = next_page_token(movies, token)
+        return next_token, self._fetch_page(next_token)
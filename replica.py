@@ -0,0 +1,398 @@
+"""
+Локальная копия каталога фильмов в SQLite.
+
+Таблицы film, category, film_category, actor и film_actor переносятся из MySQL
+в файл REPLICA_PATH и затем дочитываются по last_update. При SEARCH_BACKEND = 'replica'
+поиск и справочные данные обслуживаются из этой копии без обращения к серверу, а
+если MySQL недоступен — копия продолжает работать с последними загруженными данными.
+
+Запуск:
+    python replica.py sync [--full]
+    python replica.py check [ключевое слово ...]
+"""
+import argparse
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import pymysql
+
+import config
+import mysql_connector as mc
+from config import DEFAULT_LIMIT
+
+# Путь к файлу локальной копии.
+REPLICA_PATH: str = getattr(config, "REPLICA_PATH", "sakila_replica.sqlite3")
+# Как часто (сек.) дочитывать изменения из MySQL; 0 — только вручную (python replica.py sync).
+REPLICA_REFRESH_INTERVAL: float = getattr(config, "REPLICA_REFRESH_INTERVAL", 300.0)
+# Сколько строк переносить за одну вставку при синхронизации.
+REPLICA_BATCH_SIZE = 5000
+
+# Копируемые таблицы и их столбцы (в порядке, не нарушающем связи).
+TABLES: Dict[str, Tuple[str, ...]] = {
+    'category': ('category_id', 'name', 'last_update'),
+    'actor': ('actor_id', 'first_name', 'last_name', 'last_update'),
+    'film': ('film_id', 'title', 'description', 'release_year', 'length', 'last_update'),
+    'film_category': ('film_id', 'category_id', 'last_update'),
+    'film_actor': ('actor_id', 'film_id', 'last_update'),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS category (category_id INTEGER PRIMARY KEY, name TEXT NOT NULL,
+                                     last_update TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS actor (actor_id INTEGER PRIMARY KEY, first_name TEXT NOT NULL,
+                                  last_name TEXT NOT NULL, last_update TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS film (film_id INTEGER PRIMARY KEY, title TEXT NOT NULL, description TEXT,
+                                 release_year INTEGER, length INTEGER, last_update TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS film_category (film_id INTEGER NOT NULL, category_id INTEGER NOT NULL,
+                                          last_update TEXT NOT NULL, PRIMARY KEY (film_id, category_id));
+CREATE TABLE IF NOT EXISTS film_actor (actor_id INTEGER NOT NULL, film_id INTEGER NOT NULL,
+                                       last_update TEXT NOT NULL, PRIMARY KEY (actor_id, film_id));
+CREATE TABLE IF NOT EXISTS replica_meta (table_name TEXT PRIMARY KEY, watermark TEXT NOT NULL,
+                                         synced_at TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS idx_film_title ON film (title);
+CREATE INDEX IF NOT EXISTS idx_film_release_year ON film (release_year, film_id);
+CREATE INDEX IF NOT EXISTS idx_category_name ON category (name);
+CREATE INDEX IF NOT EXISTS idx_film_category_category ON film_category (category_id, film_id);
+CREATE INDEX IF NOT EXISTS idx_film_actor_film ON film_actor (film_id);
+"""
+
+FILM_COLUMNS = """
+        SELECT f.film_id, f.title, f.release_year, f.length, f.description,
+               c.name AS genre,
+               GROUP_CONCAT(a.first_name || ' ' || a.last_name, ', ') AS actors
+"""
+# Страница film_id выбирается подзапросом, актёры и жанр собираются только для неё;
+# CROSS JOIN фиксирует порядок соединения, иначе SQLite сканирует всю таблицу film ради GROUP BY.
+KEYWORD_PAGE_SQL = FILM_COLUMNS + """
+        FROM (SELECT film_id FROM film
+              WHERE title LIKE ? ESCAPE '\\' AND film_id > ?
+              ORDER BY film_id LIMIT ? OFFSET ?) p
+        CROSS JOIN film f ON f.film_id = p.film_id
+        LEFT JOIN film_category fc ON f.film_id = fc.film_id
+        LEFT JOIN category c ON fc.category_id = c.category_id
+        LEFT JOIN film_actor fa ON f.film_id = fa.film_id
+        LEFT JOIN actor a ON fa.actor_id = a.actor_id
+        GROUP BY f.film_id
+        ORDER BY f.film_id
+"""
+GENRE_PAGE_SQL = FILM_COLUMNS + """
+        FROM (SELECT f.film_id FROM film f
+              WHERE f.release_year BETWEEN ? AND ? AND f.film_id > ?
+                AND EXISTS (SELECT 1
+                            FROM film_category fc
+                            JOIN category c ON fc.category_id = c.category_id
+                            WHERE fc.film_id = f.film_id AND c.name = ?)
+              ORDER BY f.film_id LIMIT ? OFFSET ?) p
+        CROSS JOIN film f ON f.film_id = p.film_id
+        JOIN film_category fc ON f.film_id = fc.film_id
+        JOIN category c ON fc.category_id = c.category_id AND c.name = ?
+        LEFT JOIN film_actor fa ON f.film_id = fa.film_id
+        LEFT JOIN actor a ON fa.actor_id = a.actor_id
+        GROUP BY f.film_id
+        ORDER BY f.film_id
+"""
+
+_local = threading.local()
+_sync_lock = threading.Lock()
+_last_sync = 0.0
+
+
+def _dict_row(cursor: sqlite3.Cursor, row: Tuple) -> Dict[str, Any]:
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+def open_replica(path: Optional[str] = None) -> sqlite3.Connection:
+    """
+    Открывает файл копии, создавая схему при необходимости.
+
+    :param path: Путь к файлу (по умолчанию REPLICA_PATH).
+    :return: Соединение SQLite, возвращающее строки в виде словарей.
+    """
+    connection = sqlite3.connect(path or REPLICA_PATH, check_same_thread=False)
+    connection.row_factory = _dict_row
+    # WAL позволяет читать копию, пока фоновый поток записывает изменения.
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def _connection() -> sqlite3.Connection:
+    """Возвращает соединение с копией для текущего потока."""
+    connection = getattr(_local, 'connection', None)
+    if connection is None or getattr(_local, 'path', None) != REPLICA_PATH:
+        connection = _local.connection = open_replica()
+        _local.path = REPLICA_PATH
+    return connection
+
+
+def _stamp(value: Any) -> Any:
+    """Приводит last_update к строке 'YYYY-MM-DD HH:MM:SS', в которой его хранит копия."""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return value
+
+
+def watermarks(connection: sqlite3.Connection) -> Dict[str, str]:
+    """
+    Возвращает последние перенесённые значения last_update по таблицам.
+
+    :param connection: Соединение с копией.
+    :return: Словарь {таблица: last_update}; пустой, если копия ещё не заполнялась.
+    """
+    rows = connection.execute("SELECT table_name, watermark FROM replica_meta").fetchall()
+    return {row['table_name']: row['watermark'] for row in rows}
+
+
+def _copy_table(source: Any, target: sqlite3.Connection, table: str, watermark: Optional[str], now: str) -> int:
+    """
+    Переносит строки таблицы, изменённые позже watermark (все — если он не задан).
+
+    Отметка сдвигается только до секунд, которые к началу синхронизации уже прошли
+    по часам MySQL. Строки текущей секунды переносятся и в следующий раз (в неё их
+    ещё могут изменить; INSERT OR REPLACE делает повтор безопасным), а строки прошедших
+    секунд повторно не читаются — даже если у всех строк один last_update, как в Sakila.
+
+    :param source: Соединение с MySQL.
+    :param target: Соединение с копией (внутри открытой транзакции).
+    :param table: Имя таблицы из TABLES.
+    :param watermark: Последнее перенесённое значение last_update из прошедших секунд.
+    :param now: Время MySQL на начало синхронизации ('YYYY-MM-DD HH:MM:SS').
+    :return: Количество перенесённых строк.
+    """
+    columns = TABLES[table]
+    select = f"SELECT {', '.join(columns)} FROM {table}"
+    insert = (f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) "
+              f"VALUES ({', '.join('?' * len(columns))})")
+    copied = 0
+    latest = watermark
+    with source.cursor(pymysql.cursors.SSDictCursor) as cursor:
+        if watermark is None:
+            cursor.execute(select)
+        else:
+            cursor.execute(select + " WHERE last_update > %s", (watermark,))
+        batch = []
+        for row in cursor:
+            values = tuple(_stamp(row[column]) for column in columns)
+            batch.append(values)
+            if values[-1] < now and (latest is None or values[-1] > latest):
+                latest = values[-1]
+            if len(batch) >= REPLICA_BATCH_SIZE:
+                target.executemany(insert, batch)
+                copied += len(batch)
+                batch = []
+        target.executemany(insert, batch)
+        copied += len(batch)
+    if latest is not None:
+        target.execute("INSERT OR REPLACE INTO replica_meta VALUES (?, ?, ?)",
+                       (table, latest, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+    return copied
+
+
+def _server_time(source: Any) -> str:
+    with source.cursor() as cursor:
+        cursor.execute("SELECT CURRENT_TIMESTAMP AS now")
+        return _stamp(cursor.fetchone()['now'])
+
+
+def sync_replica(full: bool = False, path: Optional[str] = None) -> Optional[Dict[str, int]]:
+    """
+    Загружает в копию изменения из MySQL.
+
+    Первый запуск (или full=True) переносит таблицы целиком, последующие — только
+    строки с last_update позже сохранённой отметки (см. _copy_table). Удаления по last_update не
+    видны: их подхватывает полная синхронизация (её нужность покажет check_consistency).
+    Все таблицы обновляются в одной транзакции, так что читатели не видят
+    частично перенесённых данных.
+
+    :param full: Очистить копию и перенести все данные заново.
+    :param path: Путь к файлу копии (по умолчанию REPLICA_PATH).
+    :return: Количество перенесённых строк по таблицам или None, если MySQL недоступен.
+    """
+    global _last_sync
+    with _sync_lock:
+        target = open_replica(path)
+        try:
+            with mc.mysql_connection() as source:
+                if not source:
+                    return None
+                marks = {} if full else watermarks(target)
+                now = _server_time(source)
+                with target:
+                    if full:
+                        for table in (*TABLES, 'replica_meta'):
+                            target.execute(f"DELETE FROM {table}")
+                    copied = {table: _copy_table(source, target, table, marks.get(table), now)
+                              for table in TABLES}
+            _last_sync = time.monotonic()
+            return copied
+        except pymysql.MySQLError as e:
+            print(f"MySQL error in sync_replica: {e}")
+            return None
+        finally:
+            target.close()
+
+
+def _refresh_in_background() -> None:
+    global _last_sync
+    if _sync_lock.locked():
+        return
+    # Отметка ставится сразу, чтобы недоступный сервер не опрашивался при каждом поиске.
+    _last_sync = time.monotonic()
+    threading.Thread(target=sync_replica, name="replica-sync", daemon=True).start()
+
+
+def _replica() -> sqlite3.Connection:
+    """
+    Возвращает соединение с копией, заполняя её при первом обращении и
+    запуская фоновое обновление по истечении REPLICA_REFRESH_INTERVAL.
+    """
+    connection = _connection()
+    if not watermarks(connection):
+        sync_replica()
+    elif REPLICA_REFRESH_INTERVAL > 0 and time.monotonic() - _last_sync >= REPLICA_REFRESH_INTERVAL:
+        _refresh_in_background()
+    return connection
+
+
+def _page_position(offset: int, page_token: Optional[str]) -> Tuple[int, int]:
+    return mc.decode_page_token(page_token) if page_token else (0, offset)
+
+
+def search_by_keyword(keyword: str, offset: int = 0, limit: int = DEFAULT_LIMIT,
+                      page_token: Optional[str] = None) -> List[Dict]:
+    """
+    Выполняет поиск фильмов по ключевому слову в локальной копии.
+
+    :param keyword: Ключевое слово для поиска в названии фильма.
+    :param offset: Смещение для постраничного вывода (если page_token не задан).
+    :param limit: Количество фильмов для вывода(константа в config).
+    :param page_token: Токен продолжения из next_page_token().
+    :return: Список фильмов, удовлетворяющих критерию.
+    """
+    after_id, offset = _page_position(offset, page_token)
+    return _replica().execute(KEYWORD_PAGE_SQL, (f'%{keyword}%', after_id, limit, offset)).fetchall()
+
+
+def search_by_genre_and_years(genre: str, year_from: int, year_to: int, offset: int = 0,
+                              limit: int = DEFAULT_LIMIT, page_token: Optional[str] = None) -> List[Dict]:
+    """
+    Ищет фильмы по жанру и диапазону лет в локальной копии.
+
+    :param genre: Название жанра.
+    :param year_from: Начальный год диапазона.
+    :param year_to: Конечный год диапазона.
+    :param offset: Смещение (для постраничного вывода, если page_token не задан).
+    :param limit: Лимит количества фильмов на страницу(константа в config).
+    :param page_token: Токен продолжения из next_page_token().
+    :return: Список фильмов по жанру и диапазону лет.
+    """
+    after_id, offset = _page_position(offset, page_token)
+    return _replica().execute(GENRE_PAGE_SQL,
+                              (year_from, year_to, after_id, genre, limit, offset, genre)).fetchall()
+
+
+def get_all_genres() -> List[Dict[str, Any]]:
+    """
+    Возвращает список всех жанров с номерами(ID) из локальной копии.
+
+    :return: Список словарей с полями category_id и name.
+    """
+    return _replica().execute(mc.ALL_GENRES_SQL).fetchall()
+
+
+def get_min_max_years() -> Tuple[Optional[int], Optional[int]]:
+    """
+    Определяет минимальный и максимальный год выпуска фильмов по локальной копии.
+
+    :return: Кортеж из минимального и максимального года.
+    """
+    years = _replica().execute(mc.YEAR_BOUNDS_SQL).fetchone()
+    return years['min_year'], years['max_year']
+
+
+def _normalized(movies: List[Dict[str, Any]]) -> List[Tuple]:
+    """Приводит страницу к сравнимому виду: порядок актёров в GROUP_CONCAT не определён."""
+    return [(movie['film_id'], movie['title'], movie['release_year'], movie['length'],
+             movie['description'], movie['genre'], sorted((movie['actors'] or '').split(', ')))
+            for movie in movies]
+
+
+def _mysql_counts() -> Dict[str, int]:
+    with mc.mysql_connection() as connection:
+        if not connection:
+            raise pymysql.OperationalError("Unable to connect to MySQL")
+        with connection.cursor() as cursor:
+            counts = {}
+            for table in TABLES:
+                cursor.execute(f"SELECT COUNT(*) AS n FROM {table}")
+                counts[table] = cursor.fetchone()['n']
+            return counts
+
+
+def check_consistency(keywords: Optional[List[str]] = None, limit: int = DEFAULT_LIMIT) -> List[str]:
+    """
+    Сравнивает копию с MySQL: число строк в таблицах, первую страницу поиска
+    по каждому жанру за все годы и по каждому ключевому слову.
+
+    :param keywords: Ключевые слова для проверки поиска.
+    :param limit: Размер сравниваемой страницы.
+    :return: Описания расхождений; пустой список — копия согласована.
+    :raises pymysql.MySQLError: Если MySQL недоступен.
+    """
+    replica = _replica()
+    problems = []
+    for table, expected in _mysql_counts().items():
+        actual = replica.execute(f"SELECT COUNT(*) AS n FROM {table}").fetchone()['n']
+        if actual != expected:
+            problems.append(f"{table}: {actual} rows in replica, {expected} in MySQL")
+
+    min_year, max_year = mc._mysql_get_min_max_years() or (None, None)
+    if get_min_max_years() != (min_year, max_year):
+        problems.append(f"year bounds: {get_min_max_years()} in replica, {(min_year, max_year)} in MySQL")
+    for genre in mc._mysql_get_all_genres():
+        name = genre['name']
+        expected = mc._mysql_search_by_genre_and_years(name, min_year, max_year, limit=limit)
+        if _normalized(search_by_genre_and_years(name, min_year, max_year, limit=limit)) != _normalized(expected):
+            problems.append(f"genre {name!r}: first page differs")
+    for keyword in keywords or []:
+        expected = mc._mysql_search_by_keyword(keyword, limit=limit)
+        if _normalized(search_by_keyword(keyword, limit=limit)) != _normalized(expected):
+            problems.append(f"keyword {keyword!r}: first page differs")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    sync = commands.add_parser("sync", help="загрузить изменения из MySQL")
+    sync.add_argument("--full", action="store_true", help="перенести все данные заново")
+    check = commands.add_parser("check", help="сравнить копию с MySQL")
+    check.add_argument("keywords", nargs="*", help="ключевые слова для проверки поиска")
+    args = parser.parse_args()
+
+    if args.command == "sync":
+        started = time.perf_counter()
+        copied = sync_replica(full=args.full)
+        if copied is None:
+            print("❌ Не удалось синхронизировать копию: MySQL недоступен.")
+            raise SystemExit(1)
+        print(f"✅ {REPLICA_PATH}: {sum(copied.values())} строк за {time.perf_counter() - started:.1f} с "
+              f"({', '.join(f'{table}={count}' for table, count in copied.items())})")
+    else:
+        try:
+            problems = check_consistency(args.keywords)
+        except pymysql.MySQLError as e:
+            print(f"❌ MySQL недоступен: {e}")
+            raise SystemExit(1)
+        for problem in problems:
+            print(f"⚠️ {problem}")
+        if problems:
+            raise SystemExit(1)
+        print("✅ Копия согласована с MySQL.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Повторные попытки и автоматический выключатель (circuit breaker) для обращений к MySQL и MongoDB.
+
+Оба декоратора (with_mysql_connection и with_mongo_connection) выполняют запросы через
+call(): при сбое соединения попытка повторяется с экспоненциальной задержкой и случайным
+разбросом, а после серии сбоев выключатель источника размыкается и запросы к нему
+не выполняются до истечения BREAKER_RESET_TIMEOUT. Затем пропускается один пробный
+запрос: его успех замыкает выключатель, сбой — снова размыкает. Пока источник
+недоступен, читающие функции возвращают последний успешно полученный результат.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple, Type
+
+import config
+import metrics
+from cache import TTLCache
+
+# Число попыток на один вызов (1 — без повторов).
+RETRY_ATTEMPTS: int = getattr(config, "RETRY_ATTEMPTS", 3)
+# Базовая и максимальная задержка между попытками, сек.: base * 2^n со случайным разбросом.
+RETRY_BACKOFF: float = getattr(config, "RETRY_BACKOFF", 0.1)
+RETRY_BACKOFF_MAX: float = getattr(config, "RETRY_BACKOFF_MAX", 2.0)
+# Сколько сбоев подряд размыкают выключатель и через сколько секунд пропускается пробный запрос.
+BREAKER_FAILURE_THRESHOLD: int = getattr(config, "BREAKER_FAILURE_THRESHOLD", 5)
+BREAKER_RESET_TIMEOUT: float = getattr(config, "BREAKER_RESET_TIMEOUT", 30.0)
+# Сколько последних успешных результатов хранить для выдачи при недоступном источнике.
+STALE_RESULTS_SIZE: int = getattr(config, "STALE_RESULTS_SIZE", 256)
+
+
+class CircuitOpenError(Exception):
+    """Выключатель источника разомкнут: запрос не выполнялся."""
+
+
+class LocalError(Exception):
+    """
+    Сбой на стороне клиента, до обращения к источнику (например, исчерпан пул соединений).
+
+    Такие ошибки не повторяются и не учитываются выключателем: о доступности источника они не говорят.
+    """
+
+
+class CircuitBreaker:
+    """
+    Выключатель одного источника данных.
+
+    closed — запросы проходят, сбои подряд считаются; open — запросы отклоняются;
+    half_open — после паузы пропускается ровно один пробный запрос.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.rejections = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def retry_after(self) -> float:
+        """Сколько секунд осталось до пробного запроса (0, если выключатель замкнут)."""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(self._opened_at + self.reset_timeout - time.monotonic(), 0.0)
+
+    def allow(self) -> bool:
+        """
+        Решает, можно ли выполнить запрос сейчас.
+
+        :return: True, если запрос можно выполнять (в состоянии half_open — только первому).
+        """
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() >= self._opened_at + self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.rejections += 1
+        if metrics.METRICS_ENABLED:
+            metrics.registry.inc("breaker_rejections", self.name)
+        return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_skipped(self) -> None:
+        """Попытка не дошла до источника: в half_open пробный запрос можно выполнить снова."""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == self.OPEN or (self.state == self.CLOSED and self.failures < self.failure_threshold):
+                return
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+            self.trips += 1
+        if metrics.METRICS_ENABLED:
+            metrics.registry.inc("breaker_trips", self.name)
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+_stale = TTLCache(maxsize=STALE_RESULTS_SIZE, ttl=float("inf"))
+_counters = {"retries": 0, "stale_results": 0}
+_local = threading.local()
+
+
+@contextmanager
+def track_outcome() -> Iterator[Dict[str, Any]]:
+    """
+    Собирает исходы обращений текущего потока внутри блока with.
+
+    Декораторы доступа к данным при недоступном источнике возвращают пустой или запасной
+    результат; по собранным исходам вызывающий (например, cli) отличает сбой от пустого ответа.
+
+    :return: {'errors': [текст ошибки, ...], 'stale': n} — обращения, завершившиеся сбоем,
+             и число выданных запасных результатов.
+    """
+    outcome: Dict[str, Any] = {"errors": [], "stale": 0}
+    previous = getattr(_local, "outcome", None)
+    _local.outcome = outcome
+    try:
+        yield outcome
+    finally:
+        _local.outcome = previous
+
+
+def _note(name: str, error: Optional[BaseException] = None) -> None:
+    outcome = getattr(_local, "outcome", None)
+    if outcome is None:
+        return
+    if error is None:
+        outcome["stale"] += 1
+    else:
+        outcome["errors"].append(f"{name}: {error}")
+
+
+def get_breaker(backend: str) -> CircuitBreaker:
+    """
+    Возвращает выключатель источника, создавая его при первом обращении.
+
+    :param backend: Имя источника ('mysql', 'mongodb').
+    :return: Общий для процесса CircuitBreaker.
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(backend)
+        if breaker is None:
+            breaker = _breakers[backend] = CircuitBreaker(backend)
+        return breaker
+
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Задержка перед повтором: случайная величина от 0 до base * 2^attempt (не больше максимума).
+
+    Разброс не даёт клиентам, одновременно заметившим сбой, повторять запросы синхронно.
+
+    :param attempt: Номер неудавшейся попытки, начиная с 0.
+    :return: Задержка, сек.
+    """
+    return random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF * 2 ** attempt))
+
+
+def _stale_key(name: str, args: Tuple, kwargs: Dict[str, Any]) -> Optional[Hashable]:
+    key = (name, args, tuple(sorted(kwargs.items())))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _worth_keeping(result: Any) -> bool:
+    # Сохраняются только непустые результаты чтения; ответы записи (bool, int) не подменяются.
+    return isinstance(result, (list, tuple)) and any(item is not None for item in result)
+
+
+def call(backend: str, attempt: Callable[[], Any], name: str, retry_on: Tuple[Type[BaseException], ...],
+         args: Tuple = (), kwargs: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    Выполняет обращение к источнику с повторами, выключателем и запасным результатом.
+
+    :param backend: Имя источника ('mysql', 'mongodb').
+    :param attempt: Функция одной попытки (открывает соединение и выполняет запрос).
+    :param name: Имя вызываемой функции для метрик и запасных результатов.
+    :param retry_on: Исключения, означающие недоступность источника.
+    :param args: Аргументы вызова — вместе с name образуют ключ запасного результата.
+    :param kwargs: Именованные аргументы вызова.
+    :return: Результат попытки, а если источник недоступен — последний успешный
+             результат того же вызова, если он есть.
+    :raises CircuitOpenError: Если выключатель разомкнут и запасного результата нет.
+    :raises retry_on: Если все попытки не удались и запасного результата нет.
+    """
+    breaker = get_breaker(backend)
+    key = _stale_key(name, args, kwargs or {})
+    for number in range(max(RETRY_ATTEMPTS, 1)):
+        try:
+            if not breaker.allow():
+                raise CircuitOpenError(f"{backend} is unavailable, next attempt in {breaker.retry_after():.0f} s")
+            try:
+                result = attempt()
+            except LocalError as e:
+                breaker.record_skipped()
+                _note(name, e)
+                raise
+            except retry_on:
+                breaker.record_failure()
+                raise
+            except Exception as e:
+                # Источник ответил: ошибка в запросе, а не в доступности.
+                breaker.record_success()
+                _note(name, e)
+                raise
+        except (CircuitOpenError, *retry_on) as e:
+            if isinstance(e, CircuitOpenError) or number + 1 >= RETRY_ATTEMPTS or breaker.state == breaker.OPEN:
+                found, stale = _stale.get(key) if key is not None else (False, None)
+                if not found:
+                    _note(name, e)
+                    raise
+                _note(name)
+                _counters["stale_results"] += 1
+                if metrics.METRICS_ENABLED:
+                    metrics.registry.inc("stale_results", name)
+                print(f"⚠️ {e}; showing previously loaded results.")
+                return stale
+            _counters["retries"] += 1
+            if metrics.METRICS_ENABLED:
+                metrics.registry.inc("retries", name)
+            time.sleep(backoff_delay(number))
+            continue
+        breaker.record_success()
+        if key is not None and _worth_keeping(result):
+            _stale.set(key, result)
+        return result
+
+
+def resilience_stats() -> Dict[str, Any]:
+    """
+    Возвращает состояние выключателей и счётчики повторов и запасных результатов.
+
+    :return: {'breakers': {источник: {...}}, 'retries': n, 'stale_results': n}.
+    """
+    with _breakers_lock:
+        breakers = {name: {"state": b.state, "trips": b.trips, "rejections": b.rejections}
+                    for name, b in _breakers.items()}
+    return {"breakers": breakers, **_counters}
+
+
+def reset() -> None:
+    """Замыкает все выключатели и очищает запасные результаты (после восстановления источников)."""
+    with _breakers_lock:
+        _breakers.clear()
+    _stale.clear()
+    _counters.update(retries=0, stale_results=0)
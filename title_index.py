@@ -0,0 +1,103 @@
+from array import array
+from bisect import bisect_right
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+
+class TrigramIndex:
+    """
+    Инвертированный индекс триграмм по названиям фильмов.
+
+    Для ключевого слова из 3+ символов кандидаты берутся из самого редкого списка
+    триграмм и проверяются поиском подстроки, поэтому результат совпадает с
+    LIKE '%keyword%' при регистронезависимой сортировке. Более короткие ключевые
+    слова (и слишком частые триграммы) проверяются перебором названий в порядке
+    film_id с остановкой, как только набрана нужная страница.
+    """
+
+    # Если самый редкий список триграммы длиннее этой доли каталога, выгоднее перебор.
+    SCAN_RATIO = 8
+
+    def __init__(self) -> None:
+        self._titles: Dict[int, str] = {}
+        self._postings: Dict[str, array] = {}
+        self._sorted_ids: Optional[List[int]] = None
+        self.last_update: Optional[object] = None
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    @staticmethod
+    def _trigrams(text: str) -> set:
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def add(self, film_id: int, title: str) -> None:
+        """
+        Добавляет или обновляет название фильма.
+
+        Устаревшие триграммы прежнего названия не удаляются: ложные кандидаты
+        отсеиваются проверкой подстроки по актуальному названию.
+
+        :param film_id: Идентификатор фильма.
+        :param title: Название фильма.
+        """
+        title = title.casefold()
+        if self._titles.get(film_id) == title:
+            return
+        if film_id not in self._titles:
+            self._sorted_ids = None
+        self._titles[film_id] = title
+        for trigram in self._trigrams(title):
+            self._postings.setdefault(trigram, array('q')).append(film_id)
+
+    def remove(self, film_id: int) -> None:
+        """
+        Удаляет фильм из индекса.
+
+        Как и в add, списки триграмм не чистятся: поиск пропускает отсутствующие film_id.
+
+        :param film_id: Идентификатор фильма.
+        """
+        if self._titles.pop(film_id, None) is not None:
+            self._sorted_ids = None
+
+    def ids(self) -> Set[int]:
+        """Возвращает множество film_id в индексе."""
+        return set(self._titles)
+
+    def update(self, rows: Iterable[Tuple[int, str]]) -> None:
+        """Добавляет пачку пар (film_id, title)."""
+        for film_id, title in rows:
+            self.add(film_id, title)
+
+    def _candidates(self, needle: str, after_id: int) -> Iterator[int]:
+        """Возвращает film_id > after_id в порядке возрастания, среди которых есть все совпадения."""
+        postings = [self._postings.get(trigram) for trigram in self._trigrams(needle)]
+        if any(p is None for p in postings):
+            return iter(())
+        rarest = min(postings, key=len) if postings else None
+        if rarest is not None and len(rarest) * self.SCAN_RATIO < len(self._titles):
+            ids = sorted(set(rarest))
+        else:
+            if self._sorted_ids is None:
+                self._sorted_ids = sorted(self._titles)
+            ids = self._sorted_ids
+        return islice(ids, bisect_right(ids, after_id), None)
+
+    def search(self, keyword: str, after_id: int = 0, offset: int = 0,
+               limit: Optional[int] = None) -> List[int]:
+        """
+        Находит фильмы, в названии которых встречается keyword.
+
+        :param keyword: Ключевое слово (без символов подстановки LIKE).
+        :param after_id: Вернуть только film_id больше этого значения.
+        :param offset: Сколько совпадений пропустить после after_id.
+        :param limit: Максимальное количество результатов (None — все).
+        :return: Отсортированный список film_id.
+        """
+        needle = keyword.casefold()
+        titles = self._titles
+        matches = (film_id for film_id in self._candidates(needle, after_id)
+                   if film_id in titles and needle in titles[film_id])
+        stop = None if limit is None else offset + limit
+        return list(islice(matches, offset, stop))